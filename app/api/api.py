@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import transcription, report_template, report, summary
+from app.api.endpoints import transcription, report_template, report, summary, metrics, analytics, upload, jobs, export
 
 api_router = APIRouter()
 
@@ -29,4 +29,39 @@ api_router.include_router(
     summary.router,
     prefix="/summary",
     tags=["summary"]
-) 
\ No newline at end of file
+) 
+
+# 운영 지표 API
+api_router.include_router(
+    metrics.router,
+    prefix="/metrics",
+    tags=["metrics"]
+)
+
+# 사용량 분석 API
+api_router.include_router(
+    analytics.router,
+    prefix="/analytics",
+    tags=["analytics"]
+)
+
+# 분할 업로드(이어 올리기) API
+api_router.include_router(
+    upload.router,
+    prefix="/uploads",
+    tags=["uploads"]
+)
+
+# 작업 큐 API
+api_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["jobs"]
+)
+
+# 대량 내보내기 API
+api_router.include_router(
+    export.router,
+    prefix="/export",
+    tags=["export"]
+)
@@ -0,0 +1,65 @@
+from datetime import date
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.base import get_db
+from app.services.analytics_service import METRICS, query_usage, summarize_usage
+from app.services.usage_service import GROUP_COLUMNS, DEFAULT_GROUP_BY, aggregate
+
+router = APIRouter()
+
+
+@router.get("/usage")
+def get_usage(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    metric: Optional[str] = None,
+    daily: bool = True,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    일별 사용량 집계를 조회합니다.
+    
+    - **start**, **end**: 조회 기간 (YYYY-MM-DD, 양 끝 포함)
+    - **metric**: 지표 (audio_seconds, reports, summaries, processing_ms). 지정하지 않으면 전체 지표를 반환합니다.
+    - **daily**: false이면 일별 행 대신 기간 전체 합계를 반환합니다.
+    """
+    if metric and metric not in METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 지표입니다: {metric}. 선택 가능한 지표: {', '.join(METRICS)}"
+        )
+    if daily:
+        rows = query_usage(db, start, end, metric)
+    else:
+        rows = summarize_usage(db, start, end, metric)
+    return {"start": start, "end": end, "metric": metric, "rows": rows}
+
+
+@router.get("/ledger")
+def get_usage_ledger(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    group_by: str = ",".join(DEFAULT_GROUP_BY),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    요청별 사용량 기록을 집계합니다.
+    
+    - **start**, **end**: 조회 기간 (YYYY-MM-DD, 양 끝 포함)
+    - **group_by**: 집계 기준 (쉼표 구분: day, endpoint, template_code, client_id, kind, model, stage)
+    
+    각 행에는 요청 수, 전송한 오디오 초, 입력/출력/캐시 토큰 수, 모델 호출 수와 캐시 적중 수,
+    평균 요청 처리 시간이 포함됩니다.
+    """
+    columns = [c.strip() for c in group_by.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in GROUP_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 집계 기준입니다: {', '.join(unknown)}. 선택 가능한 기준: {', '.join(GROUP_COLUMNS)}"
+        )
+    columns = columns or DEFAULT_GROUP_BY
+    rows = aggregate(db, start, end, columns)
+    return {"start": start, "end": end, "group_by": columns, "rows": rows}
@@ -0,0 +1,44 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.services.export_service import EXPORT_FORMATS, EXPORT_KINDS, export
+
+router = APIRouter()
+
+
+@router.get("/{kind}")
+def export_records(
+    kind: str,
+    format: str = "ndjson",
+    code: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None
+):
+    """
+    보고서, 요약, 변환 결과를 NDJSON 또는 CSV로 내보냅니다.
+    
+    - **kind**: reports, summaries, transcriptions
+    - **format**: ndjson (기본값) 또는 csv
+    - **code**: 템플릿 코드 (여러 번 지정 가능). 요약/변환 결과는 해당 템플릿 보고서가 있는 변환 결과의 것만 내보냅니다.
+    - **start**, **end**: 생성일 기간 (YYYY-MM-DD, 양 끝 포함)
+    
+    결과는 서버 측 커서로 나누어 조회하면서 바로 전송되므로 행 수와 관계없이 스트리밍됩니다.
+    """
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"알 수 없는 내보내기 종류입니다: {kind}. 선택 가능한 종류: {', '.join(EXPORT_KINDS)}"
+        )
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 형식입니다: {format}. 선택 가능한 형식: {', '.join(EXPORT_FORMATS)}"
+        )
+    
+    return StreamingResponse(
+        export(kind, format, code, start, end),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'}
+    )
@@ -0,0 +1,87 @@
+import json
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.base import get_db
+from app.models import schemas
+from app.models.job import WorkItem
+from app.services.job_service import JOB_HANDLERS, enqueue, retry
+
+router = APIRouter()
+
+
+def job_response(item):
+    return {
+        "id": item.id,
+        "kind": item.kind,
+        "status": item.status,
+        "payload": json.loads(item.payload),
+        "result": json.loads(item.result) if item.result else None,
+        "progress": json.loads(item.progress) if item.progress else None,
+        "error": item.error,
+        "attempts": item.attempts,
+        "max_attempts": item.max_attempts,
+        "available_at": item.available_at,
+        "created_at": item.created_at,
+        "finished_at": item.finished_at
+    }
+
+
+@router.post("/", response_model=schemas.JobResponse, status_code=202)
+def create_job(
+    request: schemas.JobCreateRequest,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    변환/요약/보고서 작업을 등록합니다. 작업은 워커(worker.py)가 가져가 처리합니다.
+    
+    - **kind**: 작업 종류 (transcription, summary, report, report_regeneration)
+    - **payload**: 작업 입력
+    - **max_attempts**: 최대 시도 횟수 (초과 시 dead 상태)
+    """
+    if request.kind not in JOB_HANDLERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 작업 종류입니다: {request.kind}. 선택 가능한 종류: {', '.join(JOB_HANDLERS)}"
+        )
+    item = enqueue(db, request.kind, request.payload, request.max_attempts)
+    db.commit()
+    db.refresh(item)
+    return job_response(item)
+
+
+@router.get("/", response_model=List[schemas.JobResponse])
+def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db)
+) -> Any:
+    """작업 목록을 최근 순으로 조회합니다. (예: status=dead로 실패 작업 조회)"""
+    query = db.query(WorkItem)
+    if status:
+        query = query.filter(WorkItem.status == status)
+    return [job_response(item) for item in query.order_by(WorkItem.id.desc()).limit(min(limit, 500)).all()]
+
+
+@router.get("/{job_id}", response_model=schemas.JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db)
+) -> Any:
+    """작업 상태와 결과를 조회합니다."""
+    item = db.query(WorkItem).filter(WorkItem.id == job_id).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job_response(item)
+
+
+@router.post("/{job_id}/retry", response_model=schemas.JobResponse)
+def retry_job(
+    job_id: int,
+    db: Session = Depends(get_db)
+) -> Any:
+    """실패(dead) 작업을 다시 대기열에 넣습니다."""
+    if not retry(db, job_id):
+        raise HTTPException(status_code=409, detail="dead 상태의 작업만 다시 실행할 수 있습니다")
+    return job_response(db.query(WorkItem).filter(WorkItem.id == job_id).first())
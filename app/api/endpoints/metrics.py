@@ -0,0 +1,47 @@
+from typing import Any
+from fastapi import APIRouter
+
+from app.core.admission import admission_controller
+from app.services.media_pool import media_pool
+from app.services.model_router import model_router
+from app.services.similarity_service import similarity_index
+from app.services.singleflight import single_flight
+from app.services.write_behind import write_behind
+
+router = APIRouter()
+
+
+@router.get("/admission")
+def get_admission_metrics() -> Any:
+    """업로드 엔드포인트 승인 제어 지표 (진행 중 작업, 대기열 깊이, 처리 속도, 거절 수)를 반환합니다."""
+    return admission_controller.metrics()
+
+
+@router.get("/models")
+def get_model_metrics() -> Any:
+    """채팅 모델별 지연 시간 히스토그램과 중복 요청 통계를 반환합니다."""
+    return model_router.metrics()
+
+
+@router.get("/media")
+def get_media_metrics() -> Any:
+    """미디어 디코딩 프로세스 풀 지표 (진행 중 작업, 대기열 대기 시간, 실행 시간, 제한 시간 초과 수)를 반환합니다."""
+    return media_pool.metrics()
+
+
+@router.get("/similarity")
+def get_similarity_metrics() -> Any:
+    """유사 보고서 검색 색인 지표 (차원, 색인 문서 수, 파일 용량)를 반환합니다."""
+    return similarity_index.stats()
+
+
+@router.get("/singleflight")
+def get_singleflight_metrics() -> Any:
+    """동시에 들어온 같은 요청의 외부 API 호출 수와 결과를 나누어 받은 요청 수를 반환합니다."""
+    return single_flight.metrics()
+
+
+@router.get("/write-behind")
+def get_write_behind_metrics() -> Any:
+    """write-behind 저장 지표 (대기 중인 요청 수, 묶음당 요청/행 수, 커밋 시간, 실패 수와 최근 실패한 행)를 반환합니다."""
+    return write_behind.metrics()
@@ -1,15 +1,22 @@
 import json
 import os
-import tempfile
-from typing import Any
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import time
+from typing import Any, List, Optional, Union
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.db.base import get_db
 from app.models import schemas
-from app.models.transcription import Report, ReportTemplate, Transcription
-from app.services.transcription_service import transcribe_audio
-from app.services.report_service import text_to_report
+from app.models.transcription import Report, ReportTemplate, Summary, Transcription
+from app.services import analytics_service, usage_service
+from app.services.segment_service import save_segments, transcript_text
+from app.services.similarity_service import index_reports, similarity_index, vectorize, report_text, KIND_REPORT, KIND_SUMMARY
+from app.services.fingerprint_service import transcribe_or_reuse, save_fingerprint
+from app.services.report_service import text_to_report, text_to_reports
+from app.services.upload_service import upload_store, resolve_source
+from app.services.workspace_service import workspace_manager, save_upload
+from app.services.write_behind import write_behind
 
 router = APIRouter()
 
@@ -17,6 +24,8 @@ router = APIRouter()
 @router.post("/text", response_model=schemas.ReportResponse)
 def create_report_from_text(
     request: schemas.TextToReportRequest,
+    durable: bool = False,
+    response: Response = None,
     db: Session = Depends(get_db)
 ) -> Any:
     """
@@ -24,7 +33,10 @@ def create_report_from_text(
     
     - **text**: 변환할 텍스트
     - **code**: 보고서 양식 코드 (예: C001)
+    - **durable**: write-behind 저장을 사용하는 경우 보고서가 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
     """
+    started = time.monotonic()
+    
     # 템플릿 조회
     template = db.query(ReportTemplate).filter(ReportTemplate.code == request.code).first()
     if not template:
@@ -34,17 +46,26 @@ def create_report_from_text(
         )
     
     # 텍스트를 보고서로 변환
-    report_content = text_to_report(request.text, json.loads(template.template))
+    with usage_service.labels(template_code=template.code):
+        report_content = text_to_report(request.text, json.loads(template.template))
     
     # 데이터베이스에 저장
     db_report = Report(
         template_id=template.id,
         raw_text=request.text,
-        content=json.dumps(report_content)
+        content=json.dumps(report_content),
+        template_version=template.version
     )
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    write = write_behind.begin(db, durable)
+    write.add(db_report)
+    
+    # 사용량 집계 갱신 (커밋되면 반영)
+    write.run(analytics_service.record_report, template.code)
+    write.run(analytics_service.record_processing, "report_text", started, time.monotonic())
+    write.after_commit(lambda: index_reports([db_report]))
+    if not write.commit() and durable:
+        # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+        response.status_code = 202
     
     # 응답 반환
     return {
@@ -56,34 +77,48 @@ def create_report_from_text(
     }
 
 
-@router.post("/audio", response_model=schemas.ReportResponse)
+@router.post("/audio", response_model=Union[schemas.ReportResponse, schemas.MultiReportResponse])
 async def create_report_from_audio(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
+    upload_id: Optional[str] = Form(None),
     code: str = None,
+    codes: Optional[List[str]] = Query(None),
+    durable: bool = False,
+    response: Response = None,
     db: Session = Depends(get_db)
 ) -> Any:
     """
     오디오 또는 영상 파일과 보고서 양식 코드를 받아 보고서를 생성합니다.
     
     - **file**: 변환할 오디오 또는 영상 파일
+    - **upload_id**: 파일 대신 사용할 완료된 분할 업로드 ID (/uploads)
     - **code**: 보고서 양식 코드 (예: C001)
+    - **codes**: 여러 보고서 양식 코드 (예: codes=C001&codes=CHILD01). 한 번만 변환하여 양식별 보고서를 동시에 생성합니다.
+    - **durable**: write-behind 저장을 사용하는 경우 보고서가 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
     """
-    if not code:
+    started = time.monotonic()
+    
+    # 요청된 템플릿 코드 목록 (중복 제거, 순서 유지)
+    template_codes = list(dict.fromkeys((codes or []) + ([code] if code else [])))
+    if not template_codes:
         raise HTTPException(
             status_code=400,
-            detail="보고서 양식 코드(code)가 필요합니다"
+            detail="보고서 양식 코드(code 또는 codes)가 필요합니다"
         )
     
     # 템플릿 조회
-    template = db.query(ReportTemplate).filter(ReportTemplate.code == code).first()
-    if not template:
+    templates = db.query(ReportTemplate).filter(ReportTemplate.code.in_(template_codes)).all()
+    templates_by_code = {t.code: t for t in templates}
+    missing_codes = [c for c in template_codes if c not in templates_by_code]
+    if missing_codes:
         raise HTTPException(
             status_code=404,
-            detail=f"코드 '{code}'에 해당하는 보고서 템플릿이 없습니다"
+            detail=f"코드 '{', '.join(missing_codes)}'에 해당하는 보고서 템플릿이 없습니다"
         )
     
     # 파일 확장자 확인
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_name, upload_path = resolve_source(db, file, upload_id)
+    file_ext = os.path.splitext(file_name)[1].lower()
     
     # 지원하는 파일 형식 확인
     audio_formats = ['.mp3', '.wav', '.ogg', '.m4a']
@@ -99,51 +134,215 @@ async def create_report_from_audio(
             detail=f"지원하지 않는 파일 형식입니다. 지원하는 형식: {', '.join(audio_formats + video_formats)}"
         )
     
-    # 파일 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-        temp_file.write(await file.read())
-        temp_file_path = temp_file.name
-    
-    try:
-        # 음성/영상 변환
-        transcription_result = transcribe_audio(temp_file_path)
-        transcription_text = transcription_result["text"]
+    # 요청 전용 작업 공간에 파일 저장 (모든 종료 경로에서 정리됨)
+    with workspace_manager.create() as workspace:
+        temp_file_path = upload_path or await save_upload(workspace, file, "input" + file_ext)
         
-        # 데이터베이스에 변환 결과 저장
+        # 음성/영상 변환 (템플릿 수와 관계없이 한 번만 수행, 이벤트 루프를 막지 않도록 스레드에서 실행)
+        # (같은 녹음의 기존 변환 결과가 있으면 재사용)
+        transcription_result = await run_in_threadpool(transcribe_or_reuse, temp_file_path, workspace)
+        transcription_text = transcription_result["text"]
+    
+    # 템플릿별 보고서 동시 생성
+    results = await run_in_threadpool(
+        text_to_reports,
+        transcription_text,
+        {c: json.loads(templates_by_code[c].template) for c in template_codes}
+    )
+    
+    # 모든 양식이 실패하면 아무것도 저장/삭제하지 않음 (같은 파일 또는 upload_id로 다시 요청 가능)
+    errors = {c: results[c]["error"] for c in template_codes if "error" in results[c]}
+    if len(errors) == len(template_codes):
+        raise HTTPException(
+            status_code=500,
+            detail=f"보고서 생성 중 오류가 발생했습니다: {errors}"
+        )
+    
+    # 변환 결과와 보고서를 하나의 트랜잭션으로 저장 (재사용한 변환 결과는 다시 저장하지 않음)
+    write = write_behind.begin(db, durable)
+    transcription_id = transcription_result["transcription_id"]
+    if transcription_id is None:
         db_transcription = Transcription(
-            file_name=file.filename,
+            file_name=file_name,
             file_type=file_type,
             transcription_text=transcription_text,
             duration=transcription_result.get("duration")
         )
-        db.add(db_transcription)
-        db.commit()
-        db.refresh(db_transcription)
-        
-        # 텍스트를 보고서로 변환
-        report_content = text_to_report(transcription_text, json.loads(template.template))
-        
-        # 데이터베이스에 보고서 저장
+        write.add(db_transcription)
+        transcription_id = db_transcription.id
+        write.run(save_segments, transcription_id, transcription_result["segments"])
+        write.run(save_fingerprint, transcription_id, transcription_result["fingerprint"])
+        write.run(analytics_service.record_transcription, file_type, db_transcription.duration)
+    
+    db_reports = {}
+    for c in template_codes:
+        if "content" not in results[c]:
+            continue
         db_report = Report(
-            transcription_id=db_transcription.id,
-            template_id=template.id,
+            transcription_id=transcription_id,
+            template_id=templates_by_code[c].id,
             raw_text=transcription_text,
-            content=json.dumps(report_content)
+            content=json.dumps(results[c]["content"]),
+            template_version=templates_by_code[c].version
         )
-        db.add(db_report)
-        db.commit()
-        db.refresh(db_report)
-        
-        # 응답 반환
-        return {
+        write.add(db_report)
+        db_reports[c] = db_report
+    
+    # 사용량 집계 갱신 (커밋되면 반영)
+    for c in db_reports:
+        write.run(analytics_service.record_report, c)
+    write.run(analytics_service.record_processing, "report_audio", started, time.monotonic())
+    write.after_commit(lambda: index_reports(db_reports.values()))
+    # 처리가 끝난 분할 업로드 파일은 결과가 저장된 뒤 삭제 (저장에 실패하면 다시 처리 가능)
+    if upload_id:
+        upload_store.delete_after(db, write, upload_id)
+    if not await run_in_threadpool(write.commit) and durable:
+        # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+        response.status_code = 202
+    
+    reports = {
+        c: {
             "id": db_report.id,
-            "code": template.code,
-            "name": template.name,
-            "content": report_content,
+            "code": c,
+            "name": templates_by_code[c].name,
+            "content": results[c]["content"],
             "created_at": db_report.created_at
         }
+        for c, db_report in db_reports.items()
+    }
+    
+    # 단일 코드 요청은 기존 응답 형식 유지
+    if not codes:
+        return reports[code]
+    
+    return {
+        "transcription_id": transcription_id,
+        "reports": reports,
+        "errors": errors
+    }
+
+
+@router.post("/from-transcription/{transcription_id}", response_model=schemas.ReportResponse)
+def create_report_from_transcription(
+    transcription_id: int,
+    request: schemas.TranscriptionToReportRequest,
+    durable: bool = False,
+    response: Response = None,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    저장된 변환 결과(또는 그 일부 시간 구간)로 보고서를 생성합니다. (파일 재업로드 및 재변환 없음)
+    
+    - **transcription_id**: 변환 결과 ID
+    - **code**: 보고서 양식 코드 (예: C001)
+    - **start**, **end**: 구간(초). 지정하면 저장된 세그먼트 중 해당 구간의 텍스트만 사용합니다.
+    - **durable**: write-behind 저장을 사용하는 경우 보고서가 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
+    """
+    started = time.monotonic()
+    if request.start is not None and request.end is not None and request.start >= request.end:
+        raise HTTPException(status_code=400, detail="구간 끝은 구간 시작보다 커야 합니다")
+    
+    template = db.query(ReportTemplate).filter(ReportTemplate.code == request.code).first()
+    if not template:
+        raise HTTPException(
+            status_code=404,
+            detail=f"코드 '{request.code}'에 해당하는 보고서 템플릿이 없습니다"
+        )
+    transcription = db.query(Transcription).filter(Transcription.id == transcription_id).first()
+    if not transcription:
+        raise HTTPException(status_code=404, detail="변환 결과를 찾을 수 없습니다")
+    
+    text = transcript_text(db, transcription, request.start, request.end)
+    if not text:
+        raise HTTPException(status_code=400, detail="요청한 구간에 변환된 텍스트가 없습니다")
+    
+    with usage_service.labels(template_code=template.code):
+        report_content = text_to_report(text, json.loads(template.template))
+    
+    db_report = Report(
+        transcription_id=transcription.id,
+        template_id=template.id,
+        raw_text=text,
+        content=json.dumps(report_content),
+        template_version=template.version
+    )
+    write = write_behind.begin(db, durable)
+    write.add(db_report)
+    
+    # 사용량 집계 갱신 (커밋되면 반영)
+    write.run(analytics_service.record_report, template.code)
+    write.run(analytics_service.record_processing, "report_from_transcription", started, time.monotonic())
+    write.after_commit(lambda: index_reports([db_report]))
+    if not write.commit() and durable:
+        # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+        response.status_code = 202
+    
+    return {
+        "id": db_report.id,
+        "code": template.code,
+        "name": template.name,
+        "content": report_content,
+        "created_at": db_report.created_at
+    }
+
+
+@router.get("/{report_id}/similar", response_model=schemas.SimilarReportsResponse)
+def get_similar_reports(
+    report_id: int,
+    k: int = Query(10, ge=1, le=100),
+    same_template: bool = True,
+    include_summaries: bool = False,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    내용이 비슷한 과거 보고서(및 요약)를 조회합니다.
+    
+    - **k**: 결과 수
+    - **same_template**: true이면 같은 템플릿(예: CHILD01)으로 만든 보고서만 검색합니다.
+    - **include_summaries**: true이면 요약도 함께 검색합니다.
+    """
+    report = db.query(Report).filter(Report.id == report_id).first()
+    if not report:
+        raise HTTPException(status_code=404, detail="보고서를 찾을 수 없습니다")
+    
+    kinds = (KIND_REPORT, KIND_SUMMARY) if include_summaries else (KIND_REPORT,)
+    # 색인에서 지워진 문서(삭제된 보고서 등)가 있어도 k개를 채울 수 있도록 여유 있게 검색
+    hits = similarity_index.search(
+        vectorize(report_text(report), similarity_index.dim),
+        k=k * 2,
+        kinds=kinds,
+        group=report.template_id if same_template else None,
+        exclude=(KIND_REPORT, report.id)
+    )
+    
+    report_ids = [doc_id for kind, doc_id, _ in hits if kind == KIND_REPORT]
+    summary_ids = [doc_id for kind, doc_id, _ in hits if kind == KIND_SUMMARY]
+    reports = {
+        row.id: row for row in
+        db.query(Report.id, Report.transcription_id, Report.created_at, ReportTemplate.code)
+        .join(ReportTemplate, ReportTemplate.id == Report.template_id)
+        .filter(Report.id.in_(report_ids))
+    } if report_ids else {}
+    summaries = {
+        row.id: row for row in
+        db.query(Summary.id, Summary.transcription_id, Summary.created_at)
+        .filter(Summary.id.in_(summary_ids))
+    } if summary_ids else {}
     
-    finally:
-        # 임시 파일 삭제
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path) 
\ No newline at end of file
+    items = []
+    for kind, doc_id, score in hits:
+        if kind == KIND_REPORT and doc_id in reports:
+            row = reports[doc_id]
+            items.append({
+                "kind": "report", "id": doc_id, "score": score, "code": row.code,
+                "transcription_id": row.transcription_id, "created_at": row.created_at
+            })
+        elif kind == KIND_SUMMARY and doc_id in summaries:
+            row = summaries[doc_id]
+            items.append({
+                "kind": "summary", "id": doc_id, "score": score,
+                "transcription_id": row.transcription_id, "created_at": row.created_at
+            })
+        if len(items) == k:
+            break
+    return {"report_id": report.id, "items": items}
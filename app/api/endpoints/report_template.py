@@ -4,9 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+from app.api.endpoints.jobs import job_response
+from app.core.responses import SplicedJSONResponse, raw_json
 from app.db.base import get_db
 from app.models import schemas
-from app.models.transcription import ReportTemplate
+from app.models.transcription import ReportTemplate, ReportTemplateVersion
+from app.services import template_service
+from app.services.job_service import enqueue
 
 router = APIRouter()
 
@@ -30,13 +34,14 @@ def get_report_template_format(
             detail=f"코드 '{code}'에 해당하는 보고서 템플릿이 없습니다"
         )
     
-    # 템플릿 데이터 반환
-    return {
+    # 템플릿 데이터 반환 (저장된 JSON을 파싱하지 않고 그대로 삽입)
+    return SplicedJSONResponse({
         "code": template.code,
         "name": template.name,
-        "format": json.loads(template.template),
-        "description": template.description
-    }
+        "format": raw_json(template.template),
+        "description": template.description,
+        "version": template.version
+    })
 
 
 @router.get("/", response_model=List[schemas.ReportTemplateResponse])
@@ -48,19 +53,20 @@ def list_report_templates(
     """모든 보고서 템플릿 목록을 반환합니다."""
     templates = db.query(ReportTemplate).offset(skip).limit(limit).all()
     
-    # ORM 모델을 Pydantic 모델로 변환
-    return [
-        schemas.ReportTemplateResponse(
-            id=t.id,
-            code=t.code,
-            name=t.name,
-            description=t.description,
-            template=json.loads(t.template),
-            created_at=t.created_at,
-            updated_at=t.updated_at
-        )
+    # 저장된 템플릿 JSON을 파싱하지 않고 응답 본문에 그대로 삽입
+    return SplicedJSONResponse([
+        {
+            "code": t.code,
+            "name": t.name,
+            "description": t.description,
+            "template": raw_json(t.template),
+            "id": t.id,
+            "version": t.version,
+            "created_at": t.created_at,
+            "updated_at": t.updated_at
+        }
         for t in templates
-    ]
+    ])
 
 
 @router.post("/", response_model=schemas.ReportTemplateResponse)
@@ -81,6 +87,7 @@ def create_report_template(
             template=template_json
         )
         db.add(db_template)
+        template_service.create_version(db, db_template)
         db.commit()
         db.refresh(db_template)
         
@@ -91,6 +98,7 @@ def create_report_template(
             name=db_template.name,
             description=db_template.description,
             template=json.loads(db_template.template),
+            version=db_template.version,
             created_at=db_template.created_at,
             updated_at=db_template.updated_at
         )
@@ -103,6 +111,89 @@ def create_report_template(
         )
 
 
+def get_template_or_404(db, code, lock=False):
+    query = db.query(ReportTemplate).filter(ReportTemplate.code == code)
+    if lock:
+        query = query.with_for_update()
+    template = query.first()
+    if not template:
+        raise HTTPException(
+            status_code=404,
+            detail=f"코드 '{code}'에 해당하는 보고서 템플릿이 없습니다"
+        )
+    return template
+
+
+@router.put("/{code}", response_model=schemas.ReportTemplateUpdateResponse)
+def update_report_template(
+    code: str,
+    request: schemas.ReportTemplateUpdate,
+    regenerate: bool = True,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    보고서 템플릿을 수정합니다. 필드 정의가 바뀌면 새 버전으로 저장됩니다.
+    
+    - **template**: 새 템플릿
+    - **regenerate**: 기존 보고서의 추가/변경된 필드를 다시 생성하는 작업 등록 여부 (기본값: true)
+    """
+    # 동시에 수정하면 같은 버전을 만들지 않도록 템플릿 행을 잠그고 수정
+    template = get_template_or_404(db, code, lock=True)
+    diff = template_service.update_template(db, template, request.template, request.name, request.description)
+    job = None
+    if diff and regenerate:
+        job = enqueue(db, "report_regeneration", {"code": template.code})
+    db.commit()
+    return {
+        "code": template.code,
+        "version": template.version,
+        "diff": diff,
+        "job_id": job.id if job else None
+    }
+
+
+@router.get("/{code}/versions", response_model=List[schemas.ReportTemplateVersionResponse])
+def list_report_template_versions(
+    code: str,
+    db: Session = Depends(get_db)
+) -> Any:
+    """보고서 템플릿의 버전별 템플릿과 이전 버전 대비 필드 변경 내역을 최신 순으로 반환합니다."""
+    template = get_template_or_404(db, code)
+    versions = (
+        db.query(ReportTemplateVersion)
+        .filter(ReportTemplateVersion.template_id == template.id)
+        .order_by(ReportTemplateVersion.version.desc())
+        .all()
+    )
+    return SplicedJSONResponse([
+        {
+            "version": v.version,
+            "template": raw_json(v.template),
+            "diff": raw_json(v.diff) if v.diff else None,
+            "created_at": v.created_at
+        }
+        for v in versions
+    ])
+
+
+@router.post("/{code}/regenerate", response_model=schemas.JobResponse, status_code=202)
+def regenerate_reports(
+    code: str,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    이전 버전 템플릿으로 생성된 보고서를 현재 버전에 맞게 갱신하는 작업을 등록합니다.
+    
+    추가/변경된 필드만 저장된 원문으로 다시 생성하여 기존 내용에 병합하며,
+    진행 상황은 작업 조회(/jobs/{job_id})의 progress로 확인할 수 있습니다.
+    """
+    template = get_template_or_404(db, code)
+    item = enqueue(db, "report_regeneration", {"code": template.code})
+    db.commit()
+    db.refresh(item)
+    return job_response(item)
+
+
 @router.post("/init-child-counseling", response_description="아동 상담 보고서 템플릿 초기화")
 def init_child_counseling_template(db: Session = Depends(get_db)):
     """아동 상담 보고서 템플릿을 초기화합니다."""
@@ -216,6 +307,7 @@ def init_child_counseling_template(db: Session = Depends(get_db)):
     )
     
     db.add(template)
+    template_service.create_version(db, template)
     db.commit()
     db.refresh(template)
     
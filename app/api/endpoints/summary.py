@@ -1,14 +1,24 @@
 import os
-import tempfile
 import json
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from typing import Optional
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+import time
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional, List
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session, load_only
 
-from app.services.summary_service import summarize_audio
-from app.services.transcription_service import transcribe_audio
-from app.db.session import get_db
+from app.core.responses import SplicedJSONResponse, raw_json
+from app.services import analytics_service
+from app.services.archive_service import rehydrate
+from app.services.fingerprint_service import save_fingerprint
+from app.services.media_pool import MediaTaskTimeout
+from app.services.segment_service import save_segments, transcript_text
+from app.services.similarity_service import index_summaries
+from app.services.summary_service import summarize_audio, summarize_text_variants
+from app.services.upload_service import upload_store, resolve_source
+from app.services.workspace_service import workspace_manager, save_upload, WorkspaceQuotaExceeded
+from app.services.write_behind import write_behind
+from app.db.base import get_db
 from app.models.transcription import Transcription, Summary
 
 router = APIRouter()
@@ -18,26 +28,71 @@ class SummaryOptions(BaseModel):
     focus: Optional[str] = "general"  # general, key_points, action_items
     language: Optional[str] = "ko"    # ko, en, ja, etc.
 
+# 요약 조회 시 선택 가능한 필드와 해당 컬럼
+SUMMARY_DETAIL_FIELDS = {
+    "file_name": (Transcription, Transcription.file_name),
+    "duration": (Transcription, Transcription.duration),
+    "text": (Transcription, Transcription.transcription_text),
+    "summary": (Summary, Summary.summary_text),
+    "length": (Summary, Summary.length),
+    "focus": (Summary, Summary.focus),
+    "language": (Summary, Summary.language),
+    "report": (Summary, Summary.report_content),
+    "created_at": (Summary, Summary.created_at),
+    "updated_at": (Summary, Summary.updated_at),
+}
+
+# 요약 생성 응답에서 선택 가능한 필드
+SUMMARY_CREATE_FIELDS = ["filename", "duration", "text", "summary", "report", "saved_to_db", "ids"]
+
+def parse_fields(fields, allowed):
+    """쉼표로 구분된 필드 목록을 검증하여 반환 (지정하지 않으면 전체 필드)"""
+    if not fields:
+        return list(allowed)
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"알 수 없는 필드입니다: {', '.join(unknown)}. 선택 가능한 필드: {', '.join(allowed)}"
+        )
+    return selected
+
+class SummaryFromTranscriptionRequest(BaseModel):
+    variants: List[SummaryOptions] = Field(..., min_length=1, description="생성할 요약 옵션 목록")
+    start: Optional[float] = Field(None, ge=0, description="구간 시작(초), 지정하면 해당 구간의 세그먼트만 요약")
+    end: Optional[float] = Field(None, gt=0, description="구간 끝(초)")
+
 @router.post("/", response_description="음성 데이터 요약 및 보고서 생성")
 async def create_summary(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
+    upload_id: Optional[str] = Form(None),
     length: Optional[str] = Form("medium"),
     focus: Optional[str] = Form("general"),
     language: Optional[str] = Form("ko"),
     save_to_db: Optional[bool] = Form(True),
+    fields: Optional[str] = Form(None),
+    durable: bool = False,
+    response: Response = None,
     db: Session = Depends(get_db)
 ):
     """
     음성/영상 파일을 업로드하여 요약 및 보고서 생성
     
     - **file**: 음성/영상 파일 (mp3, wav, mp4, etc.)
+    - **upload_id**: 파일 대신 사용할 완료된 분할 업로드 ID (/uploads)
     - **length**: 요약 길이 (short, medium, long)
     - **focus**: 요약 초점 (general, key_points, action_items)
     - **language**: 요약 언어 (ko, en, ja, etc.)
     - **save_to_db**: 결과를 데이터베이스에 저장할지 여부
+    - **fields**: 응답에 포함할 필드 목록 (쉼표 구분, 예: summary,report,ids). 지정하지 않으면 모든 필드를 반환합니다.
+    - **durable**: write-behind 저장을 사용하는 경우 요약이 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
     """
+    started = time.monotonic()
+    selected = parse_fields(fields, SUMMARY_CREATE_FIELDS)
+    
     # 파일 확장자 확인
-    filename = file.filename
+    filename, upload_path = resolve_source(db, file, upload_id)
     ext = os.path.splitext(filename)[1].lower()
     allowed_extensions = ['.mp3', '.wav', '.m4a', '.ogg', '.mp4', '.avi', '.mov', '.webm']
     
@@ -45,11 +100,13 @@ async def create_summary(
         raise HTTPException(status_code=400, 
                           detail=f"지원되지 않는 파일 형식입니다. 지원 형식: {', '.join(allowed_extensions)}")
     
-    # 임시 파일로 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
-        temp_path = temp_file.name
-        contents = await file.read()
-        temp_file.write(contents)
+    # 요청 전용 작업 공간에 파일 저장 (모든 종료 경로에서 정리됨)
+    workspace = workspace_manager.create()
+    try:
+        temp_path = upload_path or await save_upload(workspace, file, "input" + ext)
+    except BaseException:
+        workspace.cleanup()
+        raise
     
     try:
         # 요약 옵션 설정
@@ -59,40 +116,57 @@ async def create_summary(
             'language': language
         }
         
-        # 음성 데이터 요약
-        result = summarize_audio(temp_path, summary_options)
+        # 음성 데이터 요약 (이벤트 루프를 막지 않도록 스레드에서 실행)
+        result = await run_in_threadpool(summarize_audio, temp_path, summary_options, workspace)
         
         # 결과를 데이터베이스에 저장
         if save_to_db:
-            # 먼저 변환 결과 저장
+            # 먼저 변환 결과 저장 (재사용한 변환 결과는 다시 저장하지 않음)
             file_type = "audio" if ext in ['.mp3', '.wav', '.m4a', '.ogg'] else "video"
+            write = write_behind.begin(db, durable)
             
-            transcription = Transcription(
-                file_name=filename,
-                file_type=file_type,
-                transcription_text=result["text"],
-                duration=result["duration"]
-            )
-            db.add(transcription)
-            db.flush()
+            transcription_id = result["transcription_id"]
+            if transcription_id is None:
+                transcription = Transcription(
+                    file_name=filename,
+                    file_type=file_type,
+                    transcription_text=result["text"],
+                    duration=result["duration"]
+                )
+                write.add(transcription)
+                transcription_id = transcription.id
+                write.run(save_segments, transcription_id, result["segments"])
+                write.run(save_fingerprint, transcription_id, result["fingerprint"])
+                write.run(analytics_service.record_transcription, file_type, transcription.duration)
             
             # 요약 결과 저장
             summary = Summary(
-                transcription_id=transcription.id,
+                transcription_id=transcription_id,
                 summary_text=result["summary"],
                 length=length,
                 focus=focus,
                 language=language,
                 report_content=json.dumps(result["report"], ensure_ascii=False)
             )
-            db.add(summary)
-            db.commit()
+            write.add(summary)
+            
+            # 사용량 집계 갱신 (커밋되면 반영)
+            write.run(analytics_service.record_summary, length, focus, language)
+            write.run(analytics_service.record_processing, "summary", started, time.monotonic())
+            write.after_commit(lambda: index_summaries([summary]))
+            
+            # 처리가 끝난 분할 업로드 파일은 결과가 저장된 뒤 삭제 (저장에 실패하면 다시 처리 가능)
+            if upload_id:
+                upload_store.delete_after(db, write, upload_id)
+            if not await run_in_threadpool(write.commit) and durable:
+                # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+                response.status_code = 202
             
             # 결과에 ID 추가
-            result["transcription_id"] = transcription.id
+            result["transcription_id"] = transcription_id
             result["summary_id"] = summary.id
         
-        return {
+        values = {
             "filename": filename,
             "duration": result["duration"],
             "text": result["text"],
@@ -104,40 +178,150 @@ async def create_summary(
                 "summary_id": result.get("summary_id")
             } if save_to_db else None
         }
+        return {field: values[field] for field in selected}
+    except (HTTPException, MediaTaskTimeout, WorkspaceQuotaExceeded):
+        # 응답 코드가 정해진 오류는 그대로 전달 (504/503 등은 전역 예외 처리기에서 응답)
+        if save_to_db:
+            db.rollback()
+        raise
     except Exception as e:
         # 에러 발생 시 트랜잭션 롤백
         if save_to_db:
             db.rollback()
         raise HTTPException(status_code=500, detail=f"요약 생성 중 오류가 발생했습니다: {str(e)}")
     finally:
-        # 임시 파일 삭제
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+        # 작업 공간 정리
+        workspace.cleanup()
+
+@router.post("/from-transcription/{transcription_id}", response_description="기존 변환 결과로 요약 생성")
+def create_summary_from_transcription(
+    transcription_id: int,
+    request: SummaryFromTranscriptionRequest,
+    durable: bool = False,
+    response: Response = None,
+    db: Session = Depends(get_db)
+):
+    """
+    저장된 변환 결과로 여러 요약을 동시에 생성 (파일 재업로드 및 재변환 없음)
+    
+    - **transcription_id**: 변환 결과 ID
+    - **variants**: 요약 옵션 목록 (length, focus, language)
+    - **start**, **end**: 구간(초). 지정하면 저장된 세그먼트 중 해당 구간의 텍스트만 요약합니다.
+    - **durable**: write-behind 저장을 사용하는 경우 요약이 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
+    """
+    started = time.monotonic()
+    if request.start is not None and request.end is not None and request.start >= request.end:
+        raise HTTPException(status_code=400, detail="구간 끝은 구간 시작보다 커야 합니다")
+    transcription = db.query(Transcription).filter(Transcription.id == transcription_id).first()
+    if not transcription:
+        raise HTTPException(status_code=404, detail="변환 결과를 찾을 수 없습니다")
+    text = transcript_text(db, transcription, request.start, request.end)
+    if not text:
+        raise HTTPException(status_code=400, detail="변환 결과(또는 요청한 구간)에 텍스트가 없습니다")
+    
+    try:
+        # 요약 옵션별 요약 동시 생성
+        results = summarize_text_variants(
+            text,
+            [variant.model_dump() for variant in request.variants]
+        )
+        
+        # 요약 결과를 한 번에 저장
+        write = write_behind.begin(db, durable)
+        summaries = []
+        for result in results:
+            summary = Summary(
+                transcription_id=transcription.id,
+                summary_text=result["summary"],
+                length=result["length"],
+                focus=result["focus"],
+                language=result["language"],
+                report_content=json.dumps(result["report"], ensure_ascii=False)
+            )
+            write.add(summary)
+            summaries.append(summary)
+        summary_ids = [summary.id for summary in summaries]
+        
+        # 사용량 집계 갱신 (커밋되면 반영)
+        for result in results:
+            write.run(analytics_service.record_summary, result["length"], result["focus"], result["language"])
+        write.run(analytics_service.record_processing, "summary_from_transcription", started, time.monotonic())
+        write.after_commit(lambda: index_summaries(summaries))
+        if not write.commit() and durable:
+            # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+            response.status_code = 202
+    except (HTTPException, MediaTaskTimeout, WorkspaceQuotaExceeded):
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"요약 생성 중 오류가 발생했습니다: {str(e)}")
+    
+    return {
+        "transcription_id": transcription.id,
+        "start": request.start,
+        "end": request.end,
+        "summaries": [
+            {
+                "id": summary_id,
+                "length": result["length"],
+                "focus": result["focus"],
+                "language": result["language"],
+                "summary": result["summary"],
+                "report": result["report"]
+            }
+            for summary_id, result in zip(summary_ids, results)
+        ]
+    }
 
 @router.get("/{summary_id}", response_description="요약 정보 조회")
-def get_summary(summary_id: int, db: Session = Depends(get_db)):
+def get_summary(
+    summary_id: int,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
     요약 ID로 요약 정보 조회
     
     - **summary_id**: 요약 ID
+    - **fields**: 반환할 필드 목록 (쉼표 구분, 예: summary,report). 지정하지 않으면 모든 필드를 반환합니다.
     """
-    summary = db.query(Summary).filter(Summary.id == summary_id).first()
-    if not summary:
-        raise HTTPException(status_code=404, detail="요약 정보를 찾을 수 없습니다")
+    selected = parse_fields(fields, SUMMARY_DETAIL_FIELDS)
     
-    transcription = db.query(Transcription).filter(Transcription.id == summary.transcription_id).first()
+    # 요청된 필드에 해당하는 컬럼만 로드 (나머지 컬럼은 조회하지 않음)
+    summary_columns = [Summary.id, Summary.transcription_id]
+    transcription_columns = [Transcription.id]
+    for field in selected:
+        entity, column = SUMMARY_DETAIL_FIELDS[field]
+        if entity is Summary:
+            summary_columns.append(column)
+        elif entity is Transcription:
+            transcription_columns.append(column)
     
-    return {
+    # 요약과 변환 결과를 하나의 조인 쿼리로 조회
+    row = (
+        db.query(Summary, Transcription)
+        .outerjoin(Transcription, Transcription.id == Summary.transcription_id)
+        .options(load_only(*summary_columns), load_only(*transcription_columns))
+        .filter(Summary.id == summary_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="요약 정보를 찾을 수 없습니다")
+    summary, transcription = row
+    
+    values = {
         "id": summary.id,
         "transcription_id": summary.transcription_id,
-        "file_name": transcription.file_name if transcription else None,
-        "duration": transcription.duration if transcription else None,
-        "text": transcription.transcription_text if transcription else None,
-        "summary": summary.summary_text,
-        "length": summary.length,
-        "focus": summary.focus,
-        "language": summary.language,
-        "report": json.loads(summary.report_content) if summary.report_content else None,
-        "created_at": summary.created_at,
-        "updated_at": summary.updated_at
-    } 
\ No newline at end of file
+    }
+    for field in selected:
+        entity, column = SUMMARY_DETAIL_FIELDS[field]
+        source = summary if entity is Summary else transcription
+        value = getattr(source, column.key) if source is not None else None
+        if value is None and field in ("text", "report") and source is not None:
+            # 보관된 레코드는 압축 보관 데이터에서 본문 복원
+            value = rehydrate(db, source, column.key)
+        # 저장된 보고서 JSON은 파싱하지 않고 응답 본문에 그대로 삽입
+        values[field] = raw_json(value) if field == "report" else value
+    
+    return SplicedJSONResponse(values)
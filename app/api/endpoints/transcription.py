@@ -1,29 +1,44 @@
 import os
-import tempfile
-from typing import Any
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import time
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Response, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.db.base import get_db
 from app.models import schemas
 from app.models.transcription import Transcription
-from app.services.transcription_service import transcribe_audio
+from app.services import analytics_service
+from app.services.segment_service import save_segments, get_segments, has_segments
+from app.services.stream_service import StreamingTranscription
+from app.services.fingerprint_service import transcribe_or_reuse, fingerprint_file, save_fingerprint
+from app.services.upload_service import upload_store, resolve_source
+from app.services.workspace_service import workspace_manager, save_upload
+from app.services.write_behind import write_behind
 
 router = APIRouter()
 
 
 @router.post("/", response_model=schemas.TranscriptionResult)
 async def transcribe_file(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
+    upload_id: Optional[str] = Form(None),
+    durable: bool = False,
+    response: Response = None,
     db: Session = Depends(get_db)
 ) -> Any:
     """
     오디오 또는 영상 파일을 업로드하여 텍스트로 변환합니다.
     
     - **file**: 변환할 오디오 또는 영상 파일
+    - **upload_id**: 파일 대신 사용할 완료된 분할 업로드 ID (/uploads)
+    - **durable**: write-behind 저장을 사용하는 경우 변환 결과가 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
     """
+    started = time.monotonic()
+    file_name, upload_path = resolve_source(db, file, upload_id)
+    
     # 파일 확장자 확인
-    file_ext = os.path.splitext(file.filename)[1].lower()
+    file_ext = os.path.splitext(file_name)[1].lower()
     
     # 지원하는 파일 형식 확인
     audio_formats = ['.mp3', '.wav', '.ogg', '.m4a']
@@ -39,29 +54,147 @@ async def transcribe_file(
             detail=f"지원하지 않는 파일 형식입니다. 지원하는 형식: {', '.join(audio_formats + video_formats)}"
         )
     
-    # 파일 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-        temp_file.write(await file.read())
-        temp_file_path = temp_file.name
+    # 요청 전용 작업 공간에 파일 저장 (모든 종료 경로에서 정리됨)
+    with workspace_manager.create() as workspace:
+        temp_file_path = upload_path or await save_upload(workspace, file, "input" + file_ext)
+        
+        # 음성/영상 변환 서비스 호출 (이벤트 루프를 막지 않도록 스레드에서 실행)
+        # 같은 녹음의 기존 변환 결과가 있으면 재사용
+        transcription_result = await run_in_threadpool(transcribe_or_reuse, temp_file_path, workspace)
+        fingerprint = transcription_result.pop("fingerprint")
+        write = write_behind.begin(db, durable)
+        if transcription_result["transcription_id"]:
+            write.run(analytics_service.record_processing, "transcription", started, time.monotonic())
+            if upload_id:
+                upload_store.delete_after(db, write, upload_id)
+            if not await run_in_threadpool(write.commit) and durable:
+                # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+                response.status_code = 202
+            return {**transcription_result, "reused": True}
+        
+        # 데이터베이스에 결과 저장
+        db_transcription = Transcription(
+            file_name=file_name,
+            file_type=file_type,
+            transcription_text=transcription_result["text"],
+            duration=transcription_result.get("duration")
+        )
+        write.add(db_transcription)
+        write.run(save_segments, db_transcription.id, transcription_result["segments"])
+        write.run(save_fingerprint, db_transcription.id, fingerprint)
+        
+        # 사용량 집계 갱신 (커밋되면 반영)
+        write.run(analytics_service.record_transcription, file_type, db_transcription.duration)
+        write.run(analytics_service.record_processing, "transcription", started, time.monotonic())
+        
+        # 처리가 끝난 분할 업로드 파일은 결과가 저장된 뒤 삭제 (저장에 실패하면 다시 처리 가능)
+        if upload_id:
+            upload_store.delete_after(db, write, upload_id)
+        if not await run_in_threadpool(write.commit) and durable:
+            # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+            response.status_code = 202
+        
+        return {**transcription_result, "transcription_id": db_transcription.id}
+
+
+@router.post("/stream", response_model=schemas.TranscriptionResult)
+async def transcribe_stream(
+    request: Request,
+    file_name: str = Query(..., description="원본 파일 이름 (확장자로 파일 형식 판별)"),
+    durable: bool = False,
+    response: Response = None,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    요청 본문으로 받은 파일을 업로드와 동시에 오디오 추출 및 변환합니다.
+    
+    본문은 멀티파트가 아닌 파일 바이트 그대로 보냅니다 (예: curl --data-binary @movie.mp4).
+    완성된 오디오 구간부터 변환을 시작하므로 큰 영상 파일의 전체 처리 시간이 줄어듭니다.
     
-    try:
-        # 음성/영상 변환 서비스 호출
-        transcription_result = transcribe_audio(temp_file_path)
+    - **file_name**: 원본 파일 이름
+    - **durable**: write-behind 저장을 사용하는 경우 변환 결과가 저장될 때까지 기다린 후 응답합니다. 기다리는 시간이 지나면 저장을 계속 진행하고 202로 응답합니다.
+    """
+    started = time.monotonic()
+    
+    # 파일 확장자 확인
+    file_ext = os.path.splitext(file_name)[1].lower()
+    
+    # 지원하는 파일 형식 확인
+    audio_formats = ['.mp3', '.wav', '.ogg', '.m4a']
+    video_formats = ['.mp4', '.avi', '.mov', '.webm']
+    
+    if file_ext in audio_formats:
+        file_type = "audio"
+    elif file_ext in video_formats:
+        file_type = "video"
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 파일 형식입니다. 지원하는 형식: {', '.join(audio_formats + video_formats)}"
+        )
+    
+    with workspace_manager.create() as workspace:
+        pipeline = StreamingTranscription(workspace, file_ext)
+        pipeline.start()
+        try:
+            async for chunk in request.stream():
+                if chunk:
+                    await pipeline.feed(chunk)
+            # 남은 구간 변환을 기다리는 동안 다른 요청의 업로드를 막지 않도록 스레드에서 실행
+            transcription_result = await run_in_threadpool(pipeline.finish)
+        except BaseException:
+            pipeline.abort()
+            raise
+        # 이후 다른 형식으로 올라오는 같은 녹음과 비교할 수 있도록 오디오 지문 계산
+        fingerprint = await run_in_threadpool(fingerprint_file, pipeline.input_path)
         
         # 데이터베이스에 결과 저장
         db_transcription = Transcription(
-            file_name=file.filename,
+            file_name=os.path.basename(file_name),
             file_type=file_type,
             transcription_text=transcription_result["text"],
             duration=transcription_result.get("duration")
         )
-        db.add(db_transcription)
-        db.commit()
-        db.refresh(db_transcription)
+        write = write_behind.begin(db, durable)
+        write.add(db_transcription)
+        write.run(save_segments, db_transcription.id, transcription_result["segments"])
+        write.run(save_fingerprint, db_transcription.id, fingerprint)
+        
+        # 사용량 집계 갱신 (커밋되면 반영)
+        write.run(analytics_service.record_transcription, file_type, db_transcription.duration)
+        write.run(analytics_service.record_processing, "transcription_stream", started, time.monotonic())
+        if not await run_in_threadpool(write.commit) and durable:
+            # 저장 대기 시간 초과: 저장은 계속 진행되므로 같은 요청을 다시 보내지 않도록 202로 응답
+            response.status_code = 202
         
-        return transcription_result
+        return {**transcription_result, "transcription_id": db_transcription.id}
+
+
+@router.get("/{transcription_id}/segments", response_model=schemas.TranscriptionSegmentsResponse)
+def get_transcription_segments(
+    transcription_id: int,
+    start: Optional[float] = Query(None, ge=0),
+    end: Optional[float] = Query(None, gt=0),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    변환 결과의 구간별 텍스트를 시간 범위로 조회합니다.
+    
+    - **transcription_id**: 변환 결과 ID
+    - **start**: 구간 시작(초), 지정하지 않으면 처음부터
+    - **end**: 구간 끝(초), 지정하지 않으면 끝까지
+    """
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="구간 끝은 구간 시작보다 커야 합니다")
+    
+    segments = get_segments(db, transcription_id, start, end)
+    if not segments and not has_segments(db, transcription_id):
+        if db.query(Transcription.id).filter(Transcription.id == transcription_id).first() is None:
+            raise HTTPException(status_code=404, detail="변환 결과를 찾을 수 없습니다")
     
-    finally:
-        # 임시 파일 삭제
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path) 
\ No newline at end of file
+    return {
+        "transcription_id": transcription_id,
+        "start": start,
+        "end": end,
+        "segments": segments
+    }
@@ -0,0 +1,84 @@
+from typing import Any
+from fastapi import APIRouter, Depends, Header, Request, Response
+from sqlalchemy.orm import Session
+
+from app.db.base import get_db
+from app.models import schemas
+from app.services.upload_service import upload_store
+
+router = APIRouter()
+
+
+@router.post("/", response_model=schemas.UploadStatusResponse, status_code=201)
+def create_upload(
+    request: schemas.UploadCreateRequest,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    분할 업로드(이어 올리기) 세션을 생성합니다.
+    
+    - **file_name**: 업로드할 파일 이름
+    - **file_size**: 전체 파일 크기(bytes)
+    
+    반환된 upload_id로 구간을 PUT한 뒤 완료 요청을 보내면, /transcription, /summary, /report/audio에
+    파일 대신 upload_id를 넘겨 처리할 수 있습니다.
+    """
+    upload = upload_store.create(db, request.file_name, request.file_size)
+    return upload_store.status(db, upload.id)
+
+
+@router.put("/{upload_id}", response_model=schemas.UploadStatusResponse)
+async def upload_range(
+    upload_id: str,
+    request: Request,
+    content_range: str = Header(..., alias="Content-Range"),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    파일의 바이트 구간을 업로드합니다. 구간은 임의 순서나 병렬로 보낼 수 있습니다.
+    
+    - **Content-Range**: 요청 본문의 위치 (예: bytes 0-8388607/2147483648)
+    """
+    return await upload_store.write_range(db, upload_id, content_range, request.stream())
+
+
+@router.head("/{upload_id}")
+def get_upload_offset(
+    upload_id: str,
+    db: Session = Depends(get_db)
+) -> Response:
+    """현재 이어 올리기 시작 위치를 Upload-Offset 헤더로 반환합니다."""
+    status = upload_store.status(db, upload_id)
+    return Response(headers={
+        "Upload-Offset": str(status["offset"]),
+        "Upload-Length": str(status["file_size"]),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.get("/{upload_id}", response_model=schemas.UploadStatusResponse)
+def get_upload(
+    upload_id: str,
+    db: Session = Depends(get_db)
+) -> Any:
+    """업로드 세션 상태(받은 구간 목록 포함)를 조회합니다."""
+    return upload_store.status(db, upload_id)
+
+
+@router.post("/{upload_id}/complete", response_model=schemas.UploadStatusResponse)
+def complete_upload(
+    upload_id: str,
+    db: Session = Depends(get_db)
+) -> Any:
+    """모든 구간을 받았는지 확인하고 업로드를 완료합니다."""
+    return upload_store.complete(db, upload_id)
+
+
+@router.delete("/{upload_id}", status_code=204)
+def delete_upload(
+    upload_id: str,
+    db: Session = Depends(get_db)
+) -> Response:
+    """업로드 세션과 업로드된 파일을 삭제합니다."""
+    upload_store.delete(db, upload_id)
+    return Response(status_code=204)
@@ -0,0 +1,323 @@
+import asyncio
+import math
+import re
+import time
+from collections import deque
+from urllib.parse import parse_qs
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.upload_service import upload_store
+
+# 처리량 계산에 사용하는 최근 완료 기록 구간 (초)
+DRAIN_WINDOW_SECONDS = 120
+
+# 분할 업로드 ID만 보내는 작은 폼 본문에서 upload_id를 찾기 위해 미리 읽는 최대 크기
+FORM_PEEK_BYTES = 64 * 1024
+_MULTIPART_UPLOAD_ID = re.compile(rb'name="upload_id"\r\n(?:[^\r\n]+\r\n)*\r\n([^\r\n]+)')
+
+
+class AdmissionRejected(Exception):
+    """요청을 받아들일 수 없는 경우 발생 (429: 클라이언트 한도, 503: 전체 한도)"""
+
+    def __init__(self, status_code, detail, retry_after):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """승인된 요청 정보"""
+
+    __slots__ = ("client", "weight", "admitted_at", "released")
+
+    def __init__(self, client, weight):
+        self.client = client
+        self.weight = weight
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+
+class AdmissionController:
+    """
+    비용이 큰 요청의 동시 처리량을 제한하는 승인 제어기
+
+    요청 가중치는 입력 크기 기준이며 (upload_id로 요청하면 업로드 세션의 파일 크기, Content-Length 없이 보낸
+    스트리밍 요청은 stream_weight), 완료된 요청의 가중치와 처리 시간으로
+    처리 속도를 계산하여 Retry-After 값을 산출합니다. 전체 한도를 넘는 요청은 짧은 대기열에서
+    기다리고, 대기열도 가득 차면 503으로 거절합니다. 클라이언트별 한도를 넘으면 429로 거절합니다.
+    """
+
+    def __init__(self, max_weight, max_per_client, max_queue, max_queue_wait, weight_unit_bytes, stream_weight):
+        self.max_weight = max_weight
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.weight_unit_bytes = weight_unit_bytes
+        self.stream_weight = stream_weight
+        self.inflight_weight = 0.0
+        self.inflight_count = 0
+        self.queued_count = 0
+        self.queued_weight = 0.0
+        self.per_client = {}
+        self.completed = deque()
+        self.counters = {"admitted": 0, "queued": 0, "rejected_429": 0, "rejected_503": 0, "completed": 0}
+        self._cond = None
+
+    def weight_for(self, input_size):
+        """입력 크기에 따른 요청 가중치 (input_size가 None이면 크기를 알 수 없는 스트리밍 요청)"""
+        if input_size is None:
+            return self.stream_weight
+        return 1.0 + input_size / self.weight_unit_bytes
+
+    def drain_rate(self):
+        """최근 완료 기록 기준 초당 처리 가중치"""
+        now = time.monotonic()
+        while self.completed and now - self.completed[0][0] > DRAIN_WINDOW_SECONDS:
+            self.completed.popleft()
+        if not self.completed:
+            return None
+        # 구간 내 완료된 작업 중 가장 먼저 시작된 시점부터의 처리량
+        started = min(done - elapsed for done, _, elapsed in self.completed)
+        span = max(now - started, 1.0)
+        return sum(weight for _, weight, _ in self.completed) / span
+
+    def retry_after(self, extra_weight=0.0):
+        """현재 대기 중인 작업이 처리되기까지 예상 시간 (초)"""
+        backlog = self.inflight_weight + self.queued_weight + extra_weight
+        rate = self.drain_rate()
+        if not rate:
+            return settings.ADMISSION_DEFAULT_RETRY_AFTER
+        return int(min(max(math.ceil(backlog / rate), 1), 600))
+
+    def _fits(self, weight):
+        # 진행 중인 작업이 없으면 한도보다 큰 요청도 허용
+        return self.inflight_count == 0 or self.inflight_weight + weight <= self.max_weight
+
+    async def acquire(self, client, input_size):
+        """요청 승인 (거절 시 AdmissionRejected)"""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        weight = self.weight_for(input_size)
+
+        async with self._cond:
+            if self.per_client.get(client, 0) >= self.max_per_client:
+                self.counters["rejected_429"] += 1
+                raise AdmissionRejected(
+                    429,
+                    f"클라이언트당 동시 처리 가능한 요청 수({self.max_per_client})를 초과했습니다",
+                    self.retry_after(weight)
+                )
+
+            if not self._fits(weight):
+                if self.queued_count >= self.max_queue:
+                    self.counters["rejected_503"] += 1
+                    raise AdmissionRejected(503, "서버가 과부하 상태입니다", self.retry_after(weight))
+
+                # 대기열에서 처리 가능할 때까지 대기
+                self.counters["queued"] += 1
+                self.queued_count += 1
+                self.queued_weight += weight
+                try:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: self._fits(weight)),
+                        timeout=self.max_queue_wait
+                    )
+                except asyncio.TimeoutError:
+                    self.counters["rejected_503"] += 1
+                    raise AdmissionRejected(503, "서버가 과부하 상태입니다", self.retry_after())
+                finally:
+                    self.queued_count -= 1
+                    self.queued_weight -= weight
+
+            self.inflight_weight += weight
+            self.inflight_count += 1
+            self.per_client[client] = self.per_client.get(client, 0) + 1
+            self.counters["admitted"] += 1
+            return AdmissionTicket(client, weight)
+
+    async def charge(self, ticket, weight):
+        """처리 중인 요청의 가중치를 늘림 (스트리밍 요청이 받은 본문 크기가 처음 가중치를 넘은 경우)"""
+        if ticket.released or weight <= ticket.weight:
+            return
+        async with self._cond:
+            self.inflight_weight += weight - ticket.weight
+            ticket.weight = weight
+
+    async def release(self, ticket):
+        """승인된 요청 완료 처리"""
+        if ticket.released:
+            return
+        ticket.released = True
+        async with self._cond:
+            elapsed = time.monotonic() - ticket.admitted_at
+            self.inflight_weight = max(0.0, self.inflight_weight - ticket.weight)
+            self.inflight_count -= 1
+            remaining = self.per_client.get(ticket.client, 1) - 1
+            if remaining > 0:
+                self.per_client[ticket.client] = remaining
+            else:
+                self.per_client.pop(ticket.client, None)
+            self.completed.append((time.monotonic(), ticket.weight, elapsed))
+            self.counters["completed"] += 1
+            self._cond.notify_all()
+
+    def metrics(self):
+        """대기열 및 처리량 지표"""
+        rate = self.drain_rate()
+        return {
+            "inflight_count": self.inflight_count,
+            "inflight_weight": round(self.inflight_weight, 3),
+            "queue_depth": self.queued_count,
+            "queued_weight": round(self.queued_weight, 3),
+            "max_weight": self.max_weight,
+            "clients": len(self.per_client),
+            "drain_rate": round(rate, 4) if rate else None,
+            "estimated_retry_after": self.retry_after(),
+            **self.counters,
+        }
+
+
+class AdmissionMiddleware:
+    """비용이 큰 업로드 엔드포인트에 승인 제어를 적용하는 ASGI 미들웨어"""
+
+    def __init__(self, app, controller, paths):
+        self.app = app
+        self.controller = controller
+        self.paths = {path.rstrip("/") for path in paths}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        client = client_address(scope, headers)
+        # Content-Length 없이 나누어 보내는 본문(chunked)은 크기를 알 수 없음 (None)
+        try:
+            input_size = int(headers[b"content-length"]) if b"content-length" in headers else None
+        except ValueError:
+            input_size = 0
+
+        # upload_id만 보내는 폼 요청은 본문이 작으므로 업로드 세션의 파일 크기로 가중치 계산
+        if input_size is not None and 0 < input_size <= FORM_PEEK_BYTES and is_form(headers):
+            body, receive = await buffer_body(receive)
+            upload_id = find_upload_id(headers, body)
+            if upload_id:
+                input_size = max(input_size, await run_in_threadpool(upload_file_size, upload_id))
+
+        try:
+            ticket = await self.controller.acquire(client, input_size)
+        except AdmissionRejected as e:
+            response = JSONResponse(
+                status_code=e.status_code,
+                content={"detail": e.detail},
+                headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                await self.controller.release(ticket)
+
+        if input_size is None:
+            # 스트리밍 요청은 받은 본문 크기가 처음 가중치를 넘으면 크기에 맞게 가중치를 늘림
+            received = 0
+            stream_receive = receive
+
+            async def receive():
+                nonlocal received
+                message = await stream_receive()
+                received += len(message.get("body", b""))
+                await self.controller.charge(ticket, self.controller.weight_for(received))
+                return message
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await self.controller.release(ticket)
+
+
+def client_address(scope, headers):
+    """
+    클라이언트별 한도에 사용할 클라이언트 주소
+
+    클라이언트가 임의로 바꿀 수 있는 헤더(X-Client-ID 등)는 사용하지 않고 연결 주소를 사용합니다.
+    연결 주소가 신뢰하는 프록시(ADMISSION_TRUSTED_PROXIES)이면 프록시가 덧붙인
+    X-Forwarded-For의 마지막 주소를 사용합니다.
+    """
+    peer = (scope.get("client") or ("unknown",))[0]
+    forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1")
+    trusted = {proxy.strip() for proxy in settings.ADMISSION_TRUSTED_PROXIES.split(",") if proxy.strip()}
+    if peer in trusted and forwarded.strip():
+        return forwarded.split(",")[-1].strip()
+    return peer
+
+
+def is_form(headers):
+    content_type = headers.get(b"content-type", b"").lower()
+    return content_type.startswith((b"multipart/form-data", b"application/x-www-form-urlencoded"))
+
+
+async def buffer_body(receive):
+    """
+    요청 본문을 모두 읽고, 읽은 본문을 다시 전달하는 receive 함수와 함께 반환
+    """
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    body = b"".join(chunks)
+    replayed = False
+
+    async def replay():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay
+
+
+def find_upload_id(headers, body):
+    """폼 본문에서 upload_id 값 찾기"""
+    if headers.get(b"content-type", b"").lower().startswith(b"multipart/form-data"):
+        match = _MULTIPART_UPLOAD_ID.search(body)
+        return match.group(1).decode("latin-1").strip() if match else None
+    values = parse_qs(body.decode("latin-1")).get("upload_id")
+    return values[0] if values else None
+
+
+def upload_file_size(upload_id):
+    """분할 업로드 세션의 파일 크기 (없으면 0)"""
+    db = SessionLocal()
+    try:
+        return upload_store.file_size(db, upload_id)
+    finally:
+        db.close()
+
+
+# 기본 승인 제어기 인스턴스 생성
+admission_controller = AdmissionController(
+    max_weight=settings.ADMISSION_MAX_WEIGHT,
+    max_per_client=settings.ADMISSION_MAX_PER_CLIENT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_queue_wait=settings.ADMISSION_MAX_QUEUE_WAIT,
+    weight_unit_bytes=settings.ADMISSION_WEIGHT_UNIT_BYTES,
+    stream_weight=settings.ADMISSION_STREAM_WEIGHT,
+)
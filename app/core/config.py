@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -23,7 +24,147 @@ class Settings(BaseSettings):
     
     # OpenAI API 설정
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    
+
+    # 월별 파티션 및 본문 보관 설정
+    DB_PARTITIONING_ENABLED: bool = os.getenv("DB_PARTITIONING_ENABLED", "False").lower() == "true"
+    DB_PARTITION_MONTHS_AHEAD: int = int(os.getenv("DB_PARTITION_MONTHS_AHEAD", "3"))
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "False").lower() == "true"
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+    ARCHIVE_INTERVAL: int = int(os.getenv("ARCHIVE_INTERVAL", "86400"))  # 초
+    ARCHIVE_COMPRESSION_LEVEL: int = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "6"))
+
+    # 응답 압축 설정
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # 업로드 엔드포인트 승인 제어 (가중치 = 1 + 입력 크기 / ADMISSION_WEIGHT_UNIT_BYTES)
+    ADMISSION_MAX_WEIGHT: float = float(os.getenv("ADMISSION_MAX_WEIGHT", "40"))
+    ADMISSION_MAX_PER_CLIENT: int = int(os.getenv("ADMISSION_MAX_PER_CLIENT", "4"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+    ADMISSION_MAX_QUEUE_WAIT: float = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT", "10"))
+    ADMISSION_WEIGHT_UNIT_BYTES: int = int(os.getenv("ADMISSION_WEIGHT_UNIT_BYTES", str(10 * 1024 ** 2)))
+    # Content-Length 없이 보낸 스트리밍 요청(/transcription/stream)의 가중치 (크기를 알 수 없으므로 큰 입력으로 간주)
+    ADMISSION_STREAM_WEIGHT: float = float(os.getenv("ADMISSION_STREAM_WEIGHT", "10"))
+    ADMISSION_DEFAULT_RETRY_AFTER: int = int(os.getenv("ADMISSION_DEFAULT_RETRY_AFTER", "30"))
+    # 클라이언트별 한도에 X-Forwarded-For를 사용할 프록시 주소 (쉼표로 구분)
+    ADMISSION_TRUSTED_PROXIES: str = os.getenv("ADMISSION_TRUSTED_PROXIES", "")
+
+    # 요약 변형 동시 생성 수
+    SUMMARY_MAX_CONCURRENCY: int = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+    # 보고서 생성 모델 및 프롬프트 토큰 예산
+    REPORT_MODEL: str = os.getenv("REPORT_MODEL", "gpt-3.5-turbo")
+    REPORT_MAX_COMPLETION_TOKENS: int = int(os.getenv("REPORT_MAX_COMPLETION_TOKENS", "2048"))
+    # 모델별 전체 토큰 예산 재정의 (예: "gpt-3.5-turbo=12000,gpt-4o-mini=60000")
+    PROMPT_TOKEN_BUDGETS: str = os.getenv("PROMPT_TOKEN_BUDGETS", "")
+    # 예산 초과 시 입력 처리 방식 (chunk: 분할 후 병합, trim: 앞/뒤만 유지)
+    PROMPT_OVERFLOW_STRATEGY: str = os.getenv("PROMPT_OVERFLOW_STRATEGY", "chunk")
+
+    # 채팅 모델 라우팅 (선호 순서, 첫 번째 모델 응답이 p95보다 늦으면 다음 모델로 중복 요청)
+    CHAT_MODELS: str = os.getenv("CHAT_MODELS", os.getenv("REPORT_MODEL", "gpt-3.5-turbo"))
+    CHAT_LATENCY_SLO: float = float(os.getenv("CHAT_LATENCY_SLO", "20"))  # 초
+    CHAT_HEDGING_ENABLED: bool = os.getenv("CHAT_HEDGING_ENABLED", "True").lower() == "true"
+    CHAT_HEDGE_MIN_SAMPLES: int = int(os.getenv("CHAT_HEDGE_MIN_SAMPLES", "20"))
+    CHAT_HEDGE_DEFAULT_DELAY: float = float(os.getenv("CHAT_HEDGE_DEFAULT_DELAY", "30"))  # 초
+
+    # 보고서 응답 형식 (auto, json_schema, json_object, none)
+    REPORT_RESPONSE_FORMAT: str = os.getenv("REPORT_RESPONSE_FORMAT", "auto")
+    # strict JSON 스키마 출력을 지원하는 모델 접두어 목록
+    STRUCTURED_OUTPUT_MODELS: str = os.getenv("STRUCTURED_OUTPUT_MODELS", "gpt-4o,gpt-4.1")
+    # 검증 실패 필드 재요청 횟수
+    REPORT_REPAIR_ATTEMPTS: int = int(os.getenv("REPORT_REPAIR_ATTEMPTS", "1"))
+
+    # 보고서 템플릿별 동시 생성 수
+    REPORT_MAX_CONCURRENCY: int = int(os.getenv("REPORT_MAX_CONCURRENCY", "4"))
+    # 필드가 많은 템플릿은 필드 그룹별로 나누어 동시에 요청 (최대 그룹 수, 나누기 시작하는 필드 수)
+    REPORT_FIELD_GROUPS: int = int(os.getenv("REPORT_FIELD_GROUPS", "4"))
+    REPORT_FIELD_GROUP_MIN_FIELDS: int = int(os.getenv("REPORT_FIELD_GROUP_MIN_FIELDS", "8"))
+    # 템플릿 변경 후 기존 보고서 재생성 작업의 묶음 크기와 동시 요청 수
+    REGENERATION_BATCH_SIZE: int = int(os.getenv("REGENERATION_BATCH_SIZE", "20"))
+    REGENERATION_CONCURRENCY: int = int(os.getenv("REGENERATION_CONCURRENCY", "4"))
+
+    # 임시 작업 공간 설정 (tmpfs 등 빠른 볼륨 지정 가능, 예: /dev/shm/stt)
+    WORKSPACE_DIR: str = os.getenv("WORKSPACE_DIR", os.path.join(tempfile.gettempdir(), "stt_workspace"))
+    WORKSPACE_QUOTA_BYTES: int = int(os.getenv("WORKSPACE_QUOTA_BYTES", str(8 * 1024 ** 3)))
+    WORKSPACE_QUOTA_TIMEOUT: float = float(os.getenv("WORKSPACE_QUOTA_TIMEOUT", "30"))
+    WORKSPACE_ORPHAN_TTL: int = int(os.getenv("WORKSPACE_ORPHAN_TTL", "21600"))  # 초
+    WORKSPACE_SWEEP_INTERVAL: int = int(os.getenv("WORKSPACE_SWEEP_INTERVAL", "300"))  # 초
+
+    # 이어 올리기(분할 업로드) 설정 (여러 서버가 같은 업로드를 받으면 공유 볼륨 지정)
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "stt_uploads"))
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(4 * 1024 ** 3)))
+    UPLOAD_SESSION_TTL: int = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))  # 초
+    UPLOAD_CLAIM_TIMEOUT: int = int(os.getenv("UPLOAD_CLAIM_TIMEOUT", "3600"))  # 처리 중 서버 종료 시 다시 처리하기까지 (초)
+
+    # 스트리밍 변환 설정 (업로드 중 오디오 추출 후 구간 단위로 변환)
+    FFMPEG_BINARY: str = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    STREAM_WINDOW_SECONDS: int = int(os.getenv("STREAM_WINDOW_SECONDS", "120"))
+    STREAM_TRANSCRIBE_CONCURRENCY: int = int(os.getenv("STREAM_TRANSCRIBE_CONCURRENCY", "4"))
+    STREAM_QUEUE_CHUNKS: int = int(os.getenv("STREAM_QUEUE_CHUNKS", "64"))
+
+    # 미디어 디코딩 프로세스 풀 설정 (노드별 CPU 수에 맞게 조정, /metrics/media의 대기 시간 참고)
+    MEDIA_POOL_ENABLED: bool = os.getenv("MEDIA_POOL_ENABLED", "True").lower() == "true"
+    MEDIA_POOL_SIZE: int = int(os.getenv("MEDIA_POOL_SIZE", str(max(1, (os.cpu_count() or 2) // 2))))
+    MEDIA_POOL_MAX_TASKS_PER_CHILD: int = int(os.getenv("MEDIA_POOL_MAX_TASKS_PER_CHILD", "50"))
+    MEDIA_TASK_TIMEOUT: int = int(os.getenv("MEDIA_TASK_TIMEOUT", "600"))  # 초
+
+    # 작업 큐/워커 설정 (worker.py)
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "2"))
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # 초
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_BACKOFF_BASE: float = float(os.getenv("JOB_BACKOFF_BASE", "10"))  # 초
+    JOB_BACKOFF_MAX: float = float(os.getenv("JOB_BACKOFF_MAX", "900"))  # 초
+
+    # 요청별 사용량 기록 설정 (백그라운드 스레드가 모아서 일괄 저장)
+    USAGE_BATCH_SIZE: int = int(os.getenv("USAGE_BATCH_SIZE", "200"))
+    USAGE_FLUSH_INTERVAL: float = float(os.getenv("USAGE_FLUSH_INTERVAL", "2"))  # 초
+    USAGE_MAX_QUEUE: int = int(os.getenv("USAGE_MAX_QUEUE", "10000"))
+    # 일별 사용량 집계 반영 주기 (커밋된 증분을 모아서 한 트랜잭션으로 반영)
+    ROLLUP_FLUSH_INTERVAL: float = float(os.getenv("ROLLUP_FLUSH_INTERVAL", "2"))  # 초
+
+    # 유사 보고서 검색 색인 (여러 서버/워커가 공유하는 메모리 맵 파일, 차원을 바꾸면 색인 재생성 필요)
+    SIMILARITY_ENABLED: bool = os.getenv("SIMILARITY_ENABLED", "True").lower() == "true"
+    SIMILARITY_INDEX_DIR: str = os.getenv("SIMILARITY_INDEX_DIR", os.path.join(tempfile.gettempdir(), "stt_similarity"))
+    SIMILARITY_DIM: int = int(os.getenv("SIMILARITY_DIM", "256"))
+
+    # 대량 내보내기 시 서버 측 커서에서 한 번에 가져올 행 수
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Idempotency-Key 헤더가 있는 POST 요청의 응답 저장 (재시도 시 다시 처리하지 않고 저장된 응답 반환)
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "True").lower() == "true"
+    IDEMPOTENCY_TTL: int = int(os.getenv("IDEMPOTENCY_TTL", "86400"))  # 초
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "3600"))  # 처리 중 서버 종료 시 다시 처리하기까지 (초)
+    IDEMPOTENCY_WAIT_TIMEOUT: float = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "120"))  # 처리 중인 요청을 기다리는 최대 시간 (초)
+    IDEMPOTENCY_POLL_INTERVAL: float = float(os.getenv("IDEMPOTENCY_POLL_INTERVAL", "1"))  # 초
+    IDEMPOTENCY_MAX_BODY_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(10 * 1024 ** 2)))
+    # Idempotency-Key 요청 본문 최대 크기 (본문을 임시 파일에 받아 해시하므로 큰 파일은 /uploads 분할 업로드 사용)
+    IDEMPOTENCY_MAX_REQUEST_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_REQUEST_BYTES", str(50 * 1024 ** 2)))
+    # Idempotency-Key를 적용하지 않는 경로 (쉼표 구분, API_PREFIX 제외, 본문을 받으면서 처리하는 스트리밍 경로)
+    IDEMPOTENCY_EXCLUDED_PATHS: str = os.getenv("IDEMPOTENCY_EXCLUDED_PATHS", "/transcription/stream")
+    IDEMPOTENCY_SWEEP_INTERVAL: int = int(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "3600"))  # 초
+
+    # 동시에 들어온 같은 변환/요약/보고서 요청을 한 번만 호출 (다른 서버/워커와는 Postgres advisory lock으로 조율)
+    SINGLEFLIGHT_ENABLED: bool = os.getenv("SINGLEFLIGHT_ENABLED", "True").lower() == "true"
+    SINGLEFLIGHT_RESULT_TTL: int = int(os.getenv("SINGLEFLIGHT_RESULT_TTL", "60"))  # 잠금을 기다리던 워커가 결과를 가져갈 수 있도록 보관 (초)
+    SINGLEFLIGHT_LOCK_POOL_SIZE: int = int(os.getenv("SINGLEFLIGHT_LOCK_POOL_SIZE", "10"))  # advisory lock용 최대 연결 수
+    SINGLEFLIGHT_WAIT_TIMEOUT: float = float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "900"))  # 다른 워커의 호출을 기다리는 최대 시간 (초)
+    SINGLEFLIGHT_POLL_INTERVAL: float = float(os.getenv("SINGLEFLIGHT_POLL_INTERVAL", "0.5"))  # 초
+
+    # 변환 결과/보고서 write-behind 저장 설정 (여러 요청의 행을 모아 한 트랜잭션으로 커밋)
+    WRITE_BEHIND_ENABLED: bool = os.getenv("WRITE_BEHIND_ENABLED", "False").lower() == "true"
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100"))  # 한 트랜잭션에 묶을 최대 요청 수
+    WRITE_BEHIND_FLUSH_INTERVAL: float = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.02"))  # 첫 요청 이후 더 모으는 시간 (초)
+    WRITE_BEHIND_ID_BLOCK_SIZE: int = int(os.getenv("WRITE_BEHIND_ID_BLOCK_SIZE", "50"))  # 시퀀스에서 한 번에 받아 둘 ID 수
+    WRITE_BEHIND_MAX_QUEUE: int = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "1000"))  # 가득 차면 요청이 대기
+    WRITE_BEHIND_DURABLE_TIMEOUT: float = float(os.getenv("WRITE_BEHIND_DURABLE_TIMEOUT", "30"))  # durable 요청의 저장 대기 시간 (초)
+
+    # 오디오 지문 중복 확인 (유사도 = 일치하는 지문 비트 비율, 커버리지 = 겹치는 구간 / 긴 쪽 길이)
+    FINGERPRINT_ENABLED: bool = os.getenv("FINGERPRINT_ENABLED", "True").lower() == "true"
+    FINGERPRINT_MATCH_THRESHOLD: float = float(os.getenv("FINGERPRINT_MATCH_THRESHOLD", "0.8"))
+    FINGERPRINT_MIN_COVERAGE: float = float(os.getenv("FINGERPRINT_MIN_COVERAGE", "0.9"))
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,36 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class RawJSON:
+    """데이터베이스에 저장된 JSON 텍스트를 다시 파싱하지 않고 응답에 그대로 삽입하기 위한 래퍼"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data.encode("utf-8") if isinstance(data, str) else data
+
+
+def raw_json(text):
+    """저장된 JSON 텍스트를 RawJSON으로 감싸서 반환 (값이 없으면 None)"""
+    return RawJSON(text) if text else None
+
+
+def encode_json(value):
+    """RawJSON 조각을 포함한 값을 JSON 바이트로 직렬화"""
+    if isinstance(value, RawJSON):
+        return value.data
+    if isinstance(value, dict):
+        return b"{" + b",".join(
+            orjson.dumps(str(key)) + b":" + encode_json(item) for key, item in value.items()
+        ) + b"}"
+    if isinstance(value, (list, tuple)):
+        return b"[" + b",".join(encode_json(item) for item in value) + b"]"
+    return orjson.dumps(value)
+
+
+class SplicedJSONResponse(ORJSONResponse):
+    """저장된 JSON 조각(RawJSON)을 그대로 이어붙여 응답 본문을 만드는 응답 클래스"""
+
+    def render(self, content) -> bytes:
+        return encode_json(content)
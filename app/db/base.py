@@ -13,10 +13,18 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # 모델 베이스 클래스 생성
 Base = declarative_base()
 
+# 요청 세션 종료 시 실행할 작업 목록 (Session.info 키, 작업은 인자 없이 호출)
+ON_CLOSE_KEY = "on_close"
+
 # 데이터베이스 세션 의존성
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
+        for callback in db.info.pop(ON_CLOSE_KEY, []):
+            try:
+                callback()
+            except Exception as e:
+                print(f"세션 종료 작업 오류: {str(e)}")
         db.close() 
\ No newline at end of file
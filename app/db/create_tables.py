@@ -1,9 +1,19 @@
 from app.db.base import Base, engine
-from app.models.transcription import Transcription, ReportTemplate, Report
+from app.db.init_db import add_missing_columns
+from app.models.transcription import Transcription, ReportTemplate, ReportTemplateVersion, Report, Summary
+from app.models.archive import ArchivedPayload
+from app.models.analytics import UsageRollup
+from app.models.upload import UploadSession
+from app.models.job import WorkItem
+from app.models.usage import UsageEntry
+from app.models.fingerprint import AudioFingerprint, AudioFingerprintKey
+from app.models.idempotency import IdempotencyRecord
+from app.models.singleflight import SingleFlightResult
 
 def create_tables():
     """데이터베이스 테이블 생성"""
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
 
 if __name__ == "__main__":
     create_tables()
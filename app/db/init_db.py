@@ -1,7 +1,34 @@
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 from app.db.base import Base
-from app.db.session import engine
+from app.db.base import engine
+
+# 기존 테이블에 나중에 추가된 컬럼 (create_all은 이미 있는 테이블을 변경하지 않음)
+ADDED_COLUMNS = {
+    "report_templates": ["version"],
+    "reports": ["template_version"],
+    "work_items": ["progress"],
+    "upload_sessions": ["claimed_by"],
+}
+
+def add_missing_columns(bind) -> None:
+    """모델에 추가된 컬럼을 기존 테이블에 추가"""
+    existing_tables = set(inspect(bind).get_table_names())
+    with bind.begin() as conn:
+        for table_name, column_names in ADDED_COLUMNS.items():
+            if table_name not in existing_tables:
+                continue
+            table = Base.metadata.tables[table_name]
+            for column_name in column_names:
+                column = table.columns[column_name]
+                column_type = column.type.compile(dialect=conn.dialect)
+                default = f" DEFAULT {column.server_default.arg}" if column.server_default is not None else ""
+                nullable = "" if column.nullable else " NOT NULL"
+                conn.execute(text(
+                    f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {column_name} {column_type}{default}{nullable}"
+                ))
 
 def init_db() -> None:
     """데이터베이스 테이블 생성"""
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
@@ -0,0 +1,113 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from app.core.config import settings
+
+# created_at 기준 월별 범위 파티션을 적용할 테이블
+PARTITIONED_TABLES = ["transcriptions", "reports", "summaries"]
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def is_partitioned(conn, table):
+    """테이블이 파티션 테이블인지 확인"""
+    return conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table"
+        ),
+        {"table": table}
+    ).first() is not None
+
+
+def create_month_partition(conn, table, month):
+    """월별 파티션 생성 (이미 있으면 무시)"""
+    start = _month_start(month)
+    end = _add_months(start, 1)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {table}_p{start:%Y%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def ensure_partitions(conn, table, months_ahead=None):
+    """현재 월부터 지정한 개월 수만큼 미리 파티션 생성"""
+    if months_ahead is None:
+        months_ahead = settings.DB_PARTITION_MONTHS_AHEAD
+    current = _month_start(date.today())
+    for i in range(months_ahead + 1):
+        create_month_partition(conn, table, _add_months(current, i))
+
+
+def outgoing_foreign_keys(conn, table):
+    """테이블의 외래 키 제약 목록 [(제약 이름, 참조 테이블, 제약 정의)]"""
+    return conn.execute(
+        text(
+            "SELECT con.conname, ref.relname, pg_get_constraintdef(con.oid) FROM pg_constraint con "
+            "JOIN pg_class c ON c.oid = con.conrelid JOIN pg_class ref ON ref.oid = con.confrelid "
+            "WHERE con.contype = 'f' AND c.relname = :table"
+        ),
+        {"table": table}
+    ).fetchall()
+
+
+def convert_to_partitioned(conn, table):
+    """
+    기존 테이블을 created_at 기준 월별 범위 파티션 테이블로 변환
+
+    파티션 테이블의 기본 키는 (id, created_at)이 되며, 파티션 테이블의 id를 참조하는
+    외래 키 제약은 제거됩니다. (파티션 키를 포함하지 않는 id만으로는 파티션 테이블에
+    고유 제약을 둘 수 없기 때문) 다른 테이블에서 이 테이블을 참조하던 제약과
+    reports/summaries.transcription_id -> transcriptions 제약이 여기에 해당하며,
+    파티션하지 않는 테이블을 참조하는 제약(reports.template_id 등)은 다시 생성합니다.
+    """
+    legacy = f"{table}_unpartitioned"
+    outgoing = outgoing_foreign_keys(conn, table)
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    conn.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+
+    # 기존 데이터 범위의 월별 파티션과 기본 파티션 생성
+    bounds = conn.execute(text(f"SELECT min(created_at), max(created_at) FROM {legacy}")).first()
+    if bounds[0] is not None:
+        month = _month_start(bounds[0].date())
+        last = _month_start(bounds[1].date())
+        while month <= last:
+            create_month_partition(conn, table, month)
+            month = _add_months(month, 1)
+    ensure_partitions(conn, table)
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}"))
+    conn.execute(text(f"UPDATE {table} SET created_at = now() WHERE created_at IS NULL"))
+    conn.execute(text(f"ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {table}.id"))
+    conn.execute(text(f"DROP TABLE {legacy} CASCADE"))
+
+    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)"))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_id ON {table} (id)"))
+    for name, referenced, definition in outgoing:
+        if referenced in PARTITIONED_TABLES:
+            print(f"{table}.{name} 외래 키 제약은 파티션 테이블 {referenced}를 참조하므로 제거됩니다.")
+            continue
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"))
+    print(f"{table} 테이블을 월별 파티션 테이블로 변환했습니다.")
+
+
+def setup_partitioning(engine):
+    """파티션 테이블 변환 및 향후 월별 파티션 생성"""
+    with engine.begin() as conn:
+        # 여러 워커가 동시에 시작해도 한 번만 변환되도록 잠금
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('stt_partitioning'))"))
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                convert_to_partitioned(conn, table)
+            ensure_partitions(conn, table)
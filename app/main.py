@@ -1,8 +1,27 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.core.config import settings
+from app.core.admission import AdmissionMiddleware, admission_controller
 from app.api.api import api_router
 from app.db.init_db import init_db
+from app.db.base import engine
+from app.db.partitioning import setup_partitioning
+from app.services.archive_service import maintenance_scheduler
+from app.services.idempotency_service import IdempotencyMiddleware, idempotency_store
+from app.services.media_pool import media_pool, MediaTaskTimeout
+from app.services.upload_service import upload_store, UploadError
+from app.services.usage_service import UsageMiddleware, usage_writer
+from app.services.analytics_service import rollup_writer
+from app.services.write_behind import write_behind
+from app.services.workspace_service import workspace_manager, WorkspaceQuotaExceeded
+
+try:
+    # brotli 지원 시 Accept-Encoding에 따라 br 또는 gzip으로 압축
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # FastAPI 애플리케이션 인스턴스 생성
 app = FastAPI(
@@ -10,6 +29,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_PREFIX}/openapi.json",
     docs_url=f"{settings.API_PREFIX}/docs",
     redoc_url=f"{settings.API_PREFIX}/redoc",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS 미들웨어 설정
@@ -21,9 +41,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 비용이 큰 업로드 엔드포인트 승인 제어 (과부하 시 429/503 + Retry-After)
+# (재시도 요청은 승인 전에 저장된 응답을 반환하거나 처리 중인 요청을 기다리도록 Idempotency 미들웨어 안쪽에 둠)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission_controller,
+    paths=[
+        f"{settings.API_PREFIX}/transcription/",
+        f"{settings.API_PREFIX}/transcription/stream",
+        f"{settings.API_PREFIX}/summary/",
+        f"{settings.API_PREFIX}/report/audio",
+    ],
+)
+
+# Idempotency-Key 헤더가 있는 POST 요청은 한 번만 처리 (압축 전 응답을 저장하도록 압축 미들웨어 안쪽에 둠)
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store)
+
+# 응답 압축 미들웨어 설정 (큰 변환 텍스트/보고서 응답)
+if BrotliMiddleware is not None:
+    app.add_middleware(
+        BrotliMiddleware,
+        quality=settings.COMPRESSION_BROTLI_QUALITY,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_fallback=True,
+    )
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# 요청별 사용량(오디오 초, 토큰 수, 처리 시간) 수집
+app.add_middleware(UsageMiddleware)
+
 # API 라우터 등록
 app.include_router(api_router, prefix=settings.API_PREFIX)
 
+@app.exception_handler(WorkspaceQuotaExceeded)
+async def workspace_quota_exceeded_handler(request: Request, exc: WorkspaceQuotaExceeded):
+    """작업 공간 용량 부족 시 503 응답 반환"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(settings.WORKSPACE_QUOTA_TIMEOUT))}
+    )
+
+@app.exception_handler(MediaTaskTimeout)
+async def media_task_timeout_handler(request: Request, exc: MediaTaskTimeout):
+    """미디어 처리 시간 초과 시 504 응답 반환"""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+@app.exception_handler(UploadError)
+async def upload_error_handler(request: Request, exc: UploadError):
+    """분할 업로드 오류 응답 반환"""
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to STT Service API"}
@@ -32,6 +101,37 @@ async def root():
 async def startup_event():
     """애플리케이션 시작 시 데이터베이스 초기화"""
     init_db()
+    # 월별 파티션 변환/생성 및 본문 보관 스케줄러 시작
+    if settings.DB_PARTITIONING_ENABLED:
+        setup_partitioning(engine)
+    if settings.DB_PARTITIONING_ENABLED or settings.ARCHIVE_ENABLED:
+        maintenance_scheduler.start()
+    # 미디어 디코딩 프로세스 풀 미리 시작
+    media_pool.start()
+    # 고아 작업 공간 정리 스레드 시작
+    workspace_manager.start_sweeper()
+    # 만료된 분할 업로드 정리 스레드 시작
+    upload_store.start_sweeper()
+    # 사용량 기록 및 일별 집계 저장 스레드 시작
+    usage_writer.start()
+    rollup_writer.start()
+    # 만료된 Idempotency-Key 정리 스레드 시작
+    idempotency_store.start_sweeper()
+    # 변환 결과/보고서 write-behind 저장 스레드 시작
+    write_behind.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """애플리케이션 종료 시 백그라운드 작업 중지"""
+    workspace_manager.stop_sweeper()
+    upload_store.stop_sweeper()
+    idempotency_store.stop_sweeper()
+    media_pool.stop()
+    maintenance_scheduler.stop()
+    # 남은 변환 결과/보고서와 사용량 기록/집계 저장
+    write_behind.stop()
+    usage_writer.stop()
+    rollup_writer.stop()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, Index, UniqueConstraint
+from app.db.base import Base
+
+
+class UsageRollup(Base):
+    """일별 사용량 집계를 저장하는 모델 (쓰기 시점에 증분 갱신)"""
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "metric", "dimension", name="uq_usage_rollup_key"),
+        Index("ix_usage_rollups_metric_day", "metric", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    metric = Column(String(30), nullable=False)      # audio_seconds, reports, summaries, processing_ms
+    dimension = Column(String(100), nullable=False)  # 파일 형식, 템플릿 코드, 요약 옵션, 엔드포인트
+    count = Column(BigInteger, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)  # 합계 (오디오 초, 처리 시간 ms 등)
+
+    def __repr__(self):
+        return f"<UsageRollup(day={self.day}, metric={self.metric}, dimension={self.dimension})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class ArchivedPayload(Base):
+    """보관 기간이 지난 레코드의 본문(텍스트/JSON)을 압축하여 저장하는 모델"""
+    __tablename__ = "archived_payloads"
+    __table_args__ = (
+        UniqueConstraint("table_name", "record_id", "column_name", name="uq_archived_payload_record"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(50), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    column_name = Column(String(50), nullable=False)
+    record_created_at = Column(DateTime(timezone=True), nullable=True)  # 원본 레코드 생성 시각
+    payload = Column(LargeBinary, nullable=False)  # zlib 압축된 본문
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<ArchivedPayload(table_name={self.table_name}, record_id={self.record_id})>"
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, BigInteger, LargeBinary, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class AudioFingerprint(Base):
+    """변환한 녹음의 오디오 지문을 저장하는 모델 (다른 형식으로 다시 올린 같은 녹음 확인용)"""
+    __tablename__ = "audio_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # transcriptions가 파티션 테이블일 수 있으므로 외래 키 없이 ID만 저장
+    transcription_id = Column(Integer, nullable=False, index=True)
+    frames = Column(Integer, nullable=False)  # 지문 프레임 수 (64ms 간격)
+    data = Column(LargeBinary, nullable=False)  # 프레임별 32비트 지문 (little-endian uint32 배열)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<AudioFingerprint(id={self.id}, transcription_id={self.transcription_id})>"
+
+
+class AudioFingerprintKey(Base):
+    """오디오 지문 검색용 색인 (일부 프레임의 지문 값 → 지문 ID, 프레임 위치)"""
+    __tablename__ = "audio_fingerprint_keys"
+    __table_args__ = (
+        Index("ix_audio_fingerprint_keys_key", "key"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    fingerprint_id = Column(Integer, nullable=False, index=True)
+    key = Column(Integer, nullable=False)  # 32비트 지문 값 (부호 있는 정수로 저장)
+    frame = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<AudioFingerprintKey(fingerprint_id={self.fingerprint_id}, frame={self.frame})>"
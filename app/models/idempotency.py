@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, LargeBinary, DateTime, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class IdempotencyRecord(Base):
+    """Idempotency-Key 헤더로 요청한 POST 요청의 처리 상태와 응답을 저장하는 모델"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("client_id", "key", name="uq_idempotency_keys_client_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    client_id = Column(String(100), nullable=False)  # X-Client-ID (없으면 빈 문자열)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # 요청 메서드/경로/본문 해시
+    status = Column(String(20), nullable=False)  # running, completed
+    owner = Column(String(100), nullable=True)  # 처리 중인 서버 프로세스
+    locked_until = Column(DateTime(timezone=True), nullable=True)  # 지나면 처리 중인 서버가 종료된 것으로 간주
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)  # 응답 헤더 JSON ([[이름, 값], ...])
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<IdempotencyRecord(client_id={self.client_id}, key={self.key}, status={self.status})>"
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class WorkItem(Base):
+    """워커가 가져가 처리하는 작업(변환/요약/보고서) 정보를 저장하는 모델"""
+    __tablename__ = "work_items"
+    __table_args__ = (
+        Index("ix_work_items_claim", "status", "available_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(30), nullable=False)  # transcription, summary, report, report_regeneration
+    payload = Column(Text, nullable=False)  # JSON 형식의 작업 입력
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, dead
+    result = Column(Text, nullable=True)  # JSON 형식의 작업 결과
+    error = Column(Text, nullable=True)  # 마지막 오류 메시지
+    progress = Column(Text, nullable=True)  # JSON 형식의 진행 상황 (오래 걸리는 작업)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # 재시도 가능 시각
+    locked_by = Column(String(100), nullable=True)  # 작업을 가져간 워커
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # 임대 만료 시각 (지나면 다른 워커가 가져감)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<WorkItem(id={self.id}, kind={self.kind}, status={self.status})>"
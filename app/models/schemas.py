@@ -36,6 +36,7 @@ class ReportTemplateCreate(ReportTemplateBase):
 
 class ReportTemplateResponse(ReportTemplateBase):
     id: int
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -72,8 +73,25 @@ class TranscriptionRequest(BaseModel):
 
 class TranscriptionResult(BaseModel):
     """음성/영상 변환 결과 스키마"""
+    transcription_id: Optional[int] = None
     text: str
     duration: Optional[int] = None
+    reused: bool = Field(False, description="오디오 지문이 일치하는 기존 변환 결과를 재사용했는지 여부")
+
+
+class TranscriptSegment(BaseModel):
+    """변환 결과 구간 스키마 (시간 단위: 초)"""
+    start: float
+    end: float
+    text: str
+
+
+class TranscriptionSegmentsResponse(BaseModel):
+    """변환 결과 구간 조회 응답 스키마"""
+    transcription_id: int
+    start: Optional[float] = None
+    end: Optional[float] = None
+    segments: List[TranscriptSegment] = Field(default_factory=list)
 
 
 class ReportTemplateFormatRequest(BaseModel):
@@ -87,6 +105,37 @@ class ReportTemplateFormatResponse(BaseModel):
     name: str
     format: Dict[str, Any]
     description: Optional[str] = None
+    version: int = 1
+
+
+class ReportTemplateUpdate(BaseModel):
+    """보고서 템플릿 수정 요청 스키마"""
+    template: Dict[str, Any] = Field(..., description="새 템플릿 (필드 정의가 바뀌면 버전이 올라감)")
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+
+class TemplateFieldDiff(BaseModel):
+    """이전 버전 대비 필드 변경 내역 스키마"""
+    added: List[str] = Field(default_factory=list)
+    changed: List[str] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+
+
+class ReportTemplateUpdateResponse(BaseModel):
+    """보고서 템플릿 수정 응답 스키마"""
+    code: str
+    version: int
+    diff: Optional[TemplateFieldDiff] = Field(None, description="필드 변경 내역 (필드 정의가 그대로이면 없음)")
+    job_id: Optional[int] = Field(None, description="기존 보고서 재생성 작업 ID")
+
+
+class ReportTemplateVersionResponse(BaseModel):
+    """보고서 템플릿 버전 응답 스키마"""
+    version: int
+    template: Dict[str, Any]
+    diff: Optional[TemplateFieldDiff] = None
+    created_at: Optional[datetime] = None
 
 
 class TextToReportRequest(BaseModel):
@@ -95,6 +144,13 @@ class TextToReportRequest(BaseModel):
     code: str = Field(..., description="보고서 양식 코드 (예: C001)")
 
 
+class TranscriptionToReportRequest(BaseModel):
+    """저장된 변환 결과로 보고서 생성 요청 스키마"""
+    code: str = Field(..., description="보고서 양식 코드 (예: C001)")
+    start: Optional[float] = Field(None, ge=0, description="구간 시작(초), 지정하면 해당 구간의 세그먼트만 사용")
+    end: Optional[float] = Field(None, gt=0, description="구간 끝(초)")
+
+
 class AudioToReportRequest(BaseModel):
     """음성/영상을 보고서로 변환 요청 스키마"""
     # 파일은 FastAPI의 UploadFile로 처리되므로 여기서는 정의하지 않음
@@ -107,4 +163,68 @@ class ReportResponse(BaseModel):
     code: str
     name: str
     content: Dict[str, Any]
-    created_at: datetime 
\ No newline at end of file
+    created_at: datetime 
+
+
+class MultiReportResponse(BaseModel):
+    """여러 보고서 양식 동시 생성 응답 스키마"""
+    transcription_id: int
+    reports: Dict[str, ReportResponse] = Field(default_factory=dict, description="템플릿 코드별 보고서")
+    errors: Dict[str, str] = Field(default_factory=dict, description="템플릿 코드별 오류 메시지")
+
+
+class UploadCreateRequest(BaseModel):
+    """분할 업로드 세션 생성 요청 스키마"""
+    file_name: str = Field(..., description="업로드할 파일 이름 (확장자로 파일 형식 판별)")
+    file_size: int = Field(..., gt=0, description="전체 파일 크기(bytes)")
+
+
+class UploadStatusResponse(BaseModel):
+    """분할 업로드 세션 상태 응답 스키마"""
+    upload_id: str
+    file_name: str
+    file_size: int
+    offset: int = Field(..., description="처음부터 연속으로 받은 바이트 수 (이어 올리기 시작 위치)")
+    received_bytes: int
+    ranges: List[List[int]] = Field(default_factory=list, description="받은 바이트 구간 목록 ([시작, 끝))")
+    status: str
+    expires_at: datetime
+
+
+class JobCreateRequest(BaseModel):
+    """작업 등록 요청 스키마"""
+    kind: str = Field(..., description="작업 종류 (transcription, summary, report, report_regeneration)")
+    payload: Dict[str, Any] = Field(..., description="작업 입력 (transcription: upload_id / summary: transcription_id, variants, start, end / report: code, text 또는 transcription_id, start, end / report_regeneration: code)")
+    max_attempts: Optional[int] = Field(None, ge=1, description="최대 시도 횟수")
+
+
+class JobResponse(BaseModel):
+    """작업 상태 응답 스키마"""
+    id: int
+    kind: str
+    status: str
+    payload: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    progress: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    available_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class SimilarItem(BaseModel):
+    """유사 보고서/요약 항목 스키마"""
+    kind: str = Field(..., description="문서 종류 (report, summary)")
+    id: int
+    score: float = Field(..., description="코사인 유사도")
+    code: Optional[str] = Field(None, description="보고서 템플릿 코드 (보고서인 경우)")
+    transcription_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class SimilarReportsResponse(BaseModel):
+    """유사 보고서 조회 응답 스키마"""
+    report_id: int
+    items: List[SimilarItem] = Field(default_factory=list)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, LargeBinary, DateTime
+from app.db.base import Base
+
+
+class SingleFlightResult(Base):
+    """동시에 들어온 같은 변환/요약/보고서 요청이 나누어 받을 결과를 잠시 저장하는 모델"""
+    __tablename__ = "singleflight_results"
+
+    key = Column(String(100), primary_key=True)  # 요청 종류 + 입력 내용/옵션 해시
+    value = Column(LargeBinary, nullable=False)  # JSON 형식의 결과
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<SingleFlightResult(key={self.key})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -18,6 +18,24 @@ class Transcription(Base):
         return f"<Transcription(id={self.id}, file_name={self.file_name})>"
 
 
+class TranscriptionSegment(Base):
+    """변환 결과의 구간(세그먼트)별 텍스트와 시간 정보를 저장하는 모델"""
+    __tablename__ = "transcription_segments"
+    __table_args__ = (
+        Index("ix_transcription_segments_range", "transcription_id", "start_ms"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    # transcriptions 테이블이 파티션 테이블로 변환될 수 있으므로 외래 키 제약은 두지 않음
+    transcription_id = Column(Integer, nullable=False)
+    start_ms = Column(Integer, nullable=False)  # 구간 시작 (밀리초)
+    end_ms = Column(Integer, nullable=False)    # 구간 끝 (밀리초)
+    text = Column(Text, nullable=False)
+    
+    def __repr__(self):
+        return f"<TranscriptionSegment(transcription_id={self.transcription_id}, start_ms={self.start_ms})>"
+
+
 class ReportTemplate(Base):
     """보고서 템플릿 정보를 저장하는 모델"""
     __tablename__ = "report_templates"
@@ -27,6 +45,7 @@ class ReportTemplate(Base):
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
     template = Column(Text, nullable=False)  # JSON 형식으로 저장된 템플릿
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # 현재 템플릿 버전
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -34,6 +53,24 @@ class ReportTemplate(Base):
         return f"<ReportTemplate(id={self.id}, code={self.code})>"
 
 
+class ReportTemplateVersion(Base):
+    """보고서 템플릿의 버전별 필드 정의와 이전 버전 대비 필드 변경 내역을 저장하는 모델"""
+    __tablename__ = "report_template_versions"
+    __table_args__ = (
+        UniqueConstraint("template_id", "version", name="uq_report_template_versions_version"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    template_id = Column(Integer, ForeignKey("report_templates.id"), nullable=False)
+    version = Column(Integer, nullable=False)
+    template = Column(Text, nullable=False)  # 해당 버전의 템플릿 (JSON)
+    diff = Column(Text, nullable=True)  # 이전 버전 대비 추가/변경/삭제된 필드 (JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ReportTemplateVersion(template_id={self.template_id}, version={self.version})>"
+
+
 class Report(Base):
     """생성된 보고서 정보를 저장하는 모델"""
     __tablename__ = "reports"
@@ -43,6 +80,7 @@ class Report(Base):
     template_id = Column(Integer, ForeignKey("report_templates.id"), nullable=False)
     content = Column(Text, nullable=False)  # JSON 형식으로 저장된 보고서 내용
     raw_text = Column(Text, nullable=True)  # 직접 입력된 텍스트
+    template_version = Column(Integer, nullable=True)  # 생성/재생성에 사용된 템플릿 버전 (없으면 1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, BigInteger, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class UploadSession(Base):
+    """분할 업로드(이어 올리기) 세션 정보를 저장하는 모델"""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # 업로드 ID (uuid)
+    file_name = Column(String(255), nullable=False)
+    file_size = Column(BigInteger, nullable=False)  # 전체 파일 크기(bytes)
+    received_ranges = Column(Text, nullable=False, default="[]")  # 수신한 바이트 구간 JSON ([[시작, 끝), ...])
+    status = Column(String(20), nullable=False, default="uploading")  # uploading, complete, processing
+    claimed_by = Column(String(100), nullable=True)  # 처리 중인 작업 (예: job:12, 같은 작업은 다시 처리 가능)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, file_name={self.file_name}, status={self.status})>"
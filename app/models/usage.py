@@ -0,0 +1,31 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Float, Boolean, Date, DateTime, Index
+from app.db.base import Base
+
+
+class UsageEntry(Base):
+    """요청별 사용량(오디오 초, 토큰 수, 단계별 처리 시간)을 기록하는 모델"""
+    __tablename__ = "usage_ledger"
+    __table_args__ = (
+        Index("ix_usage_ledger_day_endpoint", "day", "endpoint"),
+        Index("ix_usage_ledger_day_template", "day", "template_code"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    day = Column(Date, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    request_id = Column(String(32), nullable=True, index=True)  # 같은 요청에서 발생한 기록 묶음
+    endpoint = Column(String(100), nullable=True)  # 엔드포인트 또는 작업 종류 (job:transcription 등)
+    template_code = Column(String(50), nullable=True)
+    client_id = Column(String(100), nullable=True)
+    kind = Column(String(20), nullable=False)  # request, transcription, chat, stage
+    stage = Column(String(50), nullable=True)  # extract, transcribe 등 (kind=stage)
+    model = Column(String(100), nullable=True)
+    audio_seconds = Column(Float, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    cache_hit = Column(Boolean, nullable=True)  # 프롬프트 캐시 적중 여부 (chat)
+    duration_ms = Column(Float, nullable=True)
+
+    def __repr__(self):
+        return f"<UsageEntry(kind={self.kind}, endpoint={self.endpoint}, model={self.model})>"
@@ -0,0 +1,301 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.analytics import UsageRollup
+from app.models.transcription import Transcription, Report, ReportTemplate, Summary
+
+# 집계 지표
+METRIC_AUDIO_SECONDS = "audio_seconds"
+METRIC_REPORTS = "reports"
+METRIC_SUMMARIES = "summaries"
+METRIC_PROCESSING_MS = "processing_ms"
+METRICS = [METRIC_AUDIO_SECONDS, METRIC_REPORTS, METRIC_SUMMARIES, METRIC_PROCESSING_MS]
+
+
+# 세션이 커밋되면 반영할 집계 증분 (Session.info 키)
+_PENDING_KEY = "analytics_pending_rollups"
+
+
+def record(db, metric, dimension, total=0, count=1, day=None):
+    """
+    일별 집계 행 증분 기록
+
+    같은 날짜/지표 행을 여러 요청이 트랜잭션 안에서 갱신하면 커밋까지 서로 기다리므로,
+    증분은 세션에 보관했다가 세션이 커밋된 뒤 집계 저장 스레드가 모아서 반영합니다.
+    (세션이 롤백되면 버림)
+
+    Args:
+        db: 데이터베이스 세션
+        metric: 지표 이름
+        dimension: 집계 기준 값
+        total: 합계에 더할 값
+        count: 건수에 더할 값
+        day: 집계 일자 (기본값: 오늘, UTC)
+    """
+    if day is None:
+        day = datetime.now(timezone.utc).date()
+    # 커밋/롤백 이벤트를 받을 수 있도록 트랜잭션 시작
+    if not db.in_transaction():
+        db.begin()
+    db.info.setdefault(_PENDING_KEY, []).append(
+        {"day": day, "metric": metric, "dimension": str(dimension or "unknown")[:100], "count": count, "total": total}
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending(session):
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        rollup_writer.submit(rows)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def merge_rollups(merged, rows):
+    """집계 증분을 (일자, 지표, 기준 값)별로 합산하여 merged에 더함"""
+    for row in rows:
+        key = (row["day"], row["metric"], row["dimension"])
+        if key in merged:
+            merged[key]["count"] += row["count"]
+            merged[key]["total"] += row["total"]
+        else:
+            merged[key] = dict(row)
+    return merged
+
+
+def apply_rollups(db, rows):
+    """
+    집계 증분을 집계 행에 반영 (같은 키는 합산, 키 순서대로 갱신하여 동시 갱신 시 교착 방지)
+    """
+    merged = merge_rollups({}, rows)
+    for key in sorted(merged):
+        stmt = insert(UsageRollup).values(**merged[key])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_usage_rollup_key",
+            set_={"count": UsageRollup.count + stmt.excluded.count, "total": UsageRollup.total + stmt.excluded.total}
+        )
+        db.execute(stmt)
+
+
+class RollupWriter:
+    """
+    커밋된 집계 증분을 모아서 일정 주기마다 한 트랜잭션으로 반영하는 백그라운드 스레드
+
+    증분은 (일자, 지표, 기준 값)별로 합산해 두므로 보관 크기는 요청 수가 아니라 집계 키 수에 비례하며,
+    반영에 실패한 증분은 다시 합산해 두었다가 다음 주기에 반영합니다.
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.failed_flushes = 0
+
+    def submit(self, rows):
+        """반영 대기 증분에 합산 (저장 스레드가 실행 중이 아니면 바로 반영)"""
+        if not (self._thread and self._thread.is_alive()):
+            self.flush(rows)
+            return
+        with self._lock:
+            merge_rollups(self._pending, rows)
+
+    def flush(self, rows):
+        """증분 반영 (실패하면 False)"""
+        if not rows:
+            return True
+        db = SessionLocal()
+        try:
+            apply_rollups(db, rows)
+            db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            self.failed_flushes += 1
+            print(f"사용량 집계 반영 오류 ({len(rows)}건): {str(e)}")
+            return False
+        finally:
+            db.close()
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return list(pending.values())
+
+    def _flush_pending(self):
+        rows = self._drain()
+        if not self.flush(rows):
+            # 다음 주기에 다시 반영
+            with self._lock:
+                merge_rollups(self._pending, rows)
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self._flush_pending()
+        # 종료 시 남은 증분 반영
+        self._flush_pending()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="rollup-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        with self._lock:
+            if self._pending:
+                print(f"반영하지 못한 사용량 집계 증분 {len(self._pending)}건 (rebuild_rollups로 재계산 필요)")
+
+
+def record_transcription(db, file_type, duration):
+    """변환된 오디오 길이 집계 (파일 형식별)"""
+    record(db, METRIC_AUDIO_SECONDS, file_type, total=duration or 0)
+
+
+def record_report(db, template_code):
+    """생성된 보고서 수 집계 (템플릿 코드별)"""
+    record(db, METRIC_REPORTS, template_code)
+
+
+def record_summary(db, length, focus, language):
+    """생성된 요약 수 집계 (길이/초점/언어별)"""
+    record(db, METRIC_SUMMARIES, f"{length}/{focus}/{language}")
+
+
+def record_processing(db, endpoint, started_at, finished_at=None):
+    """엔드포인트 처리 시간 집계 (started_at, finished_at: time.monotonic() 값, finished_at이 없으면 현재 시각)"""
+    record(db, METRIC_PROCESSING_MS, endpoint, total=((finished_at or time.monotonic()) - started_at) * 1000)
+
+
+def query_usage(db, start=None, end=None, metric=None):
+    """
+    기간별 집계 조회
+
+    Returns:
+        list: {"day", "metric", "dimension", "count", "total", "average"} 목록
+    """
+    query = db.query(UsageRollup)
+    if metric:
+        query = query.filter(UsageRollup.metric == metric)
+    if start:
+        query = query.filter(UsageRollup.day >= start)
+    if end:
+        query = query.filter(UsageRollup.day <= end)
+    rows = query.order_by(UsageRollup.day, UsageRollup.metric, UsageRollup.dimension).all()
+    return [
+        {
+            "day": row.day,
+            "metric": row.metric,
+            "dimension": row.dimension,
+            "count": row.count,
+            "total": row.total,
+            "average": row.total / row.count if row.count else None,
+        }
+        for row in rows
+    ]
+
+
+def summarize_usage(db, start=None, end=None, metric=None):
+    """
+    기간 전체 합계 조회 (지표/기준 값별)
+
+    Returns:
+        list: {"metric", "dimension", "count", "total", "average"} 목록
+    """
+    query = db.query(
+        UsageRollup.metric,
+        UsageRollup.dimension,
+        func.sum(UsageRollup.count),
+        func.sum(UsageRollup.total)
+    )
+    if metric:
+        query = query.filter(UsageRollup.metric == metric)
+    if start:
+        query = query.filter(UsageRollup.day >= start)
+    if end:
+        query = query.filter(UsageRollup.day <= end)
+    rows = query.group_by(UsageRollup.metric, UsageRollup.dimension).order_by(
+        UsageRollup.metric, UsageRollup.dimension
+    ).all()
+    results = []
+    for row_metric, dimension, count, total in rows:
+        count, total = int(count), float(total)
+        results.append({
+            "metric": row_metric,
+            "dimension": dimension,
+            "count": count,
+            "total": total,
+            "average": total / count if count else None,
+        })
+    return results
+
+
+def rebuild_rollups(db):
+    """
+    기존 데이터로 집계 테이블을 다시 계산 (집계 도입 시 1회 실행)
+
+    처리 시간은 기존 데이터에 기록이 없으므로 다시 계산하지 않습니다.
+    날짜는 record()와 같이 UTC 기준입니다.
+    """
+    db.query(UsageRollup).filter(UsageRollup.metric != METRIC_PROCESSING_MS).delete(synchronize_session=False)
+    rows = []
+
+    def add(metric, dimension, day, count, total=0):
+        rows.append({"day": day, "metric": metric, "dimension": str(dimension or "unknown")[:100],
+                     "count": count, "total": total})
+
+    day = func.date(func.timezone("UTC", Transcription.created_at))
+    for row_day, file_type, count, total in (
+        db.query(day, Transcription.file_type, func.count(), func.coalesce(func.sum(Transcription.duration), 0))
+        .group_by(day, Transcription.file_type)
+    ):
+        add(METRIC_AUDIO_SECONDS, file_type, row_day, count, total)
+
+    day = func.date(func.timezone("UTC", Report.created_at))
+    for row_day, code, count in (
+        db.query(day, ReportTemplate.code, func.count())
+        .join(ReportTemplate, ReportTemplate.id == Report.template_id)
+        .group_by(day, ReportTemplate.code)
+    ):
+        add(METRIC_REPORTS, code, row_day, count)
+
+    day = func.date(func.timezone("UTC", Summary.created_at))
+    for row_day, length, focus, language, count in (
+        db.query(day, Summary.length, Summary.focus, Summary.language, func.count())
+        .group_by(day, Summary.length, Summary.focus, Summary.language)
+    ):
+        add(METRIC_SUMMARIES, f"{length}/{focus}/{language}", row_day, count)
+
+    apply_rollups(db, rows)
+    db.commit()
+
+
+# 기본 집계 저장 스레드 인스턴스 생성
+rollup_writer = RollupWriter(
+    flush_interval=settings.ROLLUP_FLUSH_INTERVAL,
+)
+
+
+if __name__ == "__main__":
+    from app.db.base import SessionLocal
+    session = SessionLocal()
+    try:
+        rebuild_rollups(session)
+        print("사용량 집계 테이블을 다시 계산했습니다.")
+    finally:
+        session.close()
@@ -0,0 +1,155 @@
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.base import SessionLocal, engine
+from app.models.archive import ArchivedPayload
+from app.models.transcription import Transcription, Report, Summary
+
+# 보관 대상 본문 컬럼 (nullable 컬럼만 본문을 비울 수 있음)
+ARCHIVABLE_COLUMNS = [
+    (Transcription, "transcription_text"),
+    (Report, "raw_text"),
+    (Summary, "report_content"),
+]
+
+
+def compress_text(value):
+    return zlib.compress(value.encode("utf-8"), settings.ARCHIVE_COMPRESSION_LEVEL)
+
+
+def decompress_text(payload):
+    return zlib.decompress(payload).decode("utf-8")
+
+
+def archive_old_records(db, older_than_days=None, batch_size=None):
+    """
+    보관 기간이 지난 레코드의 본문을 압축 보관 테이블로 이동
+
+    Args:
+        db: 데이터베이스 세션
+        older_than_days: 보관 기준 일수 (기본값: settings.ARCHIVE_AFTER_DAYS)
+        batch_size: 한 번에 처리할 레코드 수
+
+    Returns:
+        dict: {테이블명: 보관한 레코드 수}
+    """
+    if older_than_days is None:
+        older_than_days = settings.ARCHIVE_AFTER_DAYS
+    if batch_size is None:
+        batch_size = settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    archived = {}
+    for model, column_name in ARCHIVABLE_COLUMNS:
+        column = getattr(model, column_name)
+        count = 0
+        while True:
+            rows = (
+                db.query(model.id, model.created_at, column)
+                .filter(model.created_at < cutoff, column.isnot(None))
+                .order_by(model.created_at)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            for record_id, created_at, value in rows:
+                db.add(ArchivedPayload(
+                    table_name=model.__tablename__,
+                    record_id=record_id,
+                    column_name=column_name,
+                    record_created_at=created_at,
+                    payload=compress_text(value)
+                ))
+            db.query(model).filter(model.id.in_([row[0] for row in rows])).update(
+                {column: None}, synchronize_session=False
+            )
+            # 배치 단위로 커밋하여 긴 트랜잭션 방지
+            db.commit()
+            count += len(rows)
+        archived[model.__tablename__] = count
+    return archived
+
+
+def load_archived(db, model, column_name, record_ids):
+    """보관된 본문을 일괄 조회 ({레코드 ID: 본문})"""
+    if not record_ids:
+        return {}
+    rows = (
+        db.query(ArchivedPayload.record_id, ArchivedPayload.payload)
+        .filter(
+            ArchivedPayload.table_name == model.__tablename__,
+            ArchivedPayload.column_name == column_name,
+            ArchivedPayload.record_id.in_(list(record_ids))
+        )
+        .all()
+    )
+    return {record_id: decompress_text(payload) for record_id, payload in rows}
+
+
+def rehydrate(db, obj, column_name):
+    """
+    보관된 레코드의 본문을 복원하여 반환
+
+    본문이 비어 있고 보관 데이터가 있으면 압축을 해제하여 객체에 설정합니다.
+    (객체를 변경된 상태로 표시하지 않으므로 데이터베이스에는 다시 기록되지 않음)
+    """
+    value = getattr(obj, column_name)
+    if value is not None or obj.id is None:
+        return value
+    restored = load_archived(db, type(obj), column_name, [obj.id]).get(obj.id)
+    if restored is not None:
+        set_committed_value(obj, column_name, restored)
+    return restored
+
+
+def run_maintenance():
+    """파티션 생성 및 본문 보관 작업 1회 실행"""
+    if settings.DB_PARTITIONING_ENABLED:
+        from app.db.partitioning import setup_partitioning
+        setup_partitioning(engine)
+    if settings.ARCHIVE_ENABLED:
+        db = SessionLocal()
+        try:
+            archived = archive_old_records(db)
+            print(f"본문 보관 완료: {archived}")
+        finally:
+            db.close()
+
+
+class MaintenanceScheduler:
+    """파티션 생성과 본문 보관을 주기적으로 실행하는 백그라운드 스레드"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                run_maintenance()
+            except Exception as e:
+                print(f"보관 작업 오류: {str(e)}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="archive-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+# 기본 보관 작업 스케줄러 인스턴스 생성
+maintenance_scheduler = MaintenanceScheduler(settings.ARCHIVE_INTERVAL)
+
+
+if __name__ == "__main__":
+    run_maintenance()
@@ -0,0 +1,137 @@
+import csv
+import io
+from datetime import timedelta
+
+from sqlalchemy import select, exists
+
+from app.core.config import settings
+from app.core.responses import RawJSON, encode_json
+from app.db.base import SessionLocal
+from app.models.transcription import Transcription, ReportTemplate, Report, Summary
+from app.services.archive_service import load_archived
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# 내보내기 종류별 (모델, 컬럼 목록, 보관될 수 있는 본문 컬럼, JSON 텍스트 컬럼)
+EXPORT_KINDS = {
+    "reports": (
+        Report,
+        [Report.id, Report.transcription_id, ReportTemplate.code, Report.content, Report.raw_text,
+         Report.created_at],
+        "raw_text",
+        ["content"],
+    ),
+    "summaries": (
+        Summary,
+        [Summary.id, Summary.transcription_id, Summary.length, Summary.focus, Summary.language,
+         Summary.summary_text, Summary.report_content, Summary.created_at],
+        "report_content",
+        ["report_content"],
+    ),
+    "transcriptions": (
+        Transcription,
+        [Transcription.id, Transcription.file_name, Transcription.file_type, Transcription.duration,
+         Transcription.transcription_text, Transcription.created_at],
+        "transcription_text",
+        [],
+    ),
+}
+
+
+def build_query(kind, codes=None, start=None, end=None):
+    """
+    내보내기 쿼리 생성
+
+    Args:
+        kind: reports, summaries, transcriptions
+        codes: 템플릿 코드 목록 (보고서는 해당 템플릿의 보고서, 요약/변환 결과는
+               해당 템플릿 보고서가 있는 변환 결과의 것만)
+        start, end: 생성일 기간 (date, 양 끝 포함)
+    """
+    model, columns, _, _ = EXPORT_KINDS[kind]
+    query = select(*columns)
+    if model is Report:
+        query = query.join(ReportTemplate, ReportTemplate.id == Report.template_id)
+        if codes:
+            query = query.where(ReportTemplate.code.in_(codes))
+    elif codes:
+        transcription_id = Transcription.id if model is Transcription else model.transcription_id
+        query = query.where(exists(
+            select(Report.id)
+            .join(ReportTemplate, ReportTemplate.id == Report.template_id)
+            .where(Report.transcription_id == transcription_id, ReportTemplate.code.in_(codes))
+        ))
+    # 생성일 조건은 월별 파티션 테이블의 파티션 제외에도 사용됨
+    if start:
+        query = query.where(model.created_at >= start)
+    if end:
+        query = query.where(model.created_at < end + timedelta(days=1))
+    return query.order_by(model.id)
+
+
+def _batches(kind, query, batch_size):
+    """
+    서버 측 커서로 일정 개수씩 조회하여 보관된 본문을 복원한 행(dict) 목록을 반환
+
+    요청 처리 세션과 별개의 세션을 사용하며, 한 번에 batch_size개의 행만 메모리에 둡니다.
+    """
+    model, _, archived_column, _ = EXPORT_KINDS[kind]
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            rows = [row._asdict() for row in partition]
+            missing = [row["id"] for row in rows if row[archived_column] is None]
+            if missing:
+                restored = load_archived(db, model, archived_column, missing)
+                for row in rows:
+                    if row[archived_column] is None:
+                        row[archived_column] = restored.get(row["id"])
+            yield rows
+    finally:
+        db.close()
+
+
+def stream_ndjson(kind, query, batch_size):
+    """한 줄에 한 행씩 JSON으로 직렬화 (저장된 JSON 컬럼은 다시 파싱하지 않고 그대로 삽입)"""
+    json_columns = EXPORT_KINDS[kind][3]
+    for rows in _batches(kind, query, batch_size):
+        lines = []
+        for row in rows:
+            for column in json_columns:
+                if row[column]:
+                    row[column] = RawJSON(row[column])
+            lines.append(encode_json(row))
+        yield b"\n".join(lines) + b"\n"
+
+
+def stream_csv(kind, query, batch_size):
+    """CSV로 직렬화 (JSON 컬럼은 JSON 텍스트 그대로 기록)"""
+    columns = [column.key for column in EXPORT_KINDS[kind][1]]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in _batches(kind, query, batch_size):
+        writer.writerows([row[column] for column in columns] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # 내보낼 행이 없으면 머리글만 반환
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export(kind, export_format, codes=None, start=None, end=None, batch_size=None):
+    """
+    보고서/요약/변환 결과를 NDJSON 또는 CSV 바이트 조각으로 내보내는 생성기
+
+    StreamingResponse에 넘기면 조각 단위로 전송되므로 전체 행 수와 관계없이 메모리 사용량이 일정합니다.
+    """
+    query = build_query(kind, codes, start, end)
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    if export_format == "csv":
+        return stream_csv(kind, query, batch_size)
+    return stream_ndjson(kind, query, batch_size)
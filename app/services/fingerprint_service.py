@@ -0,0 +1,184 @@
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.fingerprint import AudioFingerprint, AudioFingerprintKey
+from app.models.transcription import Transcription
+from app.services import usage_service
+from app.services.archive_service import rehydrate
+from app.services.media_pool import media_pool
+from app.services.media_service import compute_fingerprint
+from app.services.segment_service import get_segments
+from app.services.transcription_service import transcribe_audio
+
+# 색인할 프레임 비율 (지문 값 기준으로 선택하므로 같은 녹음이면 같은 프레임이 선택됨)
+KEY_SAMPLE_SHIFT = 28  # 1/16
+# 후보로 검증할 최소 색인 일치 수와 최대 후보 수
+MIN_KEY_VOTES = 3
+MAX_CANDIDATES = 3
+# 투표로 구한 위치 차이 주변에서 정렬을 다시 확인할 범위 (프레임)
+ALIGN_SEARCH_FRAMES = 2
+
+
+def sample_keys(fingerprint):
+    """
+    색인할 프레임 선택
+
+    무음처럼 비트가 거의 모두 같은 값은 서로 다른 녹음에서도 자주 나오므로 제외합니다.
+
+    Returns:
+        tuple: (지문 값 - int32, 프레임 위치)
+    """
+    if not len(fingerprint):
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64)
+    mixed = (fingerprint.astype(np.uint64) * 2654435761) & 0xFFFFFFFF
+    bit_counts = np.unpackbits(fingerprint.astype("<u4").view(np.uint8)).reshape(-1, 32).sum(axis=1)
+    frames = np.nonzero(((mixed >> KEY_SAMPLE_SHIFT) == 0) & (bit_counts >= 4) & (bit_counts <= 28))[0]
+    return fingerprint[frames].view(np.int32), frames
+
+
+def similarity(query, candidate, offset):
+    """
+    두 지문의 유사도와 커버리지
+
+    Args:
+        offset: query[i]와 candidate[i + offset]을 비교
+
+    Returns:
+        tuple: (일치하는 비트 비율, 겹치는 프레임 수 / 긴 지문의 프레임 수)
+    """
+    if offset >= 0:
+        a, b = query, candidate[offset:]
+    else:
+        a, b = query[-offset:], candidate
+    overlap = min(len(a), len(b))
+    if overlap == 0:
+        return 0.0, 0.0
+    differing = np.unpackbits((a[:overlap] ^ b[:overlap]).view(np.uint8)).sum()
+    return 1 - differing / (overlap * 32), overlap / max(len(query), len(candidate))
+
+
+def find_match(db, fingerprint):
+    """
+    같은 녹음의 기존 지문 검색
+
+    색인된 지문 값이 일치하는 기존 지문을 위치 차이별로 투표하여 후보를 고르고, 후보마다
+    전체 지문을 정렬하여 비트 일치 비율을 확인합니다.
+
+    Returns:
+        tuple: (변환 결과 ID, 유사도) 또는 None
+    """
+    keys, frames = sample_keys(fingerprint)
+    if not len(keys):
+        return None
+    query_frames = defaultdict(list)
+    for key, frame in zip(keys.tolist(), frames.tolist()):
+        query_frames[key].append(frame)
+
+    votes = defaultdict(list)
+    rows = (
+        db.query(AudioFingerprintKey.fingerprint_id, AudioFingerprintKey.key, AudioFingerprintKey.frame)
+        .filter(AudioFingerprintKey.key.in_(list(query_frames)))
+        .all()
+    )
+    for fingerprint_id, key, frame in rows:
+        for query_frame in query_frames[key]:
+            votes[fingerprint_id].append(frame - query_frame)
+
+    candidates = sorted(
+        ((len(offsets), fingerprint_id) for fingerprint_id, offsets in votes.items() if len(offsets) >= MIN_KEY_VOTES),
+        reverse=True
+    )[:MAX_CANDIDATES]
+    best = None
+    for _, fingerprint_id in candidates:
+        stored = db.query(AudioFingerprint).filter(AudioFingerprint.id == fingerprint_id).first()
+        if stored is None:
+            continue
+        candidate = np.frombuffer(stored.data, dtype="<u4")
+        offset = int(np.median(votes[fingerprint_id]))
+        for shift in range(-ALIGN_SEARCH_FRAMES, ALIGN_SEARCH_FRAMES + 1):
+            score, coverage = similarity(fingerprint, candidate, offset + shift)
+            if (
+                score >= settings.FINGERPRINT_MATCH_THRESHOLD
+                and coverage >= settings.FINGERPRINT_MIN_COVERAGE
+                and (best is None or score > best[1])
+            ):
+                best = (stored.transcription_id, round(float(score), 4))
+    return best
+
+
+def save_fingerprint(db, transcription_id, fingerprint):
+    """변환 결과의 오디오 지문과 검색 색인 저장 (호출한 세션의 트랜잭션에 포함)"""
+    if fingerprint is None or not len(fingerprint):
+        return
+    stored = AudioFingerprint(
+        transcription_id=transcription_id,
+        frames=len(fingerprint),
+        data=fingerprint.astype("<u4").tobytes()
+    )
+    db.add(stored)
+    db.flush()
+    keys, frames = sample_keys(fingerprint)
+    if len(keys):
+        db.execute(
+            insert(AudioFingerprintKey),
+            [
+                {"fingerprint_id": stored.id, "key": key, "frame": frame}
+                for key, frame in zip(keys.tolist(), frames.tolist())
+            ]
+        )
+
+
+def fingerprint_file(file_path):
+    """미디어 프로세스 풀에서 오디오 지문 계산 (실패하면 중복 확인 없이 진행하도록 None 반환)"""
+    if not settings.FINGERPRINT_ENABLED:
+        return None
+    try:
+        with usage_service.stage("fingerprint"):
+            return media_pool.run(compute_fingerprint, file_path, settings.FFMPEG_BINARY)
+    except Exception as e:
+        print(f"오디오 지문 계산 오류: {str(e)}")
+        return None
+
+
+def transcribe_or_reuse(file_path, workspace=None):
+    """
+    오디오 지문이 일치하는 기존 변환 결과가 있으면 재사용하고, 없으면 변환
+
+    같은 녹음을 다른 형식(휴대폰 m4a, 화면 녹화 mp4 등)으로 다시 올린 경우 Whisper 변환을
+    다시 하지 않습니다. 새로 변환한 경우 호출한 쪽에서 변환 결과를 저장한 뒤
+    save_fingerprint로 지문을 함께 저장해야 이후 업로드와 비교할 수 있습니다.
+
+    Returns:
+        dict: transcribe_audio 결과와 같은 형식에 다음 항목 추가
+              "transcription_id": 재사용한 변환 결과 ID (새로 변환했으면 None),
+              "fingerprint": 오디오 지문 (계산하지 못했으면 None)
+    """
+    fingerprint = fingerprint_file(file_path)
+    if fingerprint is not None:
+        db = SessionLocal()
+        try:
+            match = find_match(db, fingerprint)
+            transcription = (
+                db.query(Transcription).filter(Transcription.id == match[0]).first() if match else None
+            )
+            if transcription is not None:
+                print(f"오디오 지문 일치 (유사도 {match[1]}): 변환 결과 {transcription.id} 재사용")
+                usage_service.record("transcription", model="whisper-1", cache_hit=True)
+                return {
+                    "text": rehydrate(db, transcription, "transcription_text") or "",
+                    "duration": transcription.duration,
+                    "segments": get_segments(db, transcription.id),
+                    "transcription_id": transcription.id,
+                    "fingerprint": fingerprint,
+                }
+        except Exception as e:
+            print(f"오디오 지문 검색 오류: {str(e)}")
+        finally:
+            db.close()
+
+    result = transcribe_audio(file_path, workspace)
+    return {**result, "transcription_id": None, "fingerprint": fingerprint}
@@ -0,0 +1,453 @@
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.idempotency import IdempotencyRecord
+from app.services.write_behind import track_pending
+
+# 요청 본문을 메모리에 둘 최대 크기 (넘으면 임시 파일로 기록)
+SPOOL_MEMORY_BYTES = 1024 ** 2
+READ_CHUNK_BYTES = 64 * 1024
+MAX_KEY_LENGTH = 255
+
+# 저장하지 않는 응답 (일시적인 오류는 같은 키로 다시 처리할 수 있어야 함)
+RETRYABLE_STATUS_CODES = {408, 429}
+
+
+def request_fingerprint(method, path, query_string, content_type, body_file):
+    """
+    요청 메서드/경로/쿼리/본문 해시
+
+    멀티파트 요청은 재시도할 때마다 경계 문자열이 바뀌므로 경계 문자열을 제외하고 계산합니다.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{method} {path}?{query_string}\n".encode("latin-1"))
+    boundary = b""
+    if content_type.startswith("multipart/"):
+        for part in content_type.split(";"):
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "boundary":
+                boundary = value.strip('"').encode("latin-1")
+        digest.update(b"multipart\n")
+    else:
+        digest.update(content_type.encode("latin-1") + b"\n")
+
+    body_file.seek(0)
+    pending = b""
+    keep = max(len(boundary) - 1, 0)
+    while True:
+        chunk = body_file.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        pending += chunk
+        if boundary:
+            pending = pending.replace(boundary, b"")
+        # 청크 경계에 걸친 경계 문자열을 제거할 수 있도록 끝부분은 다음 청크와 함께 처리
+        if len(pending) > keep:
+            digest.update(pending[:len(pending) - keep])
+            pending = pending[len(pending) - keep:]
+    digest.update(pending)
+    body_file.seek(0)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key별 처리 상태와 응답 저장소
+
+    처음 요청한 서버가 키를 선점(running)하고, 처리가 끝나면 응답을 저장(completed)합니다.
+    처리 중인 서버가 종료되어 잠금 시간이 지난 키나 보관 기간이 지난 키는 다시 선점할 수 있습니다.
+    """
+
+    def __init__(self, ttl, lock_seconds, sweep_interval):
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.sweep_interval = sweep_interval
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._sweeper = None
+
+    def claim(self, client_id, key, fingerprint):
+        """
+        키 선점 시도
+
+        Returns:
+            tuple: (선점 여부, 선점하지 못했으면 기존 기록 - 없으면 None)
+        """
+        db = SessionLocal()
+        try:
+            now = func.now()
+            stmt = pg_insert(IdempotencyRecord).values(
+                client_id=client_id,
+                key=key,
+                fingerprint=fingerprint,
+                status="running",
+                owner=self.owner,
+                locked_until=now + timedelta(seconds=self.lock_seconds),
+                expires_at=now + timedelta(seconds=self.ttl),
+            )
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_idempotency_keys_client_key",
+                set_={
+                    "fingerprint": stmt.excluded.fingerprint,
+                    "status": "running",
+                    "owner": self.owner,
+                    "locked_until": stmt.excluded.locked_until,
+                    "expires_at": stmt.excluded.expires_at,
+                    "status_code": None,
+                    "headers": None,
+                    "body": None,
+                    "created_at": now,
+                },
+                where=or_(
+                    IdempotencyRecord.expires_at < now,
+                    and_(
+                        IdempotencyRecord.status == "running",
+                        IdempotencyRecord.locked_until < now,
+                        IdempotencyRecord.fingerprint == stmt.excluded.fingerprint
+                    )
+                )
+            ).returning(IdempotencyRecord.id)
+            claimed = db.execute(stmt).first() is not None
+            db.commit()
+            if claimed:
+                return True, None
+            record = db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.client_id == client_id, IdempotencyRecord.key == key
+            ).first()
+            if record is not None:
+                db.expunge(record)
+            return False, record
+        finally:
+            db.close()
+
+    def complete(self, client_id, key, status_code, headers, body):
+        """처리 결과 저장"""
+        db = SessionLocal()
+        try:
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.client_id == client_id,
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.owner == self.owner
+            ).update({
+                "status": "completed",
+                "locked_until": None,
+                "status_code": status_code,
+                "headers": json.dumps(headers),
+                "body": body,
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def release(self, client_id, key):
+        """응답을 저장하지 않고 선점 해제 (같은 키로 다시 처리 가능)"""
+        db = SessionLocal()
+        try:
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.client_id == client_id,
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.owner == self.owner,
+                IdempotencyRecord.status == "running"
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def sweep_expired(self):
+        """보관 기간이 지난 키 삭제"""
+        db = SessionLocal()
+        try:
+            removed = db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.expires_at < datetime.now(timezone.utc),
+                or_(IdempotencyRecord.status == "completed", IdempotencyRecord.locked_until < func.now())
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if removed:
+            print(f"Idempotency-Key 정리: {removed}개의 만료된 키 삭제")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep_expired()
+            except Exception as e:
+                print(f"Idempotency-Key 정리 오류: {str(e)}")
+
+    def start_sweeper(self):
+        """만료 키 정리 스레드 시작"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="idempotency-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """만료 키 정리 스레드 중지"""
+        self._stop.set()
+
+
+class IdempotencyMiddleware:
+    """
+    Idempotency-Key 헤더가 있는 POST 요청을 한 번만 처리하는 ASGI 미들웨어
+
+    - 처리가 끝난 키로 같은 요청이 오면 저장된 응답을 그대로 반환합니다 (Idempotent-Replayed: true).
+    - 처리 중인 키로 같은 요청이 오면 새로 처리하지 않고 처리가 끝날 때까지 기다린 후 같은 응답을 반환합니다.
+      같은 프로세스에서 처리 중이면 완료 즉시, 다른 서버에서 처리 중이면 저장소를 주기적으로 확인합니다.
+    - 같은 키로 다른 요청(경로/본문)이 오면 422로 거절합니다.
+    - 5xx/408/429 응답이나 처리 중 오류는 저장하지 않으므로 같은 키로 다시 시도할 수 있습니다.
+    - durable 대기 시간이 지나 202로 먼저 응답한 요청은 write-behind 저장이 끝난 뒤 응답을 저장하며,
+      저장에 실패하면 응답을 저장하지 않습니다.
+    - 본문을 모두 받아 해시한 뒤 처리하므로 IDEMPOTENCY_MAX_REQUEST_BYTES보다 큰 본문은 413으로 거절하고,
+      본문을 받으면서 처리하는 스트리밍 경로(IDEMPOTENCY_EXCLUDED_PATHS)에는 적용하지 않습니다.
+    """
+
+    def __init__(self, app, store):
+        self.app = app
+        self.store = store
+        self.prefix = settings.API_PREFIX
+        self.excluded_paths = {
+            path.strip().rstrip("/") for path in settings.IDEMPOTENCY_EXCLUDED_PATHS.split(",") if path.strip()
+        }
+        self._inflight = {}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not settings.IDEMPOTENCY_ENABLED
+            or not scope["path"].startswith(self.prefix)
+            or scope["path"][len(self.prefix):].rstrip("/") in self.excluded_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key", b"").decode("latin-1").strip()
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"Idempotency-Key는 {MAX_KEY_LENGTH}자 이하여야 합니다"}
+            )
+            await response(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > settings.IDEMPOTENCY_MAX_REQUEST_BYTES:
+            await self._reject_too_large(scope, receive, send)
+            return
+
+        client_id = headers.get(b"x-client-id", b"").decode("latin-1")[:100]
+        body_file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        try:
+            try:
+                if not await self._read_body(receive, body_file):
+                    return
+            except RequestBodyTooLarge:
+                await self._reject_too_large(scope, receive, send)
+                return
+            fingerprint = await run_in_threadpool(
+                request_fingerprint,
+                scope["method"],
+                scope["path"],
+                scope.get("query_string", b"").decode("latin-1"),
+                headers.get(b"content-type", b"").decode("latin-1"),
+                body_file
+            )
+            await self._handle(scope, receive, send, client_id, key, fingerprint, body_file)
+        finally:
+            body_file.close()
+
+    async def _read_body(self, receive, body_file):
+        """
+        요청 본문을 모두 받아 임시 파일에 기록 (해시 계산 후 애플리케이션에 다시 전달, 연결이 끊기면 False)
+
+        Raises:
+            RequestBodyTooLarge: 본문이 IDEMPOTENCY_MAX_REQUEST_BYTES보다 큰 경우 (Content-Length 없이 보낸 요청)
+        """
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return False
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > settings.IDEMPOTENCY_MAX_REQUEST_BYTES:
+                raise RequestBodyTooLarge()
+            if size > SPOOL_MEMORY_BYTES:
+                # 임시 파일로 넘어간 뒤에는 디스크 쓰기가 이벤트 루프를 막지 않도록 스레드에서 기록
+                await run_in_threadpool(body_file.write, chunk)
+            else:
+                body_file.write(chunk)
+            if not message.get("more_body", False):
+                return True
+
+    async def _reject_too_large(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=413,
+            content={
+                "detail": f"Idempotency-Key를 사용하는 요청 본문은 {settings.IDEMPOTENCY_MAX_REQUEST_BYTES}바이트 이하여야 합니다. "
+                          "큰 파일은 /uploads로 분할 업로드한 뒤 upload_id로 요청해주세요"
+            }
+        )
+        await response(scope, receive, send)
+
+    async def _handle(self, scope, receive, send, client_id, key, fingerprint, body_file):
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            claimed, record = await run_in_threadpool(self.store.claim, client_id, key, fingerprint)
+            if claimed:
+                await self._execute(scope, receive, send, client_id, key, body_file)
+                return
+            if record is None:
+                # 선점 해제와 조회 사이에 삭제된 경우
+                continue
+            if record.fingerprint != fingerprint:
+                response = JSONResponse(
+                    status_code=422,
+                    content={"detail": "같은 Idempotency-Key로 다른 요청이 이미 처리되었습니다"}
+                )
+                await response(scope, receive, send)
+                return
+            if record.status == "completed":
+                await self._replay(send, record)
+                return
+
+            # 처리 중인 요청이 끝날 때까지 대기
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                response = JSONResponse(
+                    status_code=409,
+                    content={"detail": "같은 Idempotency-Key의 요청이 아직 처리 중입니다"},
+                    headers={"Retry-After": str(int(settings.IDEMPOTENCY_POLL_INTERVAL) + 1)}
+                )
+                await response(scope, receive, send)
+                return
+            loop, done = self._inflight.get((client_id, key), (None, None))
+            wait = min(remaining, settings.IDEMPOTENCY_POLL_INTERVAL)
+            if loop is asyncio.get_running_loop():
+                try:
+                    await asyncio.wait_for(done.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(wait)
+
+    async def _execute(self, scope, receive, send, client_id, key, body_file):
+        """선점한 요청 처리 후 응답 저장 (클라이언트 연결이 끊겨도 응답은 저장)"""
+        done = asyncio.Event()
+        self._inflight[(client_id, key)] = (asyncio.get_running_loop(), done)
+        response = {"status": None, "headers": [], "chunks": [], "size": 0, "complete": False, "storable": True}
+        body_file.seek(0)
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            chunk = await run_in_threadpool(body_file.read, READ_CHUNK_BYTES)
+            more_body = len(chunk) == READ_CHUNK_BYTES
+            body_sent = not more_body
+            return {"type": "http.request", "body": chunk, "more_body": more_body}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")] for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                response["size"] += len(body)
+                if response["size"] > settings.IDEMPOTENCY_MAX_BODY_BYTES:
+                    response["storable"] = False
+                    response["chunks"] = []
+                elif response["storable"]:
+                    response["chunks"].append(body)
+                if not message.get("more_body", False):
+                    response["complete"] = True
+            try:
+                await send(message)
+            except Exception as e:
+                # 클라이언트가 시간 초과로 연결을 끊어도 처리 결과는 재시도 요청에 돌려줄 수 있도록 계속 진행
+                print(f"Idempotency-Key 응답 전송 실패 (응답은 저장): {str(e)}")
+
+        with track_pending() as pending_writes:
+            try:
+                await self.app(scope, replay_receive, send_wrapper)
+            finally:
+                await self._finish(client_id, key, response, pending_writes, done)
+
+    async def _finish(self, client_id, key, response, pending_writes, done):
+        """응답 저장 (응답 후에도 저장 중인 쓰기 묶음이 있으면 저장 결과를 확인한 뒤 저장 또는 선점 해제)"""
+        try:
+            if (
+                response["complete"]
+                and response["storable"]
+                and response["status"] < 500
+                and response["status"] not in RETRYABLE_STATUS_CODES
+                and await self._wait_writes(pending_writes)
+            ):
+                await run_in_threadpool(
+                    self.store.complete, client_id, key, response["status"], response["headers"],
+                    b"".join(response["chunks"])
+                )
+            else:
+                await run_in_threadpool(self.store.release, client_id, key)
+        except Exception as e:
+            print(f"Idempotency-Key 저장 오류: {str(e)}")
+        finally:
+            self._inflight.pop((client_id, key), None)
+            done.set()
+
+    async def _wait_writes(self, futures):
+        """응답 후에도 저장 중인 쓰기 묶음을 기다림 (저장에 실패하면 False: 같은 키로 다시 처리할 수 있도록 함)"""
+        if not futures:
+            return True
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*[asyncio.wrap_future(future) for future in futures]),
+                timeout=settings.IDEMPOTENCY_LOCK_SECONDS
+            )
+        except Exception as e:
+            print(f"Idempotency-Key 요청의 결과 저장 실패 (응답을 저장하지 않음): {str(e)}")
+            return False
+        return True
+
+    async def _replay(self, send, record):
+        """저장된 응답 반환"""
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(record.headers)]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": record.body or b""})
+
+
+class RequestBodyTooLarge(Exception):
+    """Idempotency-Key 요청 본문이 IDEMPOTENCY_MAX_REQUEST_BYTES보다 큰 경우 발생"""
+
+
+# 기본 Idempotency-Key 저장소 인스턴스 생성
+idempotency_store = IdempotencyStore(
+    ttl=settings.IDEMPOTENCY_TTL,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    sweep_interval=settings.IDEMPOTENCY_SWEEP_INTERVAL,
+)
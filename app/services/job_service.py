@@ -0,0 +1,445 @@
+import json
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.job import WorkItem
+from app.models.transcription import Transcription, ReportTemplate, Report, Summary
+from app.services import analytics_service, usage_service
+from app.services.report_service import text_to_report
+from app.services.segment_service import save_segments, transcript_text
+from app.services.similarity_service import index_reports, index_summaries
+from app.services.summary_service import summarize_text_variants
+from app.services.template_service import regenerate_reports
+from app.services.fingerprint_service import transcribe_or_reuse, save_fingerprint
+from app.services.upload_service import upload_store, UploadError, UploadInProgress
+from app.services.workspace_service import workspace_manager
+
+
+class PermanentJobError(Exception):
+    """재시도해도 성공할 수 없는 작업 오류 (바로 실패 처리)"""
+
+
+class JobContext:
+    """처리 중인 작업 정보"""
+
+    def __init__(self, item_id, kind, payload, attempts):
+        self.id = item_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+        self.lease_lost = threading.Event()
+        self._after_commit = []
+        self._on_failure = []
+
+    def after_commit(self, callback):
+        """작업 완료가 커밋된 뒤 실행할 정리 작업 등록"""
+        self._after_commit.append(callback)
+
+    def on_failure(self, callback):
+        """작업이 실패 처리(재시도 대기 또는 dead)된 뒤 실행할 정리 작업 등록"""
+        self._on_failure.append(callback)
+
+
+# 작업 종류별 처리 함수 (db, JobContext) -> dict
+
+def _run_transcription(db, job):
+    """분할 업로드된 파일을 변환하여 저장 (payload: upload_id)"""
+    upload_id = job.payload.get("upload_id")
+    if not upload_id:
+        raise PermanentJobError("upload_id가 필요합니다")
+    # 같은 작업의 재시도는 이전 시도가 처리 중 상태로 남긴 업로드를 바로 다시 가져감
+    owner = f"job:{job.id}"
+    try:
+        file_path, file_name = upload_store.claim(db, upload_id, owner=owner)
+    except UploadInProgress:
+        # 다른 요청/작업이 처리 중이면 나중에 재시도
+        raise
+    except UploadError as e:
+        raise PermanentJobError(e.detail)
+    # 실패 처리되면 다른 요청이 사용할 수 있도록 되돌림 (임대를 잃은 경우는 재시도한 작업이 가져감)
+    job.on_failure(lambda: upload_store.release(upload_id, owner=owner))
+    file_ext = os.path.splitext(file_name)[1].lower()
+    file_type = "video" if file_ext in ['.mp4', '.avi', '.mov', '.webm'] else "audio"
+    _end_reads(db)
+
+    with workspace_manager.create() as workspace:
+        result = transcribe_or_reuse(file_path, workspace)
+
+    transcription_id = result["transcription_id"]
+    if transcription_id is None:
+        transcription = Transcription(
+            file_name=file_name,
+            file_type=file_type,
+            transcription_text=result["text"],
+            duration=result.get("duration")
+        )
+        db.add(transcription)
+        db.flush()
+        transcription_id = transcription.id
+        save_segments(db, transcription_id, result["segments"])
+        save_fingerprint(db, transcription_id, result["fingerprint"])
+        analytics_service.record_transcription(db, file_type, transcription.duration)
+
+    def delete_upload():
+        cleanup_db = SessionLocal()
+        try:
+            upload_store.delete(cleanup_db, upload_id)
+        finally:
+            cleanup_db.close()
+    job.after_commit(delete_upload)
+    return {
+        "transcription_id": transcription_id,
+        "duration": result.get("duration"),
+        "reused": result["transcription_id"] is not None
+    }
+
+
+def _end_reads(db):
+    """
+    입력 조회 트랜잭션 종료 (외부 API를 호출하는 동안 연결이 idle in transaction 상태로 남지 않도록)
+
+    조회한 객체는 세션에서 분리하여 불러온 값을 그대로 사용합니다.
+    """
+    db.expunge_all()
+    db.rollback()
+
+
+def _load_transcript(db, payload):
+    transcription = db.query(Transcription).filter(Transcription.id == payload.get("transcription_id")).first()
+    if not transcription:
+        raise PermanentJobError("변환 결과를 찾을 수 없습니다")
+    text = transcript_text(db, transcription, payload.get("start"), payload.get("end"))
+    if not text:
+        raise PermanentJobError("변환 결과(또는 요청한 구간)에 텍스트가 없습니다")
+    return transcription, text
+
+
+def _run_summary(db, job):
+    """저장된 변환 결과로 요약 생성 (payload: transcription_id, variants, start, end)"""
+    transcription, text = _load_transcript(db, job.payload)
+    _end_reads(db)
+    variants = job.payload.get("variants") or [{}]
+    results = summarize_text_variants(text, variants)
+
+    summaries = []
+    for result in results:
+        summary = Summary(
+            transcription_id=transcription.id,
+            summary_text=result["summary"],
+            length=result["length"],
+            focus=result["focus"],
+            language=result["language"],
+            report_content=json.dumps(result["report"], ensure_ascii=False)
+        )
+        db.add(summary)
+        summaries.append(summary)
+        analytics_service.record_summary(db, result["length"], result["focus"], result["language"])
+    db.flush()
+    job.after_commit(lambda: index_summaries(summaries))
+    return {"transcription_id": transcription.id, "summary_ids": [summary.id for summary in summaries]}
+
+
+def _run_report(db, job):
+    """텍스트 또는 저장된 변환 결과로 보고서 생성 (payload: code, text 또는 transcription_id, start, end)"""
+    code = job.payload.get("code")
+    template = db.query(ReportTemplate).filter(ReportTemplate.code == code).first()
+    if not template:
+        raise PermanentJobError(f"코드 '{code}'에 해당하는 보고서 템플릿이 없습니다")
+    if job.payload.get("text"):
+        transcription_id, text = None, job.payload["text"]
+    else:
+        transcription, text = _load_transcript(db, job.payload)
+        transcription_id = transcription.id
+    _end_reads(db)
+
+    with usage_service.labels(template_code=template.code):
+        report_content = text_to_report(text, json.loads(template.template))
+    report = Report(
+        transcription_id=transcription_id,
+        template_id=template.id,
+        raw_text=text,
+        content=json.dumps(report_content),
+        template_version=template.version
+    )
+    db.add(report)
+    analytics_service.record_report(db, template.code)
+    db.flush()
+    job.after_commit(lambda: index_reports([report]))
+    return {"report_id": report.id, "code": template.code}
+
+
+def _run_report_regeneration(db, job):
+    """템플릿 변경 후 이전 버전으로 생성된 보고서의 추가/변경 필드 재생성 (payload: code)"""
+    code = job.payload.get("code")
+    template = db.query(ReportTemplate).filter(ReportTemplate.code == code).first()
+    if not template:
+        raise PermanentJobError(f"코드 '{code}'에 해당하는 보고서 템플릿이 없습니다")
+
+    def save_progress(db, progress):
+        db.query(WorkItem).filter(WorkItem.id == job.id).update(
+            {"progress": json.dumps(progress)}, synchronize_session=False
+        )
+
+    # 묶음마다 커밋하므로 임대를 잃으면 다음 묶음부터는 새로 가져간 워커가 처리
+    with usage_service.labels(template_code=template.code):
+        progress = regenerate_reports(db, template, on_progress=save_progress, should_stop=job.lease_lost.is_set)
+    if progress["failed"]:
+        # 재시도하면 실패한 보고서만 다시 처리됨
+        raise RuntimeError(f"보고서 {progress['failed']}건을 재생성하지 못했습니다: {progress['failed_ids']}")
+    return progress
+
+
+JOB_HANDLERS = {
+    "transcription": _run_transcription,
+    "summary": _run_summary,
+    "report": _run_report,
+    "report_regeneration": _run_report_regeneration,
+}
+
+
+def enqueue(db, kind, payload, max_attempts=None):
+    """작업 등록 (호출한 세션에서 커밋)"""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"알 수 없는 작업 종류입니다: {kind}")
+    item = WorkItem(
+        kind=kind,
+        payload=json.dumps(payload, ensure_ascii=False),
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+    )
+    db.add(item)
+    db.flush()
+    return item
+
+
+def retry(db, item_id):
+    """실패(dead) 작업을 다시 대기 상태로 전환"""
+    updated = db.query(WorkItem).filter(WorkItem.id == item_id, WorkItem.status == "dead").update(
+        {"status": "queued", "attempts": 0, "available_at": func.now(), "error": None, "finished_at": None},
+        synchronize_session=False
+    )
+    db.commit()
+    return updated > 0
+
+
+def backoff_seconds(attempts):
+    """재시도 대기 시간 (지수 증가 + 지터)"""
+    delay = min(settings.JOB_BACKOFF_MAX, settings.JOB_BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(db, worker_id, lease_seconds, kinds=None):
+    """
+    처리할 작업 하나를 가져옴 (FOR UPDATE SKIP LOCKED)
+
+    대기 중이면서 재시도 시각이 지난 작업 또는 임대가 만료된(워커가 비정상 종료된) 작업을
+    가져가며, 다른 워커가 잠근 행은 건너뛰므로 여러 노드의 워커가 동시에 호출해도 됩니다.
+
+    Returns:
+        JobContext: 가져온 작업 (없으면 None)
+    """
+    query = db.query(WorkItem).filter(or_(
+        and_(WorkItem.status == "queued", WorkItem.available_at <= func.now()),
+        and_(WorkItem.status == "running", WorkItem.lease_expires_at < func.now())
+    ))
+    if kinds:
+        query = query.filter(WorkItem.kind.in_(kinds))
+    item = query.order_by(WorkItem.available_at).limit(1).with_for_update(skip_locked=True).first()
+    if item is None:
+        db.rollback()
+        return None
+
+    if item.status == "running" and item.attempts >= item.max_attempts:
+        # 마지막 시도 중 워커가 종료된 작업은 더 이상 재시도하지 않음
+        item.status = "dead"
+        item.error = item.error or "작업 처리 중 워커 임대가 만료되었습니다"
+        item.locked_by = None
+        item.finished_at = func.now()
+        db.commit()
+        return None
+
+    item.status = "running"
+    item.locked_by = worker_id
+    item.attempts += 1
+    item.lease_expires_at = func.now() + timedelta(seconds=lease_seconds)
+    db.commit()
+    return JobContext(item.id, item.kind, json.loads(item.payload), item.attempts)
+
+
+def heartbeat(db, job, worker_id, lease_seconds):
+    """
+    작업 임대 연장 (다른 워커가 가져간 경우 False)
+
+    같은 프로세스의 워커 스레드는 worker_id가 같으므로 시도 횟수(attempts)까지 비교하여,
+    임대가 만료된 뒤 같은 프로세스의 다른 스레드가 다시 가져간 작업과 구분합니다.
+    (complete/fail도 같은 조건 사용)
+    """
+    updated = db.query(WorkItem).filter(
+        WorkItem.id == job.id, WorkItem.locked_by == worker_id, WorkItem.attempts == job.attempts,
+        WorkItem.status == "running"
+    ).update({"lease_expires_at": func.now() + timedelta(seconds=lease_seconds)}, synchronize_session=False)
+    db.commit()
+    return updated > 0
+
+
+def complete(db, job, worker_id, result):
+    """처리 결과와 작업 완료 상태를 함께 커밋 (임대를 잃었으면 결과를 버림)"""
+    updated = db.query(WorkItem).filter(
+        WorkItem.id == job.id, WorkItem.locked_by == worker_id, WorkItem.attempts == job.attempts,
+        WorkItem.status == "running"
+    ).update({
+        "status": "succeeded",
+        "result": json.dumps(result, ensure_ascii=False),
+        "error": None,
+        "lease_expires_at": None,
+        "finished_at": func.now()
+    }, synchronize_session=False)
+    if not updated:
+        db.rollback()
+        return False
+    db.commit()
+    return True
+
+
+def fail(db, job, worker_id, error, permanent=False):
+    """
+    실패 처리: 재시도 횟수가 남았으면 대기 후 재시도, 아니면 dead 상태로 전환
+
+    Returns:
+        bool: 실패 처리했는지 여부 (임대를 잃었으면 False)
+    """
+    db.rollback()
+    item = db.query(WorkItem).filter(
+        WorkItem.id == job.id, WorkItem.locked_by == worker_id, WorkItem.attempts == job.attempts,
+        WorkItem.status == "running"
+    ).with_for_update().first()
+    if item is None:
+        db.rollback()
+        return False
+    item.error = str(error)[:2000]
+    item.locked_by = None
+    item.lease_expires_at = None
+    if permanent or item.attempts >= item.max_attempts:
+        item.status = "dead"
+        item.finished_at = func.now()
+    else:
+        item.status = "queued"
+        item.available_at = func.now() + timedelta(seconds=backoff_seconds(item.attempts))
+    db.commit()
+    return True
+
+
+class Worker:
+    """
+    작업 테이블에서 작업을 가져와 처리하는 워커
+
+    동시 처리 수만큼 스레드가 작업을 가져가고, 별도 스레드가 처리 중인 작업의 임대를
+    주기적으로 연장합니다. 워커가 종료되어 임대가 만료된 작업은 다른 워커가 다시 가져갑니다.
+    """
+
+    def __init__(self, concurrency=None, lease_seconds=None, poll_interval=None, kinds=None):
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.kinds = kinds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def _process(self, job):
+        db = SessionLocal()
+        try:
+            # 작업에서 사용한 오디오 초/토큰을 작업 종류 단위로 기록
+            with usage_service.collect(endpoint=f"job:{job.kind}"):
+                result = JOB_HANDLERS[job.kind](db, job)
+            if job.lease_lost.is_set() or not complete(db, job, self.worker_id, result):
+                db.rollback()
+                print(f"작업 {job.id}: 임대를 잃어 결과를 저장하지 않았습니다")
+                return
+            for callback in job._after_commit:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"작업 {job.id} 정리 오류: {str(e)}")
+            print(f"작업 {job.id} ({job.kind}) 완료")
+        except Exception as e:
+            print(f"작업 {job.id} ({job.kind}) 오류 (시도 {job.attempts}회): {str(e)}")
+            if fail(db, job, self.worker_id, e, permanent=isinstance(e, PermanentJobError)):
+                for callback in job._on_failure:
+                    try:
+                        callback()
+                    except Exception as e:
+                        print(f"작업 {job.id} 정리 오류: {str(e)}")
+        finally:
+            db.close()
+
+    def _run_loop(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job = claim(db, self.worker_id, self.lease_seconds, self.kinds)
+            except Exception as e:
+                print(f"작업 조회 오류: {str(e)}")
+                job = None
+            finally:
+                db.close()
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            with self._lock:
+                self._active[job.id] = job
+            try:
+                self._process(job)
+            finally:
+                with self._lock:
+                    self._active.pop(job.id, None)
+
+    def _heartbeat_loop(self):
+        # 종료 요청 후에도 처리 중인 작업이 끝날 때까지 임대 연장
+        while not self._done.wait(self.lease_seconds / 3):
+            with self._lock:
+                jobs = list(self._active.values())
+            if not jobs:
+                continue
+            db = SessionLocal()
+            try:
+                for job in jobs:
+                    if not heartbeat(db, job, self.worker_id, self.lease_seconds):
+                        job.lease_lost.set()
+            except Exception as e:
+                print(f"작업 임대 연장 오류: {str(e)}")
+            finally:
+                db.close()
+
+    def run(self):
+        """워커 실행 (stop() 호출 시 처리 중인 작업을 마치고 종료)"""
+        print(f"워커 {self.worker_id} 시작 (동시 처리 {self.concurrency}개)")
+        threads = [threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)]
+        threads += [
+            threading.Thread(target=self._run_loop, name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        usage_service.usage_writer.start()
+        analytics_service.rollup_writer.start()
+        for thread in threads[1:]:
+            thread.join()
+        self._done.set()
+        usage_service.usage_writer.stop()
+        analytics_service.rollup_writer.stop()
+        print(f"워커 {self.worker_id} 종료")
+
+    def stop(self):
+        self._stop.set()
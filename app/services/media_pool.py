@@ -0,0 +1,156 @@
+import math
+import multiprocessing
+import signal
+import threading
+import time
+
+from app.core.config import settings
+from app.services.model_router import LatencyHistogram
+
+
+class MediaTaskTimeout(Exception):
+    """미디어 처리 작업이 제한 시간 안에 끝나지 않은 경우 발생"""
+
+
+def _raise_timeout(signum, frame):
+    raise MediaTaskTimeout("미디어 처리 시간이 초과되었습니다")
+
+
+def _init_worker():
+    """작업 프로세스 초기화 (디코더 모듈을 미리 불러와 첫 요청 지연을 줄임)"""
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    # 종료 신호는 부모 프로세스가 처리
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import app.services.media_service  # noqa: F401
+
+
+def _run_task(func, args, submitted_at, timeout):
+    """작업 프로세스에서 실행: (결과, 대기 시간, 실행 시간) 반환"""
+    started = time.time()
+    signal.alarm(max(1, int(timeout)))
+    try:
+        result = func(*args)
+    finally:
+        signal.alarm(0)
+    return result, started - submitted_at, time.time() - started
+
+
+class MediaPool:
+    """
+    CPU 사용량이 큰 미디어 디코딩/변환을 실행하는 전용 프로세스 풀
+
+    요청 처리 스레드와 이벤트 루프를 막지 않고 GIL의 영향도 받지 않도록 작업을 별도 프로세스에서
+    실행합니다. 작업 프로세스는 디코더 모듈을 미리 불러온 상태로 시작하고, 지정한 작업 수를
+    처리하면 새 프로세스로 교체되어 디코더의 메모리 누수가 쌓이지 않습니다. 제한 시간을 넘긴
+    작업은 작업 프로세스 안에서 SIGALRM으로 중단됩니다.
+    """
+
+    def __init__(self, size, max_tasks_per_child, task_timeout, enabled=True):
+        self.size = size
+        self.max_tasks_per_child = max_tasks_per_child
+        self.task_timeout = task_timeout
+        self.enabled = enabled
+        self.queue_wait = LatencyHistogram()
+        self.run_time = LatencyHistogram()
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0}
+        self.inflight = 0
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """프로세스 풀 시작 (작업 프로세스를 미리 생성)"""
+        with self._lock:
+            if self.enabled and self._pool is None:
+                # 스레드가 있는 서버 프로세스를 fork하지 않도록 spawn 방식 사용
+                context = multiprocessing.get_context("spawn")
+                self._pool = context.Pool(
+                    processes=self.size,
+                    initializer=_init_worker,
+                    maxtasksperchild=self.max_tasks_per_child
+                )
+            return self._pool
+
+    def stop(self):
+        """프로세스 풀 종료"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def run(self, func, *args, timeout=None):
+        """
+        미디어 작업을 프로세스 풀에서 실행하고 결과를 기다림 (요청 처리 스레드에서 호출)
+
+        Args:
+            func: 모듈 수준 함수 (app.services.media_service)
+            args: 함수 인자
+            timeout: 작업 제한 시간(초), 기본값: settings.MEDIA_TASK_TIMEOUT
+
+        Returns:
+            함수 반환값
+        """
+        if timeout is None:
+            timeout = self.task_timeout
+        if not self.enabled:
+            return func(*args)
+
+        pool = self.start()
+        self._count("submitted")
+        with self._lock:
+            ahead = self.inflight
+            self.inflight += 1
+        # 앞선 작업이 모두 제한 시간까지 실행되는 경우의 최대 대기 시간
+        # (작업 프로세스가 비정상 종료되어 결과가 오지 않는 경우에도 무한히 기다리지 않음)
+        deadline = timeout * (1 + math.ceil(ahead / self.size)) + 5
+        submitted_at = time.time()
+        try:
+            async_result = pool.apply_async(_run_task, (func, args, submitted_at, timeout))
+            result, waited, elapsed = async_result.get(deadline)
+        except multiprocessing.TimeoutError:
+            self._count("timeouts")
+            raise MediaTaskTimeout("미디어 처리 결과를 받지 못했습니다")
+        except MediaTaskTimeout:
+            self._count("timeouts")
+            raise
+        except Exception:
+            self._count("failed")
+            raise
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+        self.queue_wait.record(waited)
+        self.run_time.record(elapsed)
+        self._count("completed")
+        return result
+
+    def metrics(self):
+        """프로세스 풀 크기, 대기열 대기 시간, 실행 시간 지표"""
+        with self._lock:
+            counters = dict(self.counters)
+            inflight = self.inflight
+        return {
+            "enabled": self.enabled,
+            "size": self.size,
+            "max_tasks_per_child": self.max_tasks_per_child,
+            "task_timeout": self.task_timeout,
+            "inflight": inflight,
+            "queued": max(0, inflight - self.size),
+            "queue_wait": self.queue_wait.snapshot(),
+            "run_time": self.run_time.snapshot(),
+            **counters,
+        }
+
+
+# 기본 미디어 프로세스 풀 인스턴스 생성
+media_pool = MediaPool(
+    size=settings.MEDIA_POOL_SIZE,
+    max_tasks_per_child=settings.MEDIA_POOL_MAX_TASKS_PER_CHILD,
+    task_timeout=settings.MEDIA_TASK_TIMEOUT,
+    enabled=settings.MEDIA_POOL_ENABLED,
+)
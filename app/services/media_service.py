@@ -0,0 +1,85 @@
+import os
+import subprocess
+import numpy as np
+from pydub import AudioSegment
+import moviepy.editor as mp
+
+# 오디오 지문 설정 (8kHz 모노로 디코딩, 0.512초 창을 64ms 간격으로 이동, 300~2000Hz 33개 대역)
+FINGERPRINT_SAMPLE_RATE = 8000
+FINGERPRINT_FRAME = 4096
+FINGERPRINT_HOP = 512
+FINGERPRINT_BANDS = np.geomspace(300, 2000, 34)
+
+# CPU 사용량이 큰 미디어 디코딩/변환 함수 (media_pool의 작업 프로세스에서 실행)
+
+def extract_audio_from_video(video_path, audio_path=None):
+    """영상 파일에서 오디오 추출"""
+    if audio_path is None:
+        audio_path = os.path.splitext(video_path)[0] + ".wav"
+    video = mp.VideoFileClip(video_path)
+    try:
+        video.audio.write_audiofile(audio_path, logger=None)
+    finally:
+        video.close()
+    return audio_path
+
+def get_audio_duration(audio_path):
+    """오디오 파일의 길이(초)를 반환"""
+    audio = AudioSegment.from_file(audio_path)
+    return len(audio) / 1000  # 밀리초를 초로 변환
+
+def compute_fingerprint(file_path, ffmpeg_binary="ffmpeg"):
+    """
+    디코딩한 오디오의 스펙트럼 지문 계산
+
+    프레임마다 33개 대역 에너지를 구하고, 인접 대역 간 에너지 차이가 직전 프레임보다
+    커졌는지 여부를 32비트로 기록합니다. 코덱/비트레이트/컨테이너가 달라도 대역 에너지의
+    상대적인 변화는 유지되므로 같은 녹음이면 대부분의 비트가 일치합니다.
+    오디오는 ffmpeg에서 일정 크기씩 읽어 처리하므로 녹음 길이와 관계없이 메모리 사용량이 일정합니다.
+
+    Returns:
+        numpy.ndarray: 프레임별 32비트 지문 (uint32)
+    """
+    window = np.hanning(FINGERPRINT_FRAME).astype(np.float32)
+    freqs = np.fft.rfftfreq(FINGERPRINT_FRAME, 1 / FINGERPRINT_SAMPLE_RATE)
+    band_index = np.digitize(freqs, FINGERPRINT_BANDS) - 1
+    # 주파수 빈 → 대역 합산 행렬
+    bands = np.zeros((len(freqs), len(FINGERPRINT_BANDS) - 1), dtype=np.float32)
+    in_band = (band_index >= 0) & (band_index < len(FINGERPRINT_BANDS) - 1)
+    bands[np.nonzero(in_band)[0], band_index[in_band]] = 1
+    weights = np.uint32(1) << np.arange(32, dtype=np.uint32)
+
+    process = subprocess.Popen(
+        [ffmpeg_binary, "-hide_banner", "-loglevel", "error", "-i", file_path,
+         "-vn", "-ac", "1", "-ar", str(FINGERPRINT_SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    energies = []
+    pending = np.zeros(0, dtype=np.float32)
+    try:
+        while True:
+            data = process.stdout.read(FINGERPRINT_SAMPLE_RATE * 2 * 60)  # 1분씩 처리
+            if not data:
+                break
+            samples = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32)
+            pending = np.concatenate([pending, samples])
+            count = (len(pending) - FINGERPRINT_FRAME) // FINGERPRINT_HOP + 1
+            if count <= 0:
+                continue
+            frames = np.lib.stride_tricks.sliding_window_view(pending, FINGERPRINT_FRAME)[::FINGERPRINT_HOP][:count]
+            power = np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32) ** 2
+            energies.append(power @ bands)
+            pending = pending[count * FINGERPRINT_HOP:]
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"오디오 지문 계산을 위한 디코딩에 실패했습니다 (ffmpeg 종료 코드 {returncode})")
+    if not energies:
+        return np.zeros(0, dtype=np.uint32)
+
+    energy = np.concatenate(energies)
+    band_diff = energy[:, :-1] - energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    return (bits.astype(np.uint32) * weights).sum(axis=1, dtype=np.uint32)
@@ -0,0 +1,225 @@
+import asyncio
+import bisect
+import threading
+import time
+
+from app.core.config import settings
+from app.services.openai_client import get_async_openai_client
+from app.services.prompt_compiler import MODEL_CONTEXT_TOKENS, DEFAULT_CONTEXT_TOKENS
+from app.services import usage_service
+
+# 지연 시간 히스토그램 버킷 경계 (초)
+LATENCY_BUCKETS = [0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25, 30, 40, 50, 60, 90, 120, 180]
+
+
+class LatencyHistogram:
+    """모델별 응답 지연 시간 히스토그램 (고정 버킷)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.total += 1
+            self.sum += seconds
+
+    def quantile(self, q):
+        """버킷 상한 기준 분위수 (기록이 없으면 None)"""
+        with self._lock:
+            if not self.total:
+                return None
+            target = q * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= target:
+                    return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1] * 2
+            return LATENCY_BUCKETS[-1] * 2
+
+    def snapshot(self):
+        with self._lock:
+            total, total_sum = self.total, self.sum
+        return {
+            "count": total,
+            "mean": round(total_sum / total, 3) if total else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class ModelRouter:
+    """
+    입력 토큰 수와 지연 시간 SLO에 따라 채팅 모델을 선택하고, 응답이 관측된 p95보다 늦으면
+    대체 모델(또는 같은 모델)에 중복 요청을 보내 먼저 도착한 응답을 사용하는 라우터
+
+    요청은 전용 이벤트 루프 스레드에서 비동기 클라이언트로 실행되므로, 늦은 쪽 요청은
+    태스크 취소로 연결까지 정리됩니다.
+    """
+
+    def __init__(self, models, latency_slo, hedging_enabled, hedge_min_samples, hedge_default_delay):
+        self.models = models
+        self.latency_slo = latency_slo
+        self.hedging_enabled = hedging_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_default_delay = hedge_default_delay
+        self.histograms = {model: LatencyHistogram() for model in models}
+        self.counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+
+    def _histogram(self, model):
+        with self._lock:
+            if model not in self.histograms:
+                self.histograms[model] = LatencyHistogram()
+            return self.histograms[model]
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._client = get_async_openai_client()
+                thread = threading.Thread(target=self._loop.run_forever, name="model-router", daemon=True)
+                thread.start()
+            return self._loop
+
+    def candidates(self, input_tokens, max_completion_tokens=0):
+        """
+        입력 토큰 수에 맞는 모델을 선호 순서대로 반환
+
+        컨텍스트에 들어가는 모델 중 p95가 SLO 이내인 모델(또는 관측 기록이 부족한 모델)을
+        우선하고, 나머지는 p95가 낮은 순서로 뒤에 둡니다.
+        """
+        fitting = [
+            m for m in self.models
+            if input_tokens + max_completion_tokens <= MODEL_CONTEXT_TOKENS.get(m, DEFAULT_CONTEXT_TOKENS)
+        ] or list(self.models)
+
+        within_slo, over_slo = [], []
+        for model in fitting:
+            histogram = self._histogram(model)
+            p95 = histogram.quantile(0.95)
+            if histogram.total < self.hedge_min_samples or p95 <= self.latency_slo:
+                within_slo.append(model)
+            else:
+                over_slo.append((p95, model))
+        return within_slo + [model for _, model in sorted(over_slo)]
+
+    def select_model(self, input_tokens, max_completion_tokens=0):
+        """입력 토큰 수와 SLO 기준 기본 모델 선택"""
+        return self.candidates(input_tokens, max_completion_tokens)[0]
+
+    def hedge_delay(self, model):
+        """중복 요청을 보내기 전 대기 시간 (관측된 p95)"""
+        histogram = self._histogram(model)
+        if histogram.total < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return histogram.quantile(0.95)
+
+    async def _call(self, model, messages, options):
+        started = time.monotonic()
+        try:
+            response = await self._client.chat.completions.create(model=model, messages=messages, **options)
+        except asyncio.CancelledError:
+            # 취소된 요청도 최소 지연 시간으로 기록해야 느린 모델의 p95가 낮게 유지되지 않음
+            self._histogram(model).record(time.monotonic() - started)
+            raise
+        self._histogram(model).record(time.monotonic() - started)
+        return response
+
+    async def _hedged(self, models, messages, build_options):
+        primary = models[0]
+        alternate = models[1] if len(models) > 1 else primary
+        primary_task = asyncio.ensure_future(self._call(primary, messages, build_options(primary)))
+        tasks = {primary_task: primary}
+        hedge_task = None
+        errors = []
+
+        done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(primary))
+        if not done and self.hedging_enabled:
+            # p95 안에 응답이 없으면 대체 모델로 중복 요청
+            self._count("hedged")
+            hedge_task = asyncio.ensure_future(self._call(alternate, messages, build_options(alternate)))
+            tasks[hedge_task] = alternate
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    model = tasks.pop(task)
+                    if task.exception() is None:
+                        if task is hedge_task and primary_task in tasks:
+                            self._count("hedge_wins")
+                        return task.result()
+                    errors.append(task.exception())
+                    print(f"OpenAI API 오류 ({model}): {str(task.exception())}")
+                if not tasks and hedge_task is None and len(models) > 1:
+                    # 기본 모델이 실패하면 대체 모델로 재시도
+                    self._count("failovers")
+                    hedge_task = asyncio.ensure_future(self._call(alternate, messages, build_options(alternate)))
+                    tasks[hedge_task] = alternate
+        finally:
+            # 늦은 쪽 요청 취소
+            for task in tasks:
+                task.cancel()
+        raise errors[-1]
+
+    def chat_completion(self, messages, input_tokens=0, max_completion_tokens=0, models=None, options=None):
+        """
+        모델을 선택하여 채팅 완성 요청 (필요 시 중복 요청)
+
+        Args:
+            messages: 채팅 메시지 목록
+            input_tokens: 입력 토큰 수 (모델 선택에 사용)
+            max_completion_tokens: 예상 출력 토큰 수
+            models: 사용할 모델 후보 (지정하지 않으면 라우팅 결과 사용)
+            options: 모델명을 받아 요청 옵션(dict)을 반환하는 함수 또는 dict
+
+        Returns:
+            ChatCompletion: 먼저 도착한 응답 (response.model로 실제 모델 확인)
+        """
+        if models is None:
+            models = self.candidates(input_tokens, max_completion_tokens)
+        if callable(options):
+            build_options = options
+        else:
+            build_options = lambda model: dict(options or {})
+        self._count("requests")
+
+        started = time.monotonic()
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._hedged(models, messages, build_options), loop)
+        response = future.result()
+        # 응답의 토큰 사용량을 현재 요청의 사용량 기록에 추가
+        usage_service.record_chat(response, (time.monotonic() - started) * 1000)
+        return response
+
+    def metrics(self):
+        """모델별 지연 시간 히스토그램과 라우팅 통계"""
+        with self._lock:
+            counters = dict(self.counters)
+            models = list(self.histograms)
+        return {
+            "latency_slo": self.latency_slo,
+            "models": {model: self._histogram(model).snapshot() for model in models},
+            **counters,
+        }
+
+
+# 기본 모델 라우터 인스턴스 생성
+model_router = ModelRouter(
+    models=[m.strip() for m in settings.CHAT_MODELS.split(",") if m.strip()],
+    latency_slo=settings.CHAT_LATENCY_SLO,
+    hedging_enabled=settings.CHAT_HEDGING_ENABLED,
+    hedge_min_samples=settings.CHAT_HEDGE_MIN_SAMPLES,
+    hedge_default_delay=settings.CHAT_HEDGE_DEFAULT_DELAY,
+)
@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from app.core.config import settings
 import os
 
@@ -15,5 +15,12 @@ def get_openai_client():
     # OpenAI 클라이언트 초기화 및 반환
     return OpenAI(api_key=api_key)
 
+def get_async_openai_client():
+    """비동기 OpenAI 클라이언트를 초기화하여 반환합니다. (모델 라우터 전용 이벤트 루프에서 사용)"""
+    api_key = settings.OPENAI_API_KEY
+    if not api_key:
+        raise ValueError("OpenAI API 키가 설정되지 않았습니다. OPENAI_API_KEY 환경 변수를 확인하세요.")
+    return AsyncOpenAI(api_key=api_key)
+
 # 기본 클라이언트 인스턴스 생성
 client = get_openai_client() 
\ No newline at end of file
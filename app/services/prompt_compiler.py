@@ -0,0 +1,285 @@
+import json
+import re
+import threading
+from functools import lru_cache
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken이 없으면 근사치로 토큰 수 계산
+    tiktoken = None
+
+# 모델별 컨텍스트 크기 (토큰)
+MODEL_CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-3.5-turbo-16k": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# 메시지 구성에 따른 추가 토큰 여유분
+MESSAGE_OVERHEAD_TOKENS = 16
+
+REPORT_SYSTEM_PROMPT = "당신은 텍스트를 구조화된 보고서로 변환하는 전문가입니다."
+
+REPORT_PROMPT_HEADER = (
+    "다음 텍스트를 지정된 보고서 양식에 맞게 변환해주세요.\n"
+    "보고서에는 다음 필드가 포함되어야 합니다 (필드명(타입): 설명):\n"
+)
+REPORT_PROMPT_INPUT = "\n입력 텍스트:\n"
+REPORT_PROMPT_FOOTER = "\nJSON 형식으로 결과를 반환해주세요."
+
+# 문장 단위 분할 (문장부호 뒤 공백 또는 줄바꿈 기준)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+|\n+")
+
+# 토큰 절감 통계
+_stats_lock = threading.Lock()
+_stats = {"calls": 0, "tokens_saved": 0, "chunked_calls": 0, "trimmed_calls": 0}
+
+
+class CompiledPrompt:
+    """보고서 템플릿에서 생성된 고정 프롬프트 조각"""
+
+    def __init__(self, fragment, fixed_tokens, legacy_tokens):
+        self.fragment = fragment
+        self.fixed_tokens = fixed_tokens
+        self.legacy_tokens = legacy_tokens
+
+    @property
+    def tokens_saved(self):
+        return self.legacy_tokens - self.fixed_tokens
+
+    def render(self, text):
+        """입력 텍스트를 포함한 전체 사용자 프롬프트 생성"""
+        return REPORT_PROMPT_HEADER + self.fragment + REPORT_PROMPT_INPUT + text + REPORT_PROMPT_FOOTER
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # 인코딩 파일을 내려받을 수 없는 환경 등
+        return None
+
+
+def count_tokens(text, model=None):
+    """텍스트의 토큰 수 계산 (tiktoken이 없으면 근사치)"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model or settings.REPORT_MODEL)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # 근사치: ASCII는 4자당 1토큰, 그 외(한글 등)는 1자당 1토큰
+    ascii_chars = sum(1 for c in text if ord(c) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _parse_budgets(value):
+    budgets = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, tokens = item.split("=", 1)
+            budgets[name.strip()] = int(tokens)
+    return budgets
+
+
+def input_budget(model, fixed_tokens, max_completion_tokens=None):
+    """모델별 입력 텍스트에 사용할 수 있는 토큰 수"""
+    if max_completion_tokens is None:
+        max_completion_tokens = settings.REPORT_MAX_COMPLETION_TOKENS
+    budgets = _parse_budgets(settings.PROMPT_TOKEN_BUDGETS)
+    total = budgets.get(model, MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS))
+    return max(0, total - max_completion_tokens - fixed_tokens - MESSAGE_OVERHEAD_TOKENS)
+
+
+def _describe_field(field_info):
+    """필드 정의를 한 줄 요약으로 변환 (중첩 속성 포함)"""
+    field_type = field_info.get("type", "string")
+    if field_type == "object" and field_info.get("properties"):
+        properties = "; ".join(
+            f"{name}({_type_label(info)}) {info.get('description', '')}".rstrip()
+            for name, info in field_info["properties"].items()
+        )
+        return f"object{{{properties}}}"
+    return _type_label(field_info)
+
+
+def _type_label(field_info):
+    field_type = field_info.get("type", "string")
+    if field_type == "array":
+        item_type = (field_info.get("items") or {}).get("type", "string")
+        return f"{item_type}[]"
+    return field_type
+
+
+def compile_fields(fields):
+    """템플릿 필드를 압축된 프롬프트 조각으로 변환"""
+    lines = []
+    for name, field_info in fields.items():
+        description = field_info.get("description", "")
+        line = f"- {name}({_describe_field(field_info)})"
+        if description:
+            line += f": {description}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=256)
+def _compile(template_key, model):
+    fields = json.loads(template_key).get("fields", {})
+    fragment = compile_fields(fields)
+    fixed_tokens = count_tokens(
+        REPORT_SYSTEM_PROMPT + REPORT_PROMPT_HEADER + fragment + REPORT_PROMPT_INPUT + REPORT_PROMPT_FOOTER,
+        model
+    )
+    # 기존 프롬프트 형식 (들여쓰기된 JSON 필드 정의)
+    legacy_tokens = count_tokens(
+        REPORT_SYSTEM_PROMPT + REPORT_PROMPT_HEADER
+        + json.dumps(fields, ensure_ascii=False, indent=2)
+        + REPORT_PROMPT_INPUT + REPORT_PROMPT_FOOTER,
+        model
+    )
+    compiled = CompiledPrompt(fragment, fixed_tokens, legacy_tokens)
+    print(
+        f"프롬프트 컴파일: 필드 {len(fields)}개, 고정 토큰 {fixed_tokens} "
+        f"(기존 {legacy_tokens}, {compiled.tokens_saved} 절감), 모델 {model}"
+    )
+    return compiled
+
+
+def compile_template(template_format, model=None):
+    """
+    보고서 템플릿을 압축된 프롬프트로 컴파일 (템플릿 내용 기준 캐시)
+
+    Args:
+        template_format: 보고서 템플릿 포맷 (dict)
+        model: 토큰 계산에 사용할 모델명
+
+    Returns:
+        CompiledPrompt: 컴파일된 프롬프트
+    """
+    template_key = json.dumps(template_format, ensure_ascii=False)
+    return _compile(template_key, model or settings.REPORT_MODEL)
+
+
+def _split_long(text, max_tokens, model=None):
+    """예산보다 긴 문장을 각각 max_tokens 이하인 조각으로 분할 (토큰 경계 기준)"""
+    encoding = _get_encoding(model or settings.REPORT_MODEL)
+    pieces = []
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        start = 0
+        while start < len(tokens):
+            end = min(start + max_tokens, len(tokens))
+            # 여러 토큰에 걸친 글자(한글 등)의 중간에서 자르지 않도록 경계를 앞으로 조정
+            while end < len(tokens) and end - start > 1 and not _is_complete(encoding, tokens[start:end]):
+                end -= 1
+            # 예산이 한 글자보다 작으면 글자가 끝나는 곳까지 포함
+            while end < len(tokens) and not _is_complete(encoding, tokens[start:end]):
+                end += 1
+            pieces.append(encoding.decode(tokens[start:end]))
+            start = end
+        return pieces
+
+    # tiktoken이 없으면 글자 단위로 자르고 조각의 토큰 수를 다시 확인
+    while text:
+        tokens = count_tokens(text, model)
+        size = len(text) if tokens <= max_tokens else max(1, len(text) * max_tokens // tokens)
+        while size > 1 and count_tokens(text[:size], model) > max_tokens:
+            size -= 1
+        pieces.append(text[:size])
+        text = text[size:]
+    return pieces
+
+
+def _is_complete(encoding, tokens):
+    try:
+        b"".join(encoding.decode_tokens_bytes(tokens)).decode("utf-8")
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def split_text(text, max_tokens, model=None):
+    """텍스트를 문장 경계 기준으로 최대 토큰 수 이하의 조각들로 분할"""
+    if max_tokens <= 0:
+        raise ValueError("입력 텍스트에 사용할 수 있는 토큰이 없습니다. 모델 또는 토큰 예산 설정을 확인하세요.")
+
+    chunks = []
+    current, current_tokens = [], 0
+    for sentence in _SENTENCE_SPLIT.split(text):
+        if not sentence:
+            continue
+        tokens = count_tokens(sentence, model) + 1
+        if tokens > max_tokens:
+            # 한 문장이 예산보다 긴 경우 토큰 경계에서 분할하여 각각 한 조각으로 사용
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_long(sentence, max_tokens, model))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks or [""]
+
+
+def fit_input(text, compiled, model=None, strategy=None):
+    """
+    입력 텍스트를 모델별 토큰 예산에 맞게 조정
+
+    Args:
+        text: 입력 텍스트
+        compiled: 컴파일된 프롬프트
+        model: 사용할 모델명
+        strategy: 예산 초과 시 처리 방식 ('chunk': 여러 조각으로 분할, 'trim': 앞/뒤만 유지)
+
+    Returns:
+        list: 각각 예산 이내인 입력 텍스트 조각 목록
+    """
+    model = model or settings.REPORT_MODEL
+    strategy = strategy or settings.PROMPT_OVERFLOW_STRATEGY
+    budget = input_budget(model, compiled.fixed_tokens)
+    input_tokens = count_tokens(text, model)
+
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["tokens_saved"] += compiled.tokens_saved
+
+    if input_tokens <= budget:
+        return [text]
+
+    # 예산이 너무 작아 앞/뒤 절반을 만들 수 없으면 분할로 처리
+    if strategy == "trim" and budget >= 2:
+        with _stats_lock:
+            _stats["trimmed_calls"] += 1
+        # 앞부분과 뒷부분을 절반씩 유지
+        halves = split_text(text, budget // 2, model)
+        print(f"입력 텍스트 축소: {input_tokens} → 약 {budget} 토큰 (모델 {model})")
+        return [halves[0] + "\n...\n" + halves[-1]]
+
+    chunks = split_text(text, budget, model)
+    with _stats_lock:
+        _stats["chunked_calls"] += 1
+    print(f"입력 텍스트 분할: {input_tokens} 토큰 → {len(chunks)}개 조각 (모델 {model}, 예산 {budget})")
+    return chunks
+
+
+def get_stats():
+    """프롬프트 토큰 절감 통계 반환"""
+    with _stats_lock:
+        return dict(_stats)
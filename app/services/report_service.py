@@ -1,43 +1,205 @@
 import json
 import openai
+from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
-from app.services.openai_client import client
+from app.services.model_router import model_router
+from app.services.prompt_compiler import REPORT_SYSTEM_PROMPT, compile_template, count_tokens, fit_input
+from app.services.report_validator import get_validator
+from app.services.singleflight import single_flight
+from app.services import usage_service
 
-def text_to_report(text, template_format):
+def text_to_report(text, template_format, model=None):
     """
     텍스트를 보고서 양식에 맞게 변환
     
+    필드가 많은 템플릿은 필드 그룹별로 같은 입력에 대해 동시에 요청한 후 합치므로,
+    한 그룹의 응답이 잘못되어도 해당 그룹의 필드만 다시 요청합니다.
+    
     Args:
         text: 변환할 텍스트
         template_format: 보고서 템플릿 포맷 (dict)
+        model: 사용할 모델명 (지정하지 않으면 입력 토큰 수와 지연 시간 SLO에 따라 선택)
         
     Returns:
         dict: 보고서 데이터
     """
-    # 템플릿 포맷에서 필드 추출
+    # 같은 텍스트/템플릿의 보고서를 동시에 요청하면 (다른 서버/워커 포함) 한 번만 생성하여 결과를 나누어 받음
+    return single_flight.do(
+        "report",
+        [text, template_format, model],
+        lambda: _text_to_report(text, template_format, model),
+        usage_kind="chat"
+    )
+
+
+def _text_to_report(text, template_format, model=None):
+    """보고서 생성 (모델 선택, 입력 분할, 필드 그룹별 동시 요청)"""
+    if model is None:
+        input_tokens = compile_template(template_format).fixed_tokens + count_tokens(text)
+        model = model_router.select_model(input_tokens, settings.REPORT_MAX_COMPLETION_TOKENS)
+    
+    # 템플릿별로 캐시된 압축 프롬프트와 토큰 예산에 맞춘 입력 텍스트
+    compiled = compile_template(template_format, model)
+    chunks = fit_input(text, compiled, model)
+    groups = field_groups(template_format)
+    
+    if len(chunks) == 1 and len(groups) == 1:
+        return _generate_report(chunks[0], template_format, model)
+    
+    # 입력 조각 × 필드 그룹별로 동시에 변환 (그룹마다 응답 토큰 수가 줄어 지연 시간이 가장 큰 그룹 기준으로 제한됨)
+    tasks = [(chunk, {"fields": group}) for chunk in chunks for group in groups]
+    max_workers = min(len(tasks), settings.REPORT_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            usage_service.bind(lambda task: _generate_report(task[0], task[1], model)), tasks
+        ))
+    
+    # 그룹별 결과를 조각 단위로 합친 후, 예산을 초과하여 분할된 입력은 조각별 보고서를 병합
     fields = template_format.get("fields", {})
+    partial_reports = []
+    for i in range(len(chunks)):
+        report_data = {}
+        for result in results[i * len(groups):(i + 1) * len(groups)]:
+            report_data.update(result)
+        partial_reports.append({name: report_data[name] for name in fields if name in report_data})
+    if len(partial_reports) == 1:
+        return partial_reports[0]
+    return merge_reports(partial_reports)
+
+
+def _output_weight(field_info):
+    """필드의 예상 응답 크기 (문자열 1개 기준 상대값)"""
+    field_type = field_info.get("type", "string")
+    if field_type == "object" and field_info.get("properties"):
+        return sum(_output_weight(info) for info in field_info["properties"].values())
+    if field_type == "array":
+        return 3 * _output_weight(field_info.get("items") or {"type": "string"})
+    if field_type in ("number", "integer", "boolean"):
+        return 0.5
+    return 1
+
+
+def field_groups(template_format):
+    """
+    템플릿 필드를 동시에 요청할 그룹으로 분할
     
-    # OpenAI API를 사용하여 텍스트를 보고서로 변환
-    prompt = f"""
-    다음 텍스트를 지정된 보고서 양식에 맞게 변환해주세요.
-    보고서에는 다음 필드가 포함되어야 합니다:
+    템플릿에 "groups"(필드명 목록의 목록)가 있으면 그대로 사용하고, 어느 그룹에도
+    속하지 않은 필드는 마지막 그룹으로 묶습니다. 없으면 필드 수가
+    REPORT_FIELD_GROUP_MIN_FIELDS 이상인 템플릿만 예상 응답 크기가 비슷하도록
+    최대 REPORT_FIELD_GROUPS개 그룹으로 나눕니다.
     
-    {json.dumps(fields, ensure_ascii=False, indent=2)}
+    Returns:
+        list: [{필드명: 필드 정의}] (템플릿의 필드 순서 유지)
+    """
+    fields = template_format.get("fields", {})
+    declared = template_format.get("groups")
+    if declared:
+        groups, assigned = [], set()
+        for names in declared:
+            group = {name: fields[name] for name in names if name in fields and name not in assigned}
+            if group:
+                groups.append(group)
+                assigned.update(group)
+        rest = {name: info for name, info in fields.items() if name not in assigned}
+        if rest:
+            groups.append(rest)
+        return groups or [fields]
     
-    입력 텍스트: 
-    {text}
+    count = min(settings.REPORT_FIELD_GROUPS, len(fields))
+    if count <= 1 or len(fields) < settings.REPORT_FIELD_GROUP_MIN_FIELDS:
+        return [fields]
     
-    JSON 형식으로 결과를 반환해주세요.
+    # 예상 응답 크기가 큰 필드부터 가장 작은 그룹에 배정
+    loads = [0.0] * count
+    assignment = {}
+    for name in sorted(fields, key=lambda name: -_output_weight(fields[name])):
+        index = loads.index(min(loads))
+        assignment[name] = index
+        loads[index] += _output_weight(fields[name])
+    return [
+        {name: info for name, info in fields.items() if assignment[name] == index}
+        for index in range(count)
+    ]
+
+
+def _generate_report(text, template_format, model, repair_attempts=None):
     """
+    텍스트 한 조각을 보고서로 변환하고 템플릿 검증기로 확인
+    
+    검증에 실패한 필드만 다시 요청하며, 재시도 후에도 잘못된 필드는 기본값으로 채웁니다.
+    """
+    if repair_attempts is None:
+        repair_attempts = settings.REPORT_REPAIR_ATTEMPTS
+    
+    report_data = _request_report(text, template_format, model)
+    
+    # 템플릿별로 한 번 생성된 검증기로 중첩 필드까지 확인
+    validator = get_validator(template_format)
+    invalid = validator.validate(report_data)
+    
+    if invalid and repair_attempts > 0:
+        print(f"보고서 필드 검증 실패, 해당 필드만 재요청: {sorted(invalid)}")
+        repair_format = {"fields": {name: validator.fields[name] for name in invalid}}
+        repaired = _generate_report(text, repair_format, model, repair_attempts - 1)
+        for name in invalid:
+            report_data[name] = repaired[name]
+        return report_data
+    
+    # 템플릿 형식에 맞게 데이터 구조 확인 및 조정
+    for name in invalid:
+        report_data[name] = validator.default(name)
+    
+    return report_data
+
+
+def _response_format(template_format, model):
+    """모델에 맞는 응답 형식 (strict JSON 스키마 또는 JSON 모드)"""
+    mode = settings.REPORT_RESPONSE_FORMAT
+    if mode == "auto":
+        prefixes = [p.strip() for p in settings.STRUCTURED_OUTPUT_MODELS.split(",") if p.strip()]
+        mode = "json_schema" if any(model.startswith(p) for p in prefixes) else "json_object"
+    
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "report",
+                "strict": True,
+                "schema": get_validator(template_format).schema
+            }
+        }
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+def _request_report(text, template_format, model):
+    """컴파일된 프롬프트로 보고서 JSON 요청"""
+    compiled = compile_template(template_format, model)
+    
+    # OpenAI API를 사용하여 텍스트를 보고서로 변환
+    prompt = compiled.render(text)
+    input_tokens = compiled.fixed_tokens + count_tokens(text, model)
+    
+    # 선택된 모델을 우선 사용하고, 응답이 늦으면 라우터가 대체 모델로 중복 요청
+    candidates = model_router.candidates(input_tokens, settings.REPORT_MAX_COMPLETION_TOKENS)
+    models = [model] + [m for m in candidates if m != model]
+    
+    def build_options(candidate):
+        options = {"temperature": 0.2}
+        response_format = _response_format(template_format, candidate)
+        if response_format:
+            options["response_format"] = response_format
+        return options
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 텍스트를 구조화된 보고서로 변환하는 전문가입니다."},
+        response = model_router.chat_completion(
+            [
+                {"role": "system", "content": REPORT_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.2,
+            models=models,
+            options=build_options
         )
         
         result_text = response.choices[0].message.content.strip()
@@ -45,6 +207,14 @@ def text_to_report(text, template_format):
         print(f"OpenAI API 오류: {str(e)}")
         raise
     
+    # JSON 모드 응답은 그대로 파싱
+    try:
+        report_data = json.loads(result_text)
+        if isinstance(report_data, dict):
+            return report_data
+    except json.JSONDecodeError:
+        pass
+    
     # JSON 문자열에서 실제 JSON 부분만 추출
     try:
         # 응답에서 JSON 부분만 추출
@@ -61,13 +231,66 @@ def text_to_report(text, template_format):
         # JSON 파싱 오류 시 텍스트 그대로 반환
         report_data = {"text": result_text}
     
-    # 템플릿 형식에 맞게 데이터 구조 확인 및 조정
-    for field_name, field_info in fields.items():
-        if field_name not in report_data:
-            # 필드가 없는 경우 기본값 설정
-            if field_info.get("type") == "array":
-                report_data[field_name] = []
-            else:
-                report_data[field_name] = ""
-    
-    return report_data
\ No newline at end of file
+    return report_data
+
+
+def merge_reports(reports):
+    """
+    여러 조각에서 생성된 보고서를 하나로 병합
+    
+    배열은 순서를 유지하며 중복 없이 합치고, 문자열은 서로 다른 값을 줄바꿈으로
+    연결하며, 객체는 속성별로 재귀 병합합니다. 그 외 값은 처음 나온 값을 사용합니다.
+    """
+    merged = {}
+    for report in reports:
+        for key, value in report.items():
+            merged[key] = _merge_value(merged.get(key), value)
+    return merged
+
+
+def _merge_value(current, value):
+    if current in (None, "", [], {}):
+        return value
+    if value in (None, "", [], {}):
+        return current
+    if isinstance(current, list) and isinstance(value, list):
+        result = list(current)
+        for item in value:
+            if item not in result:
+                result.append(item)
+        return result
+    if isinstance(current, dict) and isinstance(value, dict):
+        result = dict(current)
+        for key, item in value.items():
+            result[key] = _merge_value(result.get(key), item)
+        return result
+    if isinstance(current, str) and isinstance(value, str):
+        return current if value in current else f"{current}\n{value}"
+    return current
+
+
+def text_to_reports(text, template_formats):
+    """
+    하나의 텍스트를 여러 보고서 양식으로 동시에 변환
+    
+    Args:
+        text: 변환할 텍스트
+        template_formats: {템플릿 코드: 보고서 템플릿 포맷(dict)}
+        
+    Returns:
+        dict: {템플릿 코드: {"content": 보고서 데이터} 또는 {"error": 오류 메시지}}
+    """
+    def run(item):
+        code, template_format = item
+        try:
+            with usage_service.labels(template_code=code):
+                return code, {"content": text_to_report(text, template_format)}
+        except Exception as e:
+            return code, {"error": str(e)}
+    
+    if not template_formats:
+        return {}
+    
+    max_workers = min(len(template_formats), settings.REPORT_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(usage_service.bind(run), template_formats.items()))
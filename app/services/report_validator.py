@@ -0,0 +1,148 @@
+import json
+from functools import lru_cache
+
+# 템플릿 필드 타입별 JSON 스키마 타입
+_SCALAR_TYPES = {
+    "string": "string",
+    "number": "number",
+    "integer": "integer",
+    "boolean": "boolean",
+}
+
+
+def _field_schema(field_info):
+    field_type = field_info.get("type", "string")
+    schema = {}
+    if field_info.get("description"):
+        schema["description"] = field_info["description"]
+    if field_type == "array":
+        schema["type"] = "array"
+        schema["items"] = _field_schema(field_info.get("items") or {"type": "string"})
+    elif field_type == "object" and field_info.get("properties"):
+        schema.update(_object_schema(field_info["properties"]))
+    elif field_type == "object":
+        # 속성이 정의되지 않은 객체는 자유 형식 텍스트로 요청
+        schema["type"] = "string"
+    elif field_type in ("number", "integer", "boolean"):
+        # 텍스트에서 값을 알 수 없는 경우를 위해 null 허용
+        schema["type"] = [_SCALAR_TYPES[field_type], "null"]
+    else:
+        schema["type"] = "string"
+    return schema
+
+
+def _object_schema(properties):
+    return {
+        "type": "object",
+        "properties": {name: _field_schema(info) for name, info in properties.items()},
+        "required": list(properties.keys()),
+        "additionalProperties": False,
+    }
+
+
+def build_json_schema(fields):
+    """템플릿 필드 정의를 strict JSON 스키마로 변환"""
+    return _object_schema(fields)
+
+
+def _default_value(field_info):
+    field_type = field_info.get("type", "string")
+    if field_type == "array":
+        return []
+    if field_type == "object" and field_info.get("properties"):
+        return {name: _default_value(info) for name, info in field_info["properties"].items()}
+    if field_type in ("number", "integer", "boolean"):
+        return None
+    return ""
+
+
+def _compile_check(field_info):
+    """필드 정의에서 검사 함수 생성 (값 → 오류 경로 목록)"""
+    field_type = field_info.get("type", "string")
+
+    if field_type == "array":
+        check_item = _compile_check(field_info.get("items") or {"type": "string"})
+
+        def check_array(value, path):
+            if not isinstance(value, list):
+                return [path]
+            errors = []
+            for i, item in enumerate(value):
+                errors.extend(check_item(item, f"{path}[{i}]"))
+            return errors
+        return check_array
+
+    if field_type == "object" and field_info.get("properties"):
+        checks = {name: _compile_check(info) for name, info in field_info["properties"].items()}
+
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return [path]
+            errors = []
+            for name, check in checks.items():
+                if name not in value:
+                    errors.append(f"{path}.{name}")
+                else:
+                    errors.extend(check(value[name], f"{path}.{name}"))
+            return errors
+        return check_object
+
+    if field_type in ("number", "integer"):
+        def check_number(value, path):
+            if value is None:
+                return []
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return [path]
+            if field_type == "integer" and not float(value).is_integer():
+                return [path]
+            return []
+        return check_number
+
+    if field_type == "boolean":
+        return lambda value, path: [] if value is None or isinstance(value, bool) else [path]
+
+    if field_type == "object":
+        return lambda value, path: [] if isinstance(value, (str, dict)) else [path]
+
+    return lambda value, path: [] if isinstance(value, str) else [path]
+
+
+class ReportValidator:
+    """템플릿 필드 정의에서 한 번 생성되는 보고서 검증기"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.schema = build_json_schema(fields)
+        self._checks = {name: _compile_check(info) for name, info in fields.items()}
+
+    def validate(self, report_data):
+        """
+        보고서 데이터를 검증
+
+        Returns:
+            dict: {잘못된 최상위 필드명: 오류 경로 목록} (누락된 필드 포함)
+        """
+        invalid = {}
+        for name, check in self._checks.items():
+            if name not in report_data:
+                invalid[name] = [name]
+                continue
+            errors = check(report_data[name], name)
+            if errors:
+                invalid[name] = errors
+        return invalid
+
+    def default(self, field_name):
+        """필드의 기본값 반환"""
+        return _default_value(self.fields[field_name])
+
+
+@lru_cache(maxsize=256)
+def _compile_validator(fields_key):
+    return ReportValidator(json.loads(fields_key))
+
+
+def get_validator(template_format):
+    """템플릿별로 캐시된 보고서 검증기 반환"""
+    fields = template_format.get("fields", {})
+    return _compile_validator(json.dumps(fields, ensure_ascii=False))
@@ -0,0 +1,81 @@
+from sqlalchemy import insert
+
+from app.models.transcription import TranscriptionSegment
+from app.services.archive_service import rehydrate
+
+
+def save_segments(db, transcription_id, segments):
+    """
+    변환 결과의 구간 목록을 일괄 저장 (호출한 세션의 트랜잭션에 포함)
+
+    Args:
+        db: 데이터베이스 세션
+        transcription_id: 변환 결과 ID
+        segments: [{"start": 시작(초), "end": 끝(초), "text": 텍스트}, ...]
+    """
+    if not segments:
+        return
+    db.execute(
+        insert(TranscriptionSegment),
+        [
+            {
+                "transcription_id": transcription_id,
+                "start_ms": int(round(segment["start"] * 1000)),
+                "end_ms": int(round(segment["end"] * 1000)),
+                "text": segment["text"],
+            }
+            for segment in segments
+        ]
+    )
+
+
+def get_segments(db, transcription_id, start=None, end=None):
+    """
+    시간 구간과 겹치는 세그먼트 조회 (시작 시각 순)
+
+    Args:
+        db: 데이터베이스 세션
+        transcription_id: 변환 결과 ID
+        start: 구간 시작(초), 지정하지 않으면 처음부터
+        end: 구간 끝(초), 지정하지 않으면 끝까지
+
+    Returns:
+        list: [{"start", "end", "text"}, ...]
+    """
+    query = db.query(
+        TranscriptionSegment.start_ms,
+        TranscriptionSegment.end_ms,
+        TranscriptionSegment.text
+    ).filter(TranscriptionSegment.transcription_id == transcription_id)
+    if start is not None:
+        query = query.filter(TranscriptionSegment.end_ms > int(start * 1000))
+    if end is not None:
+        query = query.filter(TranscriptionSegment.start_ms < int(end * 1000))
+    return [
+        {"start": start_ms / 1000, "end": end_ms / 1000, "text": text}
+        for start_ms, end_ms, text in query.order_by(TranscriptionSegment.start_ms).all()
+    ]
+
+
+def has_segments(db, transcription_id):
+    """세그먼트가 저장된 변환 결과인지 확인"""
+    return db.query(TranscriptionSegment.id).filter(
+        TranscriptionSegment.transcription_id == transcription_id
+    ).first() is not None
+
+
+def segments_text(segments):
+    """세그먼트 텍스트를 이어 붙인 본문"""
+    return " ".join(segment["text"] for segment in segments)
+
+
+def transcript_text(db, transcription, start=None, end=None):
+    """
+    변환 결과의 전체 본문 또는 시간 구간의 본문 반환
+
+    구간을 지정하면 저장된 세그먼트만 사용하며 (음성 재변환 없음), 해당 구간에
+    세그먼트가 없으면 빈 문자열을 반환합니다.
+    """
+    if start is None and end is None:
+        return rehydrate(db, transcription, "transcription_text")
+    return segments_text(get_segments(db, transcription.id, start, end))
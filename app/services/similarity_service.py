@@ -0,0 +1,327 @@
+import fcntl
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.transcription import Report, Summary
+
+# 색인 문서 종류
+KIND_REPORT = 1
+KIND_SUMMARY = 2
+
+# 한 번에 점수를 계산할 행 수 (임시 메모리 사용량 제한)
+SEARCH_CHUNK_ROWS = 131072
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _flatten(value):
+    """보고서 내용(JSON)에서 문자열 값만 추출"""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten(item)
+    elif value is not None:
+        yield str(value)
+
+
+def report_text(report):
+    """보고서 색인 텍스트 (보관되지 않는 보고서 내용 사용)"""
+    try:
+        return " ".join(_flatten(json.loads(report.content)))
+    except ValueError:
+        return report.content or ""
+
+
+def summary_text(summary):
+    """요약 색인 텍스트"""
+    return summary.summary_text or ""
+
+
+def vectorize(text, dim):
+    """
+    텍스트를 해싱 벡터로 변환 (L2 정규화된 float32)
+
+    단어와 단어 내부의 글자 2-gram(한국어 조사/어미 변화 대응)을 해시하여 고정 차원에
+    누적하고, 긴 문서가 과도한 가중치를 받지 않도록 로그 스케일을 적용합니다.
+    어휘 사전이 필요 없으므로 문서를 하나씩 추가할 수 있습니다.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        features = [word]
+        if len(word) > 2:
+            features += [word[i:i + 2] for i in range(len(word) - 1)]
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            # 해시 충돌이 한쪽으로 쌓이지 않도록 부호도 해시로 결정
+            vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    np.copysign(np.log1p(np.abs(vector)), vector, out=vector)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SimilarityIndex:
+    """
+    보고서/요약 텍스트의 유사도 검색 색인 (메모리 맵 파일)
+
+    벡터 행렬, 문서 키(종류, ID, 템플릿 ID), 메타 정보(차원, 문서 수)를 각각 파일로 두고
+    메모리 맵으로 열기 때문에 여러 서버 프로세스와 워커가 다시 읽지 않고 같은 색인을
+    공유합니다. 추가는 파일 잠금(flock) 안에서 행을 기록한 뒤 문서 수를 마지막에 갱신하므로,
+    검색하는 쪽은 잠금 없이 문서 수까지의 행만 읽으면 됩니다.
+    """
+
+    def __init__(self, root, dim, enabled=True):
+        self.root = root
+        self.dim = dim
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._meta = None
+        self._vectors = None
+        self._keys = None
+        self._capacity = 0
+        self._inode = None
+
+    def _path(self, name, root=None):
+        return os.path.join(root or self.root, name)
+
+    @staticmethod
+    def _create(root, dim):
+        os.makedirs(root, exist_ok=True)
+        meta = np.memmap(os.path.join(root, "meta.i64"), dtype=np.int64, mode="w+", shape=(2,))
+        meta[:] = [dim, 0]
+        meta.flush()
+        for name in ("vectors.f32", "keys.i64"):
+            open(os.path.join(root, name), "wb").close()
+
+    def _map(self):
+        """색인 파일을 메모리 맵으로 열기 (다른 프로세스가 늘리거나 다시 만들었으면 다시 열기)"""
+        meta_path = self._path("meta.i64")
+        if not os.path.exists(meta_path):
+            self._create(self.root, self.dim)
+        inode = os.stat(meta_path).st_ino
+        if self._meta is None or inode != self._inode:
+            self._meta = np.memmap(meta_path, dtype=np.int64, mode="r+", shape=(2,))
+            self._inode = inode
+            self._vectors = None
+            self._capacity = 0
+            if int(self._meta[0]) != self.dim:
+                raise ValueError(
+                    f"색인 차원({int(self._meta[0])})이 설정({self.dim})과 다릅니다. 색인을 다시 만들어 주세요"
+                )
+        count = int(self._meta[1])
+        if self._vectors is None or count > self._capacity:
+            rows = os.path.getsize(self._path("vectors.f32")) // (self.dim * 4)
+            if rows:
+                self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=(rows, self.dim))
+                self._keys = np.memmap(self._path("keys.i64"), dtype=np.int64, mode="r+", shape=(rows, 3))
+            self._capacity = rows
+        return min(count, self._capacity)
+
+    def add(self, documents):
+        """
+        문서 추가
+
+        Args:
+            documents: [(종류, ID, 템플릿 ID, 텍스트), ...]
+        """
+        if not self.enabled or not documents:
+            return
+        vectors = np.stack([vectorize(text, self.dim) for _, _, _, text in documents])
+        keys = np.array([[kind, doc_id, group or 0] for kind, doc_id, group, _ in documents], dtype=np.int64)
+        self._append(vectors, keys)
+
+    def _append(self, vectors, keys):
+        """벡터와 문서 키 행 추가"""
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, open(self._path("index.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                count = self._map()
+                needed = count + len(keys)
+                if needed > self._capacity:
+                    # 파일 크기를 두 배씩 늘려 추가할 때마다 다시 맵을 만들지 않도록 함
+                    rows = max(needed, self._capacity * 2, 1024)
+                    with open(self._path("vectors.f32"), "r+b") as f:
+                        f.truncate(rows * self.dim * 4)
+                    with open(self._path("keys.i64"), "r+b") as f:
+                        f.truncate(rows * 3 * 8)
+                    self._vectors = None
+                    self._map()
+                self._vectors[count:needed] = vectors
+                self._keys[count:needed] = keys
+                # 행을 모두 기록한 뒤 문서 수를 갱신해야 검색 쪽에서 빈 행을 읽지 않음
+                self._meta[1] = needed
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add_reports(self, reports):
+        """보고서 추가"""
+        self.add([(KIND_REPORT, r.id, r.template_id, report_text(r)) for r in reports])
+
+    def add_summaries(self, summaries):
+        """요약 추가"""
+        self.add([(KIND_SUMMARY, s.id, 0, summary_text(s)) for s in summaries])
+
+    def search(self, vector, k=10, kinds=(KIND_REPORT,), group=None, exclude=None):
+        """
+        코사인 유사도 상위 k개 문서 검색
+
+        Args:
+            vector: 질의 벡터 (vectorize 결과)
+            k: 결과 수
+            kinds: 검색할 문서 종류
+            group: 템플릿 ID (지정하면 같은 템플릿의 보고서만 검색)
+            exclude: 제외할 문서 키 (종류, ID)
+
+        Returns:
+            list: [(종류, ID, 점수), ...] 점수 내림차순
+        """
+        if not self.enabled:
+            return []
+        with self._lock:
+            count = self._map()
+            vectors, keys = self._vectors, self._keys
+        if not count:
+            return []
+
+        candidates = []
+        seen = set()
+        for start in range(0, count, SEARCH_CHUNK_ROWS):
+            end = min(start + SEARCH_CHUNK_ROWS, count)
+            chunk_keys = keys[start:end]
+            scores = vectors[start:end] @ vector
+            mask = np.isin(chunk_keys[:, 0], kinds)
+            if group is not None:
+                mask &= (chunk_keys[:, 0] != KIND_REPORT) | (chunk_keys[:, 2] == group)
+            if exclude is not None:
+                mask &= ~((chunk_keys[:, 0] == exclude[0]) & (chunk_keys[:, 1] == exclude[1]))
+            scores = np.where(mask, scores, -np.inf)
+            # 같은 문서가 다시 추가된 경우를 고려해 여유 있게 후보 선택
+            top = min(k * 2, end - start)
+            best = np.argpartition(-scores, top - 1)[:top]
+            candidates.extend(
+                (float(scores[i]), int(chunk_keys[i, 0]), int(chunk_keys[i, 1]))
+                for i in best if scores[i] > -np.inf
+            )
+
+        results = []
+        for score, kind, doc_id in sorted(candidates, reverse=True):
+            if (kind, doc_id) in seen:
+                continue
+            seen.add((kind, doc_id))
+            results.append((kind, doc_id, round(score, 4)))
+            if len(results) == k:
+                break
+        return results
+
+    def stats(self):
+        """색인 차원, 문서 수, 파일 용량(행)"""
+        with self._lock:
+            count = self._map()
+        return {"enabled": self.enabled, "dim": self.dim, "documents": count, "capacity": self._capacity}
+
+    def rebuild(self, db, batch_size=1000):
+        """
+        저장된 보고서와 요약으로 색인을 다시 생성 (색인 도입 시 또는 파일 손상 시 실행)
+
+        임시 디렉터리에 새로 만든 뒤 파일을 교체하므로 재생성 중에도 기존 색인으로 검색할 수 있습니다.
+        재생성 중 기존 색인에 추가된 문서는 교체 직전에 잠금 안에서 옮겨 오고, 마지막으로 읽은
+        ID 이후에 저장된 문서도 다시 조회하여 추가하므로 누락되지 않습니다.
+        """
+        building = SimilarityIndex(self.root.rstrip("/") + ".rebuild", self.dim)
+        self._create(building.root, self.dim)
+        with self._lock:
+            appended_from = self._live_count()
+
+        last_report_id = self._scan(db, Report, building.add_reports, 0, batch_size)
+        last_summary_id = self._scan(db, Summary, building.add_summaries, 0, batch_size)
+
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, open(self._path("index.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # 잠금 안에서는 다른 프로세스가 기존 색인에 추가할 수 없으므로 그동안 추가된 문서를 옮겨 옴
+                count = self._live_count()
+                if appended_from is not None and count is not None and count > appended_from:
+                    building._append(
+                        np.array(self._vectors[appended_from:count]), np.array(self._keys[appended_from:count])
+                    )
+                self._scan(db, Report, building.add_reports, last_report_id, batch_size)
+                self._scan(db, Summary, building.add_summaries, last_summary_id, batch_size)
+                documents = building._map()
+
+                # 메타 파일을 마지막에 교체해야 다른 프로세스가 새 색인 전체를 다시 염
+                for name in ("vectors.f32", "keys.i64", "meta.i64"):
+                    os.replace(building._path(name), self._path(name))
+                self._meta = None
+                self._vectors = None
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return documents
+
+    def _live_count(self):
+        """기존 색인의 문서 수 (색인이 없거나 차원이 달라 옮겨 올 수 없으면 None)"""
+        if not os.path.exists(self._path("meta.i64")):
+            return None
+        try:
+            return self._map()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _scan(db, model, add, last_id, batch_size):
+        """ID 순으로 last_id 이후의 문서를 읽어 추가하고 마지막 ID 반환"""
+        while True:
+            rows = db.query(model).filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                return last_id
+            add(rows)
+            last_id = rows[-1].id
+            db.expunge_all()
+
+
+def index_reports(reports):
+    """
+    새 보고서를 유사도 색인에 추가 (커밋 후 호출)
+
+    색인 오류가 요청 실패로 이어지지 않도록 기록만 남깁니다. (누락된 문서는 rebuild로 복구)
+    """
+    try:
+        similarity_index.add_reports(reports)
+    except Exception as e:
+        print(f"유사도 색인 추가 오류: {str(e)}")
+
+
+def index_summaries(summaries):
+    """새 요약을 유사도 색인에 추가 (커밋 후 호출)"""
+    try:
+        similarity_index.add_summaries(summaries)
+    except Exception as e:
+        print(f"유사도 색인 추가 오류: {str(e)}")
+
+
+# 기본 유사도 색인 인스턴스 생성
+similarity_index = SimilarityIndex(
+    root=settings.SIMILARITY_INDEX_DIR,
+    dim=settings.SIMILARITY_DIM,
+    enabled=settings.SIMILARITY_ENABLED,
+)
+
+
+if __name__ == "__main__":
+    from app.db.base import SessionLocal
+    session = SessionLocal()
+    try:
+        documents = similarity_index.rebuild(session)
+        print(f"유사도 색인을 다시 만들었습니다 ({documents}건).")
+    finally:
+        session.close()
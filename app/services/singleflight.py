@@ -0,0 +1,220 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.db.base import engine
+from app.models.singleflight import SingleFlightResult
+from app.services import usage_service
+
+FILE_HASH_CHUNK_BYTES = 1024 ** 2
+
+
+def file_digest(file_path):
+    """파일 내용 해시 (같은 녹음을 동시에 올린 요청 식별)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(FILE_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    동시에 들어온 같은 요청을 한 번의 외부 API 호출로 처리
+
+    같은 프로세스의 요청은 먼저 시작한 호출의 결과를 기다렸다가 나누어 받습니다.
+    다른 서버/워커의 요청은 Postgres advisory lock으로 한 곳에서만 호출하고, 호출한 쪽이
+    결과를 결과 테이블에 저장하면 잠금을 기다리던 쪽이 저장된 결과를 사용합니다.
+    저장된 결과는 잠금을 기다린 요청만 읽으며 새로 잠금을 얻은 쪽이 지우므로,
+    이미 끝난 호출의 결과를 돌려주는 캐시로 동작하지 않습니다.
+    잠금 연결 풀이 모두 사용 중이거나 잠금/결과 테이블을 사용할 수 없으면 각자 호출합니다.
+    """
+
+    def __init__(self, enabled, result_ttl, wait_timeout, poll_interval, lock_pool_size):
+        self.enabled = enabled
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.lock_pool_size = lock_pool_size
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._lock_engine = None
+        self.counters = {"calls": 0, "shared_local": 0, "shared_remote": 0, "coordination_errors": 0}
+
+    def _get_lock_engine(self):
+        # 잠금을 가진 연결은 외부 API 호출 동안 유지되므로 요청 처리용 연결 풀과 분리하고,
+        # 연결 수를 lock_pool_size로 제한 (풀이 모두 사용 중이면 기다리지 않고 각자 호출)
+        if self._lock_engine is None:
+            self._lock_engine = create_engine(
+                engine.url, pool_size=self.lock_pool_size, max_overflow=0, pool_timeout=0
+            )
+        return self._lock_engine
+
+    def do(self, namespace, key_parts, fn, usage_kind=None):
+        """
+        같은 키의 호출이 진행 중이면 그 결과를, 아니면 fn()을 호출한 결과를 반환
+
+        Args:
+            namespace: 호출 종류 (transcription, summary, report)
+            key_parts: 결과를 결정하는 입력 (JSON으로 직렬화 가능한 값)
+            fn: 실제 호출 함수 (결과는 JSON으로 직렬화 가능해야 함)
+            usage_kind: 결과를 나누어 받은 경우 사용량에 cache_hit으로 기록할 종류
+        """
+        if not self.enabled:
+            return fn()
+        encoded = json.dumps(key_parts, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        key = f"{namespace}:{hashlib.sha256(encoded).hexdigest()}"
+
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            result = future.result()
+            self._shared("shared_local", usage_kind)
+            return copy.deepcopy(result)
+
+        try:
+            result = self._call_once(key, fn, usage_kind)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            # 기다리던 요청은 future의 결과를 복사해 가므로 호출한 쪽도 복사본을 사용
+            future.set_result(result)
+            return copy.deepcopy(result)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _shared(self, counter, usage_kind):
+        with self._lock:
+            self.counters[counter] += 1
+        if usage_kind:
+            usage_service.record(usage_kind, cache_hit=True)
+
+    def _call_once(self, key, fn, usage_kind):
+        try:
+            return self._coordinate(key, fn, usage_kind)
+        except SingleFlightCallError as e:
+            raise e.__cause__
+
+    def _coordinate(self, key, fn, usage_kind):
+        """다른 서버/워커와 advisory lock으로 조율하여 호출"""
+        lock_id = int.from_bytes(hashlib.sha256(key.encode("utf-8")).digest()[:8], "big", signed=True)
+        try:
+            conn = self._get_lock_engine().connect().execution_options(isolation_level="AUTOCOMMIT")
+        except Exception as e:
+            print(f"단일 호출 조율 연결 오류 (각자 호출): {str(e)}")
+            return self._call(fn)
+
+        locked = False
+        try:
+            deadline = time.monotonic() + self.wait_timeout
+            waited = False
+            while True:
+                locked = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar()
+                if locked:
+                    if waited:
+                        # 기다리는 동안 끝난 호출의 결과 (잠금을 풀기 전에 저장됨)
+                        cached = self._load(conn, key)
+                        if cached is not None:
+                            self._shared("shared_remote", usage_kind)
+                            return cached
+                    # 이전에 끝난 호출의 결과는 사용하지 않음
+                    self._discard(conn, key)
+                    break
+                # 잠금을 가진 쪽이 잠금을 얻을 때 이전 결과를 지웠으므로 남은 결과는 진행 중인 호출의 것
+                waited = True
+                cached = self._load(conn, key)
+                if cached is not None:
+                    self._shared("shared_remote", usage_kind)
+                    return cached
+                if time.monotonic() >= deadline:
+                    print(f"단일 호출 대기 시간 초과 (직접 호출): {key}")
+                    break
+                time.sleep(self.poll_interval)
+
+            result = self._call(fn)
+            self._store(conn, key, result)
+            return result
+        except SingleFlightCallError:
+            raise
+        except Exception as e:
+            with self._lock:
+                self.counters["coordination_errors"] += 1
+            print(f"단일 호출 조율 오류 (직접 호출): {str(e)}")
+            return self._call(fn)
+        finally:
+            # 잠금 해제에 실패한 연결은 풀로 돌려보내지 않고 끊어서 세션 잠금을 해제
+            try:
+                if locked:
+                    conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+            except Exception as e:
+                print(f"단일 호출 잠금 해제 오류: {str(e)}")
+                conn.invalidate()
+            finally:
+                conn.close()
+
+    def _call(self, fn):
+        with self._lock:
+            self.counters["calls"] += 1
+        try:
+            return fn()
+        except Exception as e:
+            raise SingleFlightCallError() from e
+
+    def _load(self, conn, key):
+        row = conn.execute(
+            SingleFlightResult.__table__.select()
+            .with_only_columns(SingleFlightResult.value)
+            .where(SingleFlightResult.key == key, SingleFlightResult.expires_at > func.now())
+        ).first()
+        return json.loads(row[0]) if row else None
+
+    def _discard(self, conn, key):
+        conn.execute(SingleFlightResult.__table__.delete().where(SingleFlightResult.key == key))
+
+    def _store(self, conn, key, result):
+        try:
+            expires_at = func.now() + timedelta(seconds=self.result_ttl)
+            value = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            stmt = pg_insert(SingleFlightResult).values(key=key, value=value, expires_at=expires_at)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[SingleFlightResult.key],
+                set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at}
+            ))
+            conn.execute(SingleFlightResult.__table__.delete().where(SingleFlightResult.expires_at < func.now()))
+        except Exception as e:
+            # 결과 저장에 실패해도 호출 결과는 반환 (기다리던 쪽은 직접 호출)
+            print(f"단일 호출 결과 저장 오류: {str(e)}")
+
+    def metrics(self):
+        """외부 호출 수와 결과를 나누어 받은 요청 수"""
+        with self._lock:
+            return {**self.counters, "inflight": len(self._calls)}
+
+
+class SingleFlightCallError(Exception):
+    """실제 호출 함수에서 발생한 오류 (조율 오류와 구분하여 그대로 전달)"""
+
+
+# 기본 단일 호출 인스턴스 생성
+single_flight = SingleFlight(
+    enabled=settings.SINGLEFLIGHT_ENABLED,
+    result_ttl=settings.SINGLEFLIGHT_RESULT_TTL,
+    wait_timeout=settings.SINGLEFLIGHT_WAIT_TIMEOUT,
+    poll_interval=settings.SINGLEFLIGHT_POLL_INTERVAL,
+    lock_pool_size=settings.SINGLEFLIGHT_LOCK_POOL_SIZE,
+)
@@ -0,0 +1,200 @@
+import csv
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.transcription_service import request_transcript, parse_segments, transcribe_audio
+from app.services import usage_service
+
+# 입력 종료 표시
+_END = object()
+
+
+class StreamingTranscription:
+    """
+    업로드, 오디오 추출, 변환을 겹쳐 실행하는 스트리밍 변환 파이프라인
+
+    들어오는 바이트를 ffmpeg 표준 입력으로 바로 넘겨 일정 길이(구간)의 WAV 파일로 나누고,
+    ffmpeg가 구간 파일을 완성할 때마다 Whisper 변환을 병렬로 시작합니다. 따라서 전체 처리
+    시간은 업로드/추출/변환 시간의 합이 아니라 가장 느린 단계에 가까워집니다.
+
+    moov 정보가 파일 끝에 있는 mp4/mov처럼 파이프로 읽을 수 없는 입력은 ffmpeg가 실패하므로,
+    받은 바이트를 작업 공간에도 함께 저장해 두었다가 기존 파일 변환으로 처리합니다.
+    """
+
+    def __init__(self, workspace, file_ext, window_seconds=None, max_workers=None, queue_chunks=None):
+        self.workspace = workspace
+        self.file_ext = file_ext
+        self.window_seconds = window_seconds or settings.STREAM_WINDOW_SECONDS
+        self.input_path = workspace.path("input" + file_ext)
+        self.window_dir = workspace.path("windows")
+        self.list_path = workspace.path("windows.csv")
+        self._queue = queue.Queue(maxsize=queue_chunks or settings.STREAM_QUEUE_CHUNKS)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.STREAM_TRANSCRIBE_CONCURRENCY,
+            thread_name_prefix="stream-transcribe"
+        )
+        self._windows = []  # [(시작 초, 끝 초, Future)]
+        self._transcribe = self._transcribe_window
+        self._process = None
+        self._writer = None
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self._write_error = None
+        self._aborted = False
+        self._list_offset = 0
+
+    def start(self):
+        """ffmpeg 프로세스와 입력 기록/구간 감시 스레드 시작"""
+        os.makedirs(self.window_dir, exist_ok=True)
+        # 구간 변환은 감시 스레드에서 시작되므로 요청의 사용량 수집기를 미리 연결
+        self._transcribe = usage_service.bind(self._transcribe_window)
+        if shutil.which(settings.FFMPEG_BINARY):
+            self._process = subprocess.Popen(
+                [
+                    settings.FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-xerror", "-y",
+                    "-i", "pipe:0",
+                    "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le",
+                    "-f", "segment", "-segment_time", str(self.window_seconds),
+                    "-segment_list", self.list_path, "-segment_list_type", "csv",
+                    "-reset_timestamps", "1",
+                    os.path.join(self.window_dir, "%05d.wav"),
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        self._writer = threading.Thread(target=self._write_loop, name="stream-writer", daemon=True)
+        self._writer.start()
+        self._watcher = threading.Thread(target=self._watch_loop, name="stream-watcher", daemon=True)
+        self._watcher.start()
+
+    async def feed(self, chunk):
+        """입력 바이트 전달 (기록이 밀리면 이벤트 루프를 막지 않도록 스레드에서 대기)"""
+        if self._write_error is not None:
+            raise self._write_error
+        if not self.workspace.try_reserve(len(chunk)):
+            await run_in_threadpool(self.workspace.reserve, len(chunk))
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            await run_in_threadpool(self._queue.put, chunk)
+
+    def _write_loop(self):
+        stdin = self._process.stdin if self._process else None
+        try:
+            with open(self.input_path, "wb") as f:
+                while True:
+                    chunk = self._queue.get()
+                    if chunk is _END or self._aborted:
+                        break
+                    f.write(chunk)
+                    if stdin is not None:
+                        try:
+                            stdin.write(chunk)
+                        except (BrokenPipeError, OSError):
+                            # ffmpeg가 입력을 읽지 못하면 파일 저장만 계속하고 종료 후 대체 경로 사용
+                            stdin = None
+        except Exception as e:
+            self._write_error = e
+            # 입력 대기 중인 요청이 멈추지 않도록 남은 청크 비우기
+            while True:
+                chunk = self._queue.get()
+                if chunk is _END or self._aborted:
+                    break
+        finally:
+            if self._process and self._process.stdin:
+                try:
+                    self._process.stdin.close()
+                except OSError:
+                    pass
+
+    def _scan_windows(self):
+        """ffmpeg가 완성한 구간 파일을 찾아 변환 시작"""
+        if not os.path.exists(self.list_path):
+            return
+        with open(self.list_path, newline="") as f:
+            f.seek(self._list_offset)
+            data = f.read()
+        # 마지막 줄이 아직 기록 중일 수 있으므로 완성된 줄만 처리
+        complete = data[:data.rfind("\n") + 1]
+        self._list_offset += len(complete.encode())
+        for name, start, end in csv.reader(complete.splitlines()):
+            window_path = os.path.join(self.window_dir, os.path.basename(name))
+            if float(end) <= float(start):
+                # 입력을 읽지 못해 생긴 빈 구간은 변환하지 않음
+                continue
+            self.workspace.track_file(window_path)
+            future = self._executor.submit(self._transcribe, window_path, float(start))
+            self._windows.append((float(start), float(end), future))
+
+    def _watch_loop(self):
+        while not self._watcher_stop.wait(0.2):
+            self._scan_windows()
+
+    @staticmethod
+    def _transcribe_window(window_path, offset):
+        try:
+            transcript = request_transcript(window_path)
+            return transcript.text.strip(), parse_segments(transcript, offset)
+        finally:
+            os.unlink(window_path)
+
+    def finish(self):
+        """
+        입력 종료 후 모든 구간의 변환 결과를 합쳐 반환
+
+        Returns:
+            dict: {"text", "duration", "segments"} (transcribe_audio와 같은 형식)
+        """
+        self._queue.put(_END)
+        self._writer.join()
+        if self._write_error is not None:
+            raise self._write_error
+
+        returncode = self._process.wait() if self._process else None
+        self._watcher_stop.set()
+        self._watcher.join()
+        self._scan_windows()
+
+        if returncode != 0 or not self._windows:
+            # 파이프 입력을 처리하지 못한 경우 저장한 파일로 변환
+            self.abort()
+            print("스트리밍 오디오 추출 실패: 저장된 파일로 변환합니다")
+            return transcribe_audio(self.input_path, self.workspace)
+
+        texts, segments = [], []
+        try:
+            for _, _, future in sorted(self._windows, key=lambda w: w[0]):
+                text, window_segments = future.result()
+                if text:
+                    texts.append(text)
+                segments.extend(window_segments)
+        finally:
+            self._executor.shutdown(wait=False)
+        return {
+            "text": " ".join(texts),
+            "duration": int(max(end for _, end, _ in self._windows)),
+            "segments": segments
+        }
+
+    def abort(self):
+        """진행 중인 추출/변환 중단"""
+        self._aborted = True
+        try:
+            self._queue.put_nowait(_END)
+        except queue.Full:
+            pass
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._watcher_stop.set()
+        for _, _, future in self._windows:
+            future.cancel()
+        self._executor.shutdown(wait=False)
@@ -1,9 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
-from app.services.transcription_service import transcribe_audio
+from app.services.fingerprint_service import transcribe_or_reuse
 from app.services.report_service import text_to_report
-from app.services.openai_client import client
+from app.services.model_router import model_router
+from app.services.prompt_compiler import count_tokens
+from app.services.singleflight import single_flight
+from app.services import usage_service
 
-def summarize_audio(file_path, summary_options=None):
+# 요약 보고서 템플릿 정의
+SUMMARY_REPORT_TEMPLATE = {
+    "fields": {
+        "title": {"type": "string", "description": "보고서 제목"},
+        "summary": {"type": "string", "description": "요약 내용"},
+        "key_points": {"type": "array", "description": "주요 포인트 목록"},
+        "action_items": {"type": "array", "description": "필요한 조치 사항 목록"},
+        "additional_notes": {"type": "string", "description": "추가 참고사항"}
+    }
+}
+
+def summarize_audio(file_path, summary_options=None, workspace=None):
     """
     음성/영상 파일을 텍스트로 변환한 후 요약하여 보고서로 반환
     
@@ -13,9 +28,13 @@ def summarize_audio(file_path, summary_options=None):
             - length: 요약 길이 ('short', 'medium', 'long')
             - focus: 요약 초점 ('general', 'key_points', 'action_items')
             - language: 요약 언어 ('ko', 'en', 'ja', 등)
+        workspace: 중간 파일을 저장할 작업 공간
             
     Returns:
-        dict: {"text": 원본 텍스트, "summary": 요약 텍스트, "report": 보고서 형식}
+        dict: {"text": 원본 텍스트, "summary": 요약 텍스트, "report": 보고서 형식,
+               "duration": 파일 길이(초), "segments": 구간 목록,
+               "transcription_id": 재사용한 변환 결과 ID (새로 변환했으면 None),
+               "fingerprint": 오디오 지문}
     """
     # 기본 옵션 설정
     if summary_options is None:
@@ -25,34 +44,68 @@ def summarize_audio(file_path, summary_options=None):
     focus = summary_options.get('focus', 'general')   # 기본값: general
     language = summary_options.get('language', 'ko')  # 기본값: 한국어
     
-    # 음성/영상 파일을 텍스트로 변환
-    transcription_result = transcribe_audio(file_path)
+    # 음성/영상 파일을 텍스트로 변환 (같은 녹음의 기존 변환 결과가 있으면 재사용)
+    transcription_result = transcribe_or_reuse(file_path, workspace)
     original_text = transcription_result["text"]
     
-    # 텍스트 요약
-    summary = create_summary(original_text, length, focus, language)
-    
-    # 보고서 템플릿 정의
-    report_template = {
-        "fields": {
-            "title": {"type": "string", "description": "보고서 제목"},
-            "summary": {"type": "string", "description": "요약 내용"},
-            "key_points": {"type": "array", "description": "주요 포인트 목록"},
-            "action_items": {"type": "array", "description": "필요한 조치 사항 목록"},
-            "additional_notes": {"type": "string", "description": "추가 참고사항"}
-        }
-    }
-    
-    # 요약된 텍스트를 보고서 형식으로 변환
-    report = text_to_report(summary, report_template)
+    # 텍스트 요약 및 보고서 변환
+    result = summarize_text(original_text, length, focus, language)
     
     return {
         "text": original_text,
-        "summary": summary,
-        "report": report,
-        "duration": transcription_result["duration"]
+        "summary": result["summary"],
+        "report": result["report"],
+        "duration": transcription_result["duration"],
+        "segments": transcription_result.get("segments", []),
+        "transcription_id": transcription_result["transcription_id"],
+        "fingerprint": transcription_result["fingerprint"]
     }
 
+def summarize_text(text, length='medium', focus='general', language='ko'):
+    """
+    텍스트를 요약한 후 요약 보고서로 변환
+    
+    Args:
+        text: 요약할 텍스트
+        length: 요약 길이 ('short', 'medium', 'long')
+        focus: 요약 초점 ('general', 'key_points', 'action_items')
+        language: 요약 언어 ('ko', 'en', 'ja', 등)
+        
+    Returns:
+        dict: {"summary": 요약 텍스트, "report": 보고서 형식}
+    """
+    summary = create_summary(text, length, focus, language)
+    
+    # 요약된 텍스트를 보고서 형식으로 변환
+    report = text_to_report(summary, SUMMARY_REPORT_TEMPLATE)
+    
+    return {"summary": summary, "report": report}
+
+def summarize_text_variants(text, variants):
+    """
+    하나의 텍스트에 대해 여러 요약 옵션을 동시에 생성
+    
+    Args:
+        text: 요약할 텍스트
+        variants: 요약 옵션 목록 (dict 목록, length/focus/language)
+        
+    Returns:
+        list: 옵션 순서대로 {"length", "focus", "language", "summary", "report"} 목록
+    """
+    def run(variant):
+        length = variant.get('length') or 'medium'
+        focus = variant.get('focus') or 'general'
+        language = variant.get('language') or 'ko'
+        result = summarize_text(text, length, focus, language)
+        return {"length": length, "focus": focus, "language": language, **result}
+    
+    if not variants:
+        return []
+    
+    max_workers = min(len(variants), settings.SUMMARY_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(usage_service.bind(run), variants))
+
 def create_summary(text, length='medium', focus='general', language='ko'):
     """
     텍스트를 요약
@@ -102,17 +155,20 @@ def create_summary(text, length='medium', focus='general', language='ko'):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 텍스트를 요약하는 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-        )
-        
-        summary = response.choices[0].message.content.strip()
-        return summary
+        # 같은 텍스트/옵션의 요약을 동시에 요청하면 (다른 서버/워커 포함) 한 번만 요청하여 결과를 나누어 받음
+        return single_flight.do("summary", [prompt], lambda: _request_summary(prompt), usage_kind="chat")
     except Exception as e:
         print(f"OpenAI API 오류: {str(e)}")
-        return f"요약 생성 중 오류가 발생했습니다: {str(e)}" 
\ No newline at end of file
+        return f"요약 생성 중 오류가 발생했습니다: {str(e)}" 
+
+def _request_summary(prompt):
+    """요약 요청 (입력 토큰 수와 지연 시간 SLO에 따라 모델 선택, 응답이 늦으면 대체 모델로 중복 요청)"""
+    response = model_router.chat_completion(
+        [
+            {"role": "system", "content": "당신은 텍스트를 요약하는 전문가입니다."},
+            {"role": "user", "content": prompt}
+        ],
+        input_tokens=count_tokens(prompt),
+        options={"temperature": 0.3}
+    )
+    return response.choices[0].message.content.strip()
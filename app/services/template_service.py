@@ -0,0 +1,212 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import bindparam, select, or_
+
+from app.core.config import settings
+from app.models.transcription import ReportTemplateVersion, Report
+from app.services import usage_service
+from app.services.archive_service import load_archived
+from app.services.report_service import text_to_report
+from app.services.report_validator import get_validator
+from app.services.similarity_service import index_reports
+
+
+def field_diff(old_format, new_format):
+    """
+    두 템플릿의 최상위 필드 비교
+
+    Returns:
+        dict: {"added": [...], "changed": [...], "removed": [...]} (필드 이름 목록)
+    """
+    old_fields = old_format.get("fields", {})
+    new_fields = new_format.get("fields", {})
+    return {
+        "added": [name for name in new_fields if name not in old_fields],
+        "changed": [name for name in new_fields if name in old_fields and new_fields[name] != old_fields[name]],
+        "removed": [name for name in old_fields if name not in new_fields],
+    }
+
+
+def _ensure_current_version(db, template):
+    """버전 기록 이전에 만들어진 템플릿의 현재 버전 저장"""
+    exists = db.query(ReportTemplateVersion.id).filter(
+        ReportTemplateVersion.template_id == template.id,
+        ReportTemplateVersion.version == template.version
+    ).first()
+    if exists is None:
+        db.add(ReportTemplateVersion(template_id=template.id, version=template.version, template=template.template))
+
+
+def create_version(db, template):
+    """새 템플릿의 첫 버전 저장 (호출한 세션에서 커밋)"""
+    db.flush()
+    _ensure_current_version(db, template)
+
+
+def update_template(db, template, template_format, name=None, description=None):
+    """
+    템플릿 수정 (호출한 세션에서 커밋, 템플릿은 with_for_update()로 잠가서 조회한 행)
+
+    필드 정의가 바뀌면 버전을 올리고 새 버전의 템플릿과 이전 버전 대비 필드 변경 내역을
+    저장합니다. 이름/설명이나 필드 그룹만 바뀌면 버전은 그대로입니다.
+
+    Returns:
+        dict: 필드 변경 내역 (필드 정의가 바뀌지 않았으면 None)
+    """
+    if name is not None:
+        template.name = name
+    if description is not None:
+        template.description = description
+
+    diff = field_diff(json.loads(template.template), template_format)
+    if not any(diff.values()):
+        # 필드 그룹 등 필드 정의 외의 설정만 바뀌면 기존 보고서에 영향이 없으므로 버전 유지
+        template.template = json.dumps(template_format, ensure_ascii=False)
+        return None
+
+    _ensure_current_version(db, template)
+    template.version += 1
+    template.template = json.dumps(template_format, ensure_ascii=False)
+    db.add(ReportTemplateVersion(
+        template_id=template.id,
+        version=template.version,
+        template=template.template,
+        diff=json.dumps(diff, ensure_ascii=False)
+    ))
+    return diff
+
+
+def _regenerate_content(content, text, template_format, diff, validator):
+    """추가/변경된 필드만 원문에서 다시 생성하여 기존 보고서 내용에 병합"""
+    fields = diff["added"] + diff["changed"]
+    content = {name: value for name, value in content.items() if name not in diff["removed"]}
+    if not fields:
+        return content
+    if text:
+        with usage_service.stage("regenerate"):
+            generated = text_to_report(text, {"fields": {name: template_format["fields"][name] for name in fields}})
+    else:
+        # 원문이 없는 보고서는 기존 값을 유지하고 새 필드만 기본값으로 채움
+        generated = {name: content[name] for name in diff["changed"] if name in content}
+    for name in fields:
+        content[name] = generated[name] if name in generated else validator.default(name)
+    return content
+
+
+def regenerate_reports(db, template, batch_size=None, concurrency=None, on_progress=None, should_stop=None):
+    """
+    이전 버전 템플릿으로 생성된 보고서를 현재 버전에 맞게 갱신
+
+    보고서마다 생성 당시 버전의 템플릿과 현재 템플릿을 비교하여, 추가/변경된 필드만
+    저장된 원문(raw_text)으로 다시 요청하고 기존 내용에 병합합니다(삭제된 필드는 제거).
+    보고서 ID 순으로 일정 개수씩 동시에 처리하고 묶음마다 커밋하므로, 중단된 뒤 다시
+    실행하면 아직 갱신되지 않은 보고서부터 이어서 처리합니다.
+
+    Args:
+        on_progress: 묶음마다 (db, 진행 상황 dict)를 받는 함수 (보고서 갱신과 함께 커밋됨)
+        should_stop: True를 반환하면 다음 묶음을 처리하지 않고 중단
+
+    Returns:
+        dict: {"version", "total", "processed", "regenerated", "skipped", "failed", "failed_ids"}
+    """
+    batch_size = batch_size or settings.REGENERATION_BATCH_SIZE
+    concurrency = concurrency or settings.REGENERATION_CONCURRENCY
+    version = template.version
+    current_format = json.loads(template.template)
+    validator = get_validator(current_format)
+    versions = {
+        number: json.loads(stored)
+        for number, stored in db.query(ReportTemplateVersion.version, ReportTemplateVersion.template)
+        .filter(ReportTemplateVersion.template_id == template.id)
+    }
+    diffs = {}
+
+    def diff_from(report_version):
+        if report_version not in diffs:
+            if report_version not in versions:
+                # 버전 기록이 없는 이전 템플릿은 알 수 없으므로 전체 필드를 다시 생성
+                diffs[report_version] = {"added": list(current_format.get("fields", {})), "changed": [], "removed": []}
+            else:
+                diffs[report_version] = field_diff(versions[report_version], current_format)
+        return diffs[report_version]
+
+    outdated = (
+        Report.template_id == template.id,
+        or_(Report.template_version.is_(None), Report.template_version < version)
+    )
+    progress = {
+        "version": version,
+        "total": db.query(Report).filter(*outdated).count(),
+        "processed": 0,
+        "regenerated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "failed_ids": [],
+    }
+    last_id = 0
+
+    def run(row):
+        content = json.loads(row["content"]) if row["content"] else {}
+        return _regenerate_content(
+            content, row["raw_text"], current_format, diff_from(row["template_version"] or 1), validator
+        )
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while not (should_stop and should_stop()):
+            rows = [
+                row._asdict() for row in db.execute(
+                    select(Report.id, Report.template_version, Report.content, Report.raw_text)
+                    .where(*outdated, Report.id > last_id)
+                    .order_by(Report.id)
+                    .limit(batch_size)
+                )
+            ]
+            if not rows:
+                break
+            last_id = rows[-1]["id"]
+            restored = load_archived(db, Report, "raw_text", [row["id"] for row in rows if row["raw_text"] is None])
+            for row in rows:
+                if row["raw_text"] is None:
+                    row["raw_text"] = restored.get(row["id"])
+                # 비교 결과는 작업 스레드에서 읽기만 하도록 미리 계산
+                diff_from(row["template_version"] or 1)
+            # 외부 API를 호출하는 동안 조회 트랜잭션을 열어 두지 않음
+            db.rollback()
+
+            futures = [(row, executor.submit(usage_service.bind(run), row)) for row in rows]
+            updates = []
+            for row, future in futures:
+                try:
+                    content = future.result()
+                except Exception as e:
+                    print(f"보고서 {row['id']} 재생성 오류: {str(e)}")
+                    progress["failed"] += 1
+                    if len(progress["failed_ids"]) < 100:
+                        progress["failed_ids"].append(row["id"])
+                    continue
+                updates.append({
+                    "report_id": row["id"],
+                    "read_version": row["template_version"],
+                    "new_content": json.dumps(content, ensure_ascii=False),
+                    "new_version": version
+                })
+                progress["regenerated" if row["raw_text"] else "skipped"] += 1
+            if updates:
+                # 다른 재생성 작업이 그사이 갱신한 보고서는 덮어쓰지 않음
+                db.execute(
+                    Report.__table__.update()
+                    .where(
+                        Report.id == bindparam("report_id"),
+                        Report.template_version.is_not_distinct_from(bindparam("read_version"))
+                    )
+                    .values(content=bindparam("new_content"), template_version=bindparam("new_version")),
+                    updates
+                )
+            progress["processed"] += len(rows)
+            if on_progress:
+                on_progress(db, dict(progress))
+            db.commit()
+            if updates:
+                index_reports(db.query(Report).filter(Report.id.in_([u["report_id"] for u in updates])).all())
+    return progress
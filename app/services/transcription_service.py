@@ -1,59 +1,98 @@
 import os
+import time
 import openai
-from pydub import AudioSegment
-import moviepy.editor as mp
 from app.core.config import settings
+from app.services.media_pool import media_pool
+from app.services.media_service import extract_audio_from_video, get_audio_duration
 from app.services.openai_client import client
+from app.services.singleflight import single_flight, file_digest
+from app.services import usage_service
 
-def extract_audio_from_video(video_path):
-    """영상 파일에서 오디오 추출"""
-    audio_path = video_path.replace(os.path.splitext(video_path)[1], ".wav")
-    video = mp.VideoFileClip(video_path)
-    video.audio.write_audiofile(audio_path)
-    return audio_path
+def parse_segments(transcript, offset=0):
+    """Whisper verbose_json 응답에서 구간 목록 추출 (offset: 구간 시각에 더할 초)"""
+    segments = []
+    for segment in transcript.model_dump().get("segments") or []:
+        text = (segment.get("text") or "").strip()
+        if text:
+            segments.append({"start": segment["start"] + offset, "end": segment["end"] + offset, "text": text})
+    return segments
 
-def get_audio_duration(audio_path):
-    """오디오 파일의 길이(초)를 반환"""
-    audio = AudioSegment.from_file(audio_path)
-    return len(audio) / 1000  # 밀리초를 초로 변환
+def request_transcript(audio_path):
+    """Whisper API 변환 요청 (구간별 시간 정보를 함께 받기 위해 verbose_json 형식 사용)"""
+    started = time.monotonic()
+    with open(audio_path, "rb") as audio_file:
+        try:
+            transcript = client.audio.transcriptions.create(
+                model="whisper-1", 
+                file=audio_file,
+                response_format="verbose_json"
+            )
+        except Exception as e:
+            print(f"OpenAI API 오류: {str(e)}")
+            raise
+    # 전송한 오디오 길이(초)를 현재 요청의 사용량 기록에 추가
+    usage_service.record(
+        "transcription",
+        model="whisper-1",
+        audio_seconds=transcript.model_dump().get("duration") or 0,
+        duration_ms=(time.monotonic() - started) * 1000
+    )
+    return transcript
 
-def transcribe_audio(file_path):
+def transcribe_audio(file_path, workspace=None):
     """
     오디오 또는 영상 파일을 텍스트로 변환
     
+    같은 내용의 파일을 동시에 변환하는 요청은 (다른 서버/워커 포함) 한 번만 변환하여 결과를 나누어 받습니다.
+    
     Args:
         file_path: 오디오 또는 영상 파일 경로
+        workspace: 중간 파일을 저장할 작업 공간 (없으면 원본 파일 옆에 저장)
         
     Returns:
-        dict: {"text": 변환된 텍스트, "duration": 파일 길이(초)}
+        dict: {"text": 변환된 텍스트, "duration": 파일 길이(초),
+               "segments": [{"start": 시작(초), "end": 끝(초), "text": 구간 텍스트}, ...]}
     """
+    if not single_flight.enabled:
+        return _transcribe_audio(file_path, workspace)
+    file_ext = os.path.splitext(file_path)[1].lower()
+    return single_flight.do(
+        "transcription",
+        [file_digest(file_path), file_ext, "whisper-1"],
+        lambda: _transcribe_audio(file_path, workspace),
+        usage_kind="transcription"
+    )
+
+def _transcribe_audio(file_path, workspace=None):
+    """파일 변환 (오디오 추출, 길이 확인, Whisper 요청)"""
     file_ext = os.path.splitext(file_path)[1].lower()
     
-    # 영상 파일인 경우 오디오 추출
+    # 영상 파일인 경우 오디오 추출 (디코딩은 미디어 프로세스 풀에서 실행)
     audio_path = file_path
-    if file_ext in ['.mp4', '.avi', '.mov', '.webm']:
-        audio_path = extract_audio_from_video(file_path)
-    
-    # 오디오 파일 길이 확인
-    duration = get_audio_duration(audio_path)
-    
-    # OpenAI Whisper API를 사용하여 변환
-    with open(audio_path, "rb") as audio_file:
-        try:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1", 
-                file=audio_file
-            )
-            transcription_text = transcript.text
-        except Exception as e:
-            print(f"OpenAI API 오류: {str(e)}")
-            raise
-    
-    # 임시 오디오 파일 삭제 (영상 파일에서 추출한 경우)
-    if audio_path != file_path and os.path.exists(audio_path):
-        os.unlink(audio_path)
+    try:
+        if file_ext in ['.mp4', '.avi', '.mov', '.webm']:
+            with usage_service.stage("extract"):
+                if workspace is not None:
+                    audio_path = media_pool.run(extract_audio_from_video, file_path, workspace.path("audio.wav"))
+                    workspace.track_file(audio_path)
+                else:
+                    audio_path = media_pool.run(extract_audio_from_video, file_path)
+        
+        # 오디오 파일 길이 확인
+        with usage_service.stage("probe"):
+            duration = media_pool.run(get_audio_duration, audio_path)
+        
+        # OpenAI Whisper API를 사용하여 변환
+        transcript = request_transcript(audio_path)
+        transcription_text = transcript.text
+        segments = parse_segments(transcript)
+    finally:
+        # 임시 오디오 파일 삭제 (영상 파일에서 추출한 경우)
+        if audio_path != file_path and os.path.exists(audio_path):
+            os.unlink(audio_path)
     
     return {
         "text": transcription_text,
-        "duration": int(duration)
+        "duration": int(duration),
+        "segments": segments
     } 
\ No newline at end of file
@@ -0,0 +1,384 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_
+
+from app.core.config import settings
+from app.db.base import SessionLocal, ON_CLOSE_KEY
+from app.models.upload import UploadSession
+
+CONTENT_RANGE_PATTERN = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+# 요청 세션에서 처리 중인 업로드 ID 목록 (Session.info 키, 세션 종료 시 처리 중 상태를 되돌림)
+_CLAIMED_KEY = "claimed_uploads"
+
+
+class UploadError(Exception):
+    """업로드 세션 요청을 처리할 수 없는 경우 발생"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadInProgress(UploadError):
+    """다른 요청/작업이 처리 중인 업로드 (처리가 끝나거나 claim_timeout이 지나면 다시 처리 가능)"""
+
+    def __init__(self):
+        super().__init__(409, "같은 업로드를 처리 중인 요청이 있습니다")
+
+
+def parse_content_range(header, file_size):
+    """
+    Content-Range 헤더 파싱 (예: bytes 0-1048575/2097152)
+
+    Returns:
+        tuple: (시작, 끝) - 끝은 포함하지 않음
+    """
+    match = CONTENT_RANGE_PATTERN.match((header or "").strip())
+    if not match:
+        raise UploadError(400, "Content-Range 헤더 형식이 올바르지 않습니다 (예: bytes 0-1048575/2097152)")
+    start, last, total = match.groups()
+    start, end = int(start), int(last) + 1
+    if total != "*" and int(total) != file_size:
+        raise UploadError(400, f"Content-Range의 전체 크기가 업로드 세션의 파일 크기({file_size})와 다릅니다")
+    if start >= end or end > file_size:
+        raise UploadError(416, f"요청한 구간이 파일 크기({file_size})를 벗어났습니다")
+    return start, end
+
+
+def merge_range(ranges, start, end):
+    """수신한 구간 목록에 새 구간을 추가하고 겹치거나 이어지는 구간을 병합"""
+    merged = []
+    for s, e in sorted(ranges + [[start, end]]):
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+    return merged
+
+
+def contiguous_offset(ranges):
+    """처음부터 연속으로 수신한 바이트 수 (이어 올리기 시작 위치)"""
+    if ranges and ranges[0][0] == 0:
+        return ranges[0][1]
+    return 0
+
+
+class UploadStore:
+    """
+    분할 업로드 세션과 업로드 파일을 관리
+
+    파일은 세션 생성 시 전체 크기로 미리 만들어 두고, 각 구간은 해당 위치에 바로
+    기록하므로 구간을 임의 순서나 병렬로 보낼 수 있습니다. 수신한 구간 목록은 행 잠금
+    (SELECT ... FOR UPDATE)으로 갱신하여 여러 워커가 동시에 받아도 누락되지 않습니다.
+    완료된 업로드는 처리를 시작할 때 processing 상태로 바꾸므로 한 요청만 처리합니다.
+    """
+
+    def __init__(self, root, max_bytes, session_ttl, sweep_interval, claim_timeout):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self.sweep_interval = sweep_interval
+        self.claim_timeout = claim_timeout
+        self._stop = threading.Event()
+        self._sweeper = None
+
+    def path(self, upload_id, file_name):
+        """업로드 파일 경로 (변환 시 형식을 판별할 수 있도록 원본 확장자 유지)"""
+        return os.path.join(self.root, upload_id + os.path.splitext(file_name)[1].lower())
+
+    def _get(self, db, upload_id, lock=False):
+        query = db.query(UploadSession).filter(UploadSession.id == upload_id)
+        if lock:
+            query = query.with_for_update()
+        upload = query.first()
+        if upload is None or upload.expires_at < datetime.now(timezone.utc):
+            raise UploadError(404, "업로드 세션을 찾을 수 없거나 만료되었습니다")
+        return upload
+
+    def file_size(self, db, upload_id):
+        """업로드 세션의 전체 파일 크기 (세션이 없으면 0)"""
+        size = db.query(UploadSession.file_size).filter(UploadSession.id == upload_id).scalar()
+        return size or 0
+
+    def create(self, db, file_name, file_size):
+        """업로드 세션 생성 및 파일 공간 확보"""
+        if file_size <= 0:
+            raise UploadError(400, "파일 크기는 0보다 커야 합니다")
+        if file_size > self.max_bytes:
+            raise UploadError(413, f"파일 크기가 업로드 한도({self.max_bytes} bytes)를 초과했습니다")
+
+        upload_id = uuid.uuid4().hex
+        file_name = os.path.basename(file_name)
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path(upload_id, file_name), "wb") as f:
+            f.truncate(file_size)
+
+        upload = UploadSession(
+            id=upload_id,
+            file_name=file_name,
+            file_size=file_size,
+            received_ranges="[]",
+            status="uploading",
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=self.session_ttl)
+        )
+        db.add(upload)
+        db.commit()
+        return upload
+
+    def status(self, db, upload_id):
+        """업로드 세션 상태"""
+        upload = self._get(db, upload_id)
+        ranges = json.loads(upload.received_ranges)
+        return {
+            "upload_id": upload.id,
+            "file_name": upload.file_name,
+            "file_size": upload.file_size,
+            "offset": contiguous_offset(ranges),
+            "received_bytes": sum(e - s for s, e in ranges),
+            "ranges": ranges,
+            "status": upload.status,
+            "expires_at": upload.expires_at,
+        }
+
+    async def write_range(self, db, upload_id, content_range, stream):
+        """
+        요청 본문을 Content-Range 위치에 기록하고 수신 구간 갱신
+
+        Args:
+            db: 데이터베이스 세션
+            upload_id: 업로드 ID
+            content_range: Content-Range 헤더 값
+            stream: 요청 본문 바이트 스트림 (async iterator)
+        """
+        # 데이터베이스 조회/잠금 대기와 파일 쓰기는 이벤트 루프를 막지 않도록 스레드에서 실행
+        start, end, file_path = await run_in_threadpool(self._open_range, db, upload_id, content_range)
+
+        position = start
+        fd = await run_in_threadpool(os.open, file_path, os.O_WRONLY)
+        try:
+            async for chunk in stream:
+                if not chunk:
+                    continue
+                if position + len(chunk) > end:
+                    raise UploadError(400, "요청 본문이 Content-Range 구간보다 깁니다")
+                await run_in_threadpool(os.pwrite, fd, chunk, position)
+                position += len(chunk)
+        finally:
+            os.close(fd)
+        # 중간에 끊긴 경우 실제로 받은 부분만 기록
+        return await run_in_threadpool(self._record_range, db, upload_id, start, position)
+
+    def _open_range(self, db, upload_id, content_range):
+        upload = self._get(db, upload_id)
+        if upload.status != "uploading":
+            raise UploadError(409, "이미 완료된 업로드입니다")
+        start, end = parse_content_range(content_range, upload.file_size)
+        file_path = self.path(upload_id, upload.file_name)
+        # 본문을 받는 동안 트랜잭션을 열어 두지 않음 (구간 갱신 시 잠금과 함께 다시 조회)
+        db.rollback()
+        return start, end, file_path
+
+    def _record_range(self, db, upload_id, start, end):
+        if end > start:
+            upload = self._get(db, upload_id, lock=True)
+            upload.received_ranges = json.dumps(merge_range(json.loads(upload.received_ranges), start, end))
+            db.commit()
+        return self.status(db, upload_id)
+
+    def complete(self, db, upload_id):
+        """모든 구간을 받았는지 확인하고 업로드 완료 처리"""
+        upload = self._get(db, upload_id, lock=True)
+        ranges = json.loads(upload.received_ranges)
+        if contiguous_offset(ranges) < upload.file_size:
+            db.rollback()
+            raise UploadError(409, f"아직 받지 않은 구간이 있습니다 (수신 구간: {ranges})")
+        upload.status = "complete"
+        db.commit()
+        return self.status(db, upload_id)
+
+    def claim(self, db, upload_id, owner=None):
+        """
+        완료된 업로드 파일을 처리 파이프라인에 넘기기 위해 processing 상태로 변경
+
+        같은 upload_id로 동시에 요청하면 한 요청만 처리합니다. 처리 중인 서버가 종료되어
+        claim_timeout이 지나도록 processing 상태로 남은 업로드는 다시 처리할 수 있습니다.
+        처리가 끝나면 delete(), 실패하면 release()를 호출합니다. (요청 세션은 종료 시 자동으로 release)
+
+        Args:
+            owner: 처리하는 작업 식별자 (같은 owner는 processing 상태여도 바로 다시 가져감, 예: 재시도한 작업)
+
+        Raises:
+            UploadInProgress: 다른 요청/작업이 처리 중인 경우
+
+        Returns:
+            tuple: (파일 경로, 원본 파일 이름)
+        """
+        now = datetime.now(timezone.utc)
+        claimed = db.query(UploadSession).filter(
+            UploadSession.id == upload_id,
+            UploadSession.expires_at >= now,
+            or_(
+                UploadSession.status == "complete",
+                and_(
+                    UploadSession.status == "processing",
+                    or_(
+                        UploadSession.updated_at < now - timedelta(seconds=self.claim_timeout),
+                        and_(UploadSession.claimed_by.isnot(None), UploadSession.claimed_by == owner)
+                    )
+                )
+            )
+        ).update({"status": "processing", "claimed_by": owner, "updated_at": now}, synchronize_session=False)
+        db.commit()
+        upload = self._get(db, upload_id)
+        if not claimed:
+            if upload.status == "processing":
+                raise UploadInProgress()
+            raise UploadError(409, "업로드가 완료되지 않았습니다. 먼저 완료 요청을 보내주세요")
+        db.info.setdefault(_CLAIMED_KEY, set()).add(upload_id)
+        return self.path(upload_id, upload.file_name), upload.file_name
+
+    def release(self, upload_id, owner=None):
+        """처리에 실패한 업로드를 다시 처리할 수 있도록 complete 상태로 되돌림 (owner: claim()에 넘긴 값)"""
+        db = SessionLocal()
+        try:
+            query = db.query(UploadSession).filter(
+                UploadSession.id == upload_id,
+                UploadSession.status == "processing"
+            )
+            if owner is not None:
+                query = query.filter(UploadSession.claimed_by == owner)
+            query.update({"status": "complete", "claimed_by": None}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def hand_off(self, db, upload_id):
+        """
+        요청이 끝난 뒤 삭제할 업로드를 요청 세션의 처리 목록에서 제외 (요청 종료 시 되돌리지 않음)
+
+        결과 저장이 끝난 뒤 delete()를 호출하는 쪽이 책임지며, 저장에 실패하면
+        claim_timeout이 지난 뒤 다시 처리할 수 있습니다.
+        """
+        db.info.get(_CLAIMED_KEY, set()).discard(upload_id)
+
+    def delete_after(self, db, write, upload_id):
+        """결과 쓰기 묶음(write)이 커밋된 뒤 업로드 삭제 (write-behind에서는 저장 스레드에서 실행)"""
+        self.hand_off(db, upload_id)
+
+        def delete():
+            cleanup_db = SessionLocal()
+            try:
+                self.delete(cleanup_db, upload_id)
+            finally:
+                cleanup_db.close()
+
+        write.after_commit(delete)
+
+    def release_claims(self, db):
+        """세션에서 처리하다 삭제하지 않은 업로드를 되돌림 (요청 세션 종료 시 호출)"""
+        for upload_id in db.info.pop(_CLAIMED_KEY, set()):
+            try:
+                self.release(upload_id)
+            except Exception as e:
+                print(f"업로드 처리 상태 복구 오류 ({upload_id}): {str(e)}")
+
+    def delete(self, db, upload_id):
+        """업로드 세션과 파일 삭제 (처리 완료 또는 취소 시)"""
+        db.info.get(_CLAIMED_KEY, set()).discard(upload_id)
+        upload = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+        if upload is None:
+            return
+        file_path = self.path(upload_id, upload.file_name)
+        db.delete(upload)
+        db.commit()
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+
+    def sweep_expired(self):
+        """만료된 업로드 세션과 세션이 없는 업로드 파일 삭제"""
+        db = SessionLocal()
+        try:
+            expired = [
+                row[0] for row in db.query(UploadSession.id)
+                .filter(UploadSession.expires_at < datetime.now(timezone.utc))
+                .all()
+            ]
+            for upload_id in expired:
+                self.delete(db, upload_id)
+            live = {row[0] for row in db.query(UploadSession.id).all()}
+        finally:
+            db.close()
+
+        removed = len(expired)
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                file_path = os.path.join(self.root, name)
+                if os.path.splitext(name)[0] in live:
+                    continue
+                try:
+                    # 세션 행이 커밋되기 전에 만들어진 파일은 건너뜀
+                    if time.time() - os.path.getmtime(file_path) > self.sweep_interval:
+                        os.unlink(file_path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            print(f"업로드 정리: {removed}개의 만료된 업로드 삭제")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep_expired()
+            except Exception as e:
+                print(f"업로드 정리 오류: {str(e)}")
+
+    def start_sweeper(self):
+        """만료 업로드 정리 스레드 시작"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="upload-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """만료 업로드 정리 스레드 중지"""
+        self._stop.set()
+
+
+def resolve_source(db, upload_file, upload_id):
+    """
+    요청의 입력 파일 확인 (멀티파트 파일 또는 완료된 업로드 ID)
+
+    Returns:
+        tuple: (원본 파일 이름, 업로드 파일 경로 - 멀티파트 파일이면 None)
+    """
+    if upload_id:
+        file_path, file_name = upload_store.claim(db, upload_id)
+        # 처리에 실패하여 삭제되지 않은 업로드는 요청 종료 시 다시 처리할 수 있도록 되돌림
+        db.info.setdefault(ON_CLOSE_KEY, []).append(lambda: upload_store.release_claims(db))
+        return file_name, file_path
+    if upload_file is None:
+        raise UploadError(400, "file 또는 upload_id가 필요합니다")
+    return upload_file.filename, None
+
+
+# 기본 업로드 저장소 인스턴스 생성
+upload_store = UploadStore(
+    root=settings.UPLOAD_DIR,
+    max_bytes=settings.UPLOAD_MAX_BYTES,
+    session_ttl=settings.UPLOAD_SESSION_TTL,
+    sweep_interval=settings.WORKSPACE_SWEEP_INTERVAL,
+    claim_timeout=settings.UPLOAD_CLAIM_TIMEOUT,
+)
@@ -0,0 +1,312 @@
+import contextvars
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.usage import UsageEntry
+
+# 현재 요청(또는 작업)의 사용량 수집기와 기록에 붙일 속성 (템플릿 코드 등)
+_current = contextvars.ContextVar("usage_collector", default=None)
+_labels = contextvars.ContextVar("usage_labels", default={})
+
+# 집계 기준으로 사용할 수 있는 컬럼
+GROUP_COLUMNS = {
+    "day": UsageEntry.day,
+    "endpoint": UsageEntry.endpoint,
+    "template_code": UsageEntry.template_code,
+    "client_id": UsageEntry.client_id,
+    "kind": UsageEntry.kind,
+    "model": UsageEntry.model,
+    "stage": UsageEntry.stage,
+}
+DEFAULT_GROUP_BY = ["day", "template_code", "endpoint"]
+
+
+class UsageCollector:
+    """요청 하나에서 발생한 사용량 기록을 모아 두는 객체"""
+
+    def __init__(self, endpoint=None, client_id=None):
+        self.request_id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.client_id = client_id
+        self.started = time.monotonic()
+        self.entries = []
+
+
+def record(kind, model=None, audio_seconds=0, prompt_tokens=0, completion_tokens=0,
+           cached_tokens=0, cache_hit=None, stage=None, duration_ms=None):
+    """
+    사용량 기록 추가
+
+    요청 처리 중이면 요청이 끝날 때 한꺼번에 기록되고, 그렇지 않으면 바로 기록 대기열에 들어갑니다.
+    """
+    entry = {
+        "kind": kind,
+        "model": model,
+        "stage": stage,
+        "template_code": _labels.get().get("template_code"),
+        "audio_seconds": audio_seconds or 0,
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "cached_tokens": cached_tokens or 0,
+        "cache_hit": cache_hit,
+        "duration_ms": duration_ms,
+        "created_at": datetime.now(timezone.utc),
+    }
+    collector = _current.get()
+    if collector is not None:
+        collector.entries.append(entry)
+    else:
+        usage_writer.submit([entry], request_id=None, endpoint=None, client_id=None)
+
+
+def record_chat(response, duration_ms):
+    """채팅 완성 응답의 토큰 사용량 기록"""
+    usage = response.usage.model_dump() if getattr(response, "usage", None) else {}
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    record(
+        "chat",
+        model=response.model,
+        prompt_tokens=usage.get("prompt_tokens"),
+        completion_tokens=usage.get("completion_tokens"),
+        cached_tokens=cached_tokens,
+        cache_hit=cached_tokens > 0,
+        duration_ms=duration_ms
+    )
+
+
+@contextmanager
+def stage(name):
+    """처리 단계 소요 시간 기록"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record("stage", stage=name, duration_ms=(time.monotonic() - started) * 1000)
+
+
+@contextmanager
+def labels(**values):
+    """블록 안에서 발생한 사용량 기록에 속성 추가 (예: template_code)"""
+    token = _labels.set({**_labels.get(), **values})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def set_labels(**values):
+    """현재 요청의 이후 사용량 기록에 속성 추가"""
+    _labels.set({**_labels.get(), **values})
+
+
+def bind(func):
+    """
+    현재 수집기와 속성을 유지한 채 다른 스레드에서 실행할 함수로 감쌈
+
+    ThreadPoolExecutor나 직접 만든 스레드는 컨텍스트 변수를 물려받지 않으므로 작업을 넘기기 전에 사용합니다.
+    """
+    collector, current_labels = _current.get(), _labels.get()
+
+    def wrapper(*args, **kwargs):
+        collector_token = _current.set(collector)
+        labels_token = _labels.set(current_labels)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _labels.reset(labels_token)
+            _current.reset(collector_token)
+    return wrapper
+
+
+@contextmanager
+def collect(endpoint=None, client_id=None):
+    """
+    요청(또는 작업) 단위 사용량 수집
+
+    블록이 끝나면 전체 소요 시간을 함께 기록 대기열에 넘기며, 데이터베이스 기록은 백그라운드
+    스레드가 모아서 처리하므로 요청 처리 경로에 커밋이 추가되지 않습니다.
+    """
+    collector = UsageCollector(endpoint, client_id)
+    token = _current.set(collector)
+    try:
+        yield collector
+    finally:
+        _current.reset(token)
+        if collector.entries:
+            # 여러 템플릿을 한 번에 생성한 요청은 요청 기록에 템플릿 코드를 붙이지 않음
+            codes = {e["template_code"] for e in collector.entries if e["template_code"]}
+            collector.entries.append({
+                "kind": "request",
+                "model": None,
+                "stage": None,
+                "template_code": codes.pop() if len(codes) == 1 else None,
+                "audio_seconds": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "cache_hit": None,
+                "duration_ms": (time.monotonic() - collector.started) * 1000,
+                "created_at": datetime.now(timezone.utc),
+            })
+            usage_writer.submit(collector.entries, collector.request_id, collector.endpoint, collector.client_id)
+
+
+def _endpoint_label(scope):
+    """요청이 연결된 라우트 경로 (예: POST /api/report/audio)"""
+    endpoint = scope.get("endpoint")
+    for route in getattr(scope.get("app"), "routes", []):
+        if getattr(route, "endpoint", None) is endpoint:
+            return f"{scope['method']} {route.path}"
+    return f"{scope['method']} {scope['path']}"
+
+
+class UsageMiddleware:
+    """요청마다 사용량 수집기를 만들고 요청이 끝나면 엔드포인트/클라이언트와 함께 기록하는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        client_id = headers.get(b"x-client-id", b"").decode() or (scope.get("client") or ("unknown",))[0]
+        with collect(client_id=client_id) as collector:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # 라우팅은 미들웨어 안쪽에서 이루어지므로 처리 후 엔드포인트 확인
+                collector.endpoint = _endpoint_label(scope)
+
+
+class UsageWriter:
+    """사용량 기록을 모아서 일정 주기 또는 일정 개수마다 일괄 저장하는 백그라운드 스레드"""
+
+    def __init__(self, batch_size, flush_interval, max_queue):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self.dropped = 0
+
+    def submit(self, entries, request_id, endpoint, client_id):
+        """기록 대기열에 추가 (대기열이 가득 차면 버림)"""
+        for entry in entries:
+            row = dict(entry, request_id=request_id, endpoint=endpoint, client_id=client_id,
+                       day=entry["created_at"].date())
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.dropped += 1
+
+    def flush(self, rows):
+        if not rows:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(UsageEntry), rows)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"사용량 기록 저장 오류 ({len(rows)}건): {str(e)}")
+        finally:
+            db.close()
+
+    def _drain(self, timeout):
+        rows = []
+        deadline = time.monotonic() + timeout
+        while len(rows) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                rows.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.flush(self._drain(self.flush_interval))
+        # 종료 시 남은 기록 저장
+        while not self._queue.empty():
+            self.flush(self._drain(0))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="usage-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+
+
+def aggregate(db, start=None, end=None, group_by=None):
+    """
+    사용량 집계
+
+    Args:
+        db: 데이터베이스 세션
+        start, end: 조회 기간 (date, 양 끝 포함)
+        group_by: 집계 기준 컬럼 목록 (GROUP_COLUMNS)
+
+    Returns:
+        list: 집계 기준 값과 합계 (요청 수, 오디오 초, 토큰 수, 평균 처리 시간)
+    """
+    group_by = group_by or DEFAULT_GROUP_BY
+    columns = [GROUP_COLUMNS[name] for name in group_by]
+    is_request = UsageEntry.kind == "request"
+    query = db.query(
+        *columns,
+        func.count(func.distinct(UsageEntry.request_id)),
+        func.sum(UsageEntry.audio_seconds),
+        func.sum(UsageEntry.prompt_tokens),
+        func.sum(UsageEntry.completion_tokens),
+        func.sum(UsageEntry.cached_tokens),
+        func.count().filter(UsageEntry.kind == "chat"),
+        func.count().filter(UsageEntry.cache_hit.is_(True)),
+        func.avg(UsageEntry.duration_ms).filter(is_request),
+    )
+    if start:
+        query = query.filter(UsageEntry.day >= start)
+    if end:
+        query = query.filter(UsageEntry.day <= end)
+    rows = query.group_by(*columns).order_by(*columns).all()
+
+    results = []
+    for row in rows:
+        (requests, audio_seconds, prompt_tokens, completion_tokens,
+         cached_tokens, chat_calls, cache_hits, avg_ms) = row[len(columns):]
+        results.append({
+            **dict(zip(group_by, row[:len(columns)])),
+            "requests": requests,
+            "audio_seconds": float(audio_seconds or 0),
+            "prompt_tokens": int(prompt_tokens or 0),
+            "completion_tokens": int(completion_tokens or 0),
+            "cached_tokens": int(cached_tokens or 0),
+            "chat_calls": chat_calls,
+            "cache_hits": cache_hits,
+            "avg_request_ms": round(float(avg_ms), 1) if avg_ms is not None else None,
+        })
+    return results
+
+
+# 기본 사용량 기록기 인스턴스 생성
+usage_writer = UsageWriter(
+    batch_size=settings.USAGE_BATCH_SIZE,
+    flush_interval=settings.USAGE_FLUSH_INTERVAL,
+    max_queue=settings.USAGE_MAX_QUEUE,
+)
@@ -0,0 +1,224 @@
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# 업로드 파일을 작업 공간에 기록할 때 사용하는 청크 크기
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class WorkspaceQuotaExceeded(Exception):
+    """작업 공간 용량 한도 내에서 공간을 확보하지 못한 경우 발생"""
+
+
+class Workspace:
+    """요청 하나가 사용하는 임시 작업 디렉토리"""
+
+    def __init__(self, manager, directory):
+        self.manager = manager
+        self.directory = directory
+        self.reserved_bytes = 0
+        self._closed = False
+
+    def path(self, name):
+        """작업 공간 내부의 파일 경로를 반환"""
+        return os.path.join(self.directory, os.path.basename(name))
+
+    def try_reserve(self, nbytes):
+        """대기 없이 용량 확보를 시도"""
+        if self.manager.reserve(nbytes, timeout=0):
+            self.reserved_bytes += nbytes
+            return True
+        return False
+
+    def reserve(self, nbytes):
+        """용량이 확보될 때까지 대기 (시간 초과 시 WorkspaceQuotaExceeded)"""
+        if not self.manager.reserve(nbytes):
+            raise WorkspaceQuotaExceeded(
+                f"작업 공간 용량 한도({self.manager.quota_bytes} bytes)를 초과하여 요청을 처리할 수 없습니다"
+            )
+        self.reserved_bytes += nbytes
+
+    def track_file(self, file_path):
+        """이미 생성된 중간 파일의 크기를 사용량에 반영 (대기하지 않음)"""
+        if os.path.exists(file_path):
+            size = os.path.getsize(file_path)
+            self.manager.charge(size)
+            self.reserved_bytes += size
+
+    def cleanup(self):
+        """작업 공간 디렉토리를 삭제하고 확보한 용량을 반환"""
+        if self._closed:
+            return
+        self._closed = True
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.manager.release(self, self.reserved_bytes)
+        self.reserved_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
+
+
+class WorkspaceManager:
+    """
+    요청별 작업 공간을 생성하고 전체 용량 한도를 관리
+
+    용량 계산은 프로세스 단위로 이루어지며, 한도를 넘는 요청은 다른 요청이
+    공간을 반환할 때까지 대기합니다. 강제 종료된 워커가 남긴 디렉토리는
+    백그라운드 스위퍼가 정리합니다.
+    """
+
+    def __init__(self, root, quota_bytes, quota_timeout, orphan_ttl, sweep_interval):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.quota_timeout = quota_timeout
+        self.orphan_ttl = orphan_ttl
+        self.sweep_interval = sweep_interval
+        self.used_bytes = 0
+        self._cond = threading.Condition()
+        self._active = set()
+        self._stop = threading.Event()
+        self._sweeper = None
+
+    def _prefix(self, pid=None):
+        # 디렉토리 이름: <호스트>-<pid>-<uuid>
+        return f"{socket.gethostname()}-{pid or os.getpid()}-"
+
+    def create(self):
+        """새 작업 공간을 생성"""
+        os.makedirs(self.root, exist_ok=True)
+        directory = os.path.join(self.root, self._prefix() + uuid.uuid4().hex)
+        os.makedirs(directory)
+        with self._cond:
+            self._active.add(directory)
+        return Workspace(self, directory)
+
+    def reserve(self, nbytes, timeout=None):
+        """전체 한도 내에서 용량을 확보 (확보 실패 시 False)"""
+        if timeout is None:
+            timeout = self.quota_timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            # 단일 요청이 한도보다 큰 경우에도 다른 사용량이 없으면 허용
+            while self.used_bytes > 0 and self.used_bytes + nbytes > self.quota_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.used_bytes += nbytes
+            return True
+
+    def charge(self, nbytes):
+        """대기 없이 사용량만 증가"""
+        with self._cond:
+            self.used_bytes += nbytes
+
+    def release(self, workspace, nbytes):
+        """작업 공간이 사용하던 용량을 반환"""
+        with self._cond:
+            self._active.discard(workspace.directory)
+            self.used_bytes = max(0, self.used_bytes - nbytes)
+            self._cond.notify_all()
+
+    def sweep_orphans(self):
+        """종료된 워커가 남긴 작업 공간과 오래된 작업 공간을 삭제"""
+        if not os.path.isdir(self.root):
+            return 0
+        hostname = socket.gethostname()
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.root):
+            directory = os.path.join(self.root, name)
+            with self._cond:
+                if directory in self._active:
+                    continue
+            try:
+                expired = now - os.path.getmtime(directory) > self.orphan_ttl
+            except OSError:
+                continue
+            dead_owner = False
+            parts = name.rsplit("-", 2)
+            if len(parts) == 3 and parts[0] == hostname and parts[1].isdigit():
+                pid = int(parts[1])
+                dead_owner = pid != os.getpid() and not _pid_alive(pid)
+            if expired or dead_owner:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed += 1
+        if removed:
+            print(f"작업 공간 정리: {removed}개의 고아 디렉토리 삭제")
+        return removed
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep_orphans()
+            except Exception as e:
+                print(f"작업 공간 정리 오류: {str(e)}")
+
+    def start_sweeper(self):
+        """백그라운드 스위퍼 스레드 시작"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self.sweep_orphans()
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="workspace-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """백그라운드 스위퍼 스레드 중지"""
+        self._stop.set()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+async def save_upload(workspace, upload_file, name):
+    """
+    업로드 파일을 청크 단위로 작업 공간에 저장
+
+    Args:
+        workspace: 저장할 작업 공간
+        upload_file: FastAPI UploadFile
+        name: 저장할 파일 이름
+
+    Returns:
+        str: 저장된 파일 경로
+    """
+    file_path = workspace.path(name)
+    with open(file_path, "wb") as f:
+        while True:
+            chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            # 한도 초과 시 이벤트 루프를 막지 않도록 스레드에서 대기
+            if not workspace.try_reserve(len(chunk)):
+                await run_in_threadpool(workspace.reserve, len(chunk))
+            f.write(chunk)
+    return file_path
+
+
+# 기본 작업 공간 관리자 인스턴스 생성
+workspace_manager = WorkspaceManager(
+    root=settings.WORKSPACE_DIR,
+    quota_bytes=settings.WORKSPACE_QUOTA_BYTES,
+    quota_timeout=settings.WORKSPACE_QUOTA_TIMEOUT,
+    orphan_ttl=settings.WORKSPACE_ORPHAN_TTL,
+    sweep_interval=settings.WORKSPACE_SWEEP_INTERVAL,
+)
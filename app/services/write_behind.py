@@ -0,0 +1,292 @@
+import contextvars
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, inspect, text
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.transcription import Transcription, Report, Summary
+
+# 여러 요청의 행을 모델별로 모아 넣을 때의 순서 (외래 키가 참조하는 테이블 먼저)
+INSERT_ORDER = [Transcription, Report, Summary]
+
+# 현재 요청에서 durable 대기 시간이 지나 응답 후에도 저장 중인 쓰기 묶음의 Future 목록
+_pending = contextvars.ContextVar("write_behind_pending", default=None)
+
+
+@contextmanager
+def track_pending():
+    """
+    블록에서 저장을 기다리다 대기 시간이 지나 먼저 응답한 쓰기 묶음의 Future 목록
+
+    Idempotency-Key 미들웨어가 저장 결과를 확인한 뒤 응답을 저장하도록 사용합니다.
+    """
+    pending = []
+    token = _pending.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending.reset(token)
+
+
+class WriteSet:
+    """
+    요청 하나에서 저장할 행과 같은 트랜잭션에서 실행할 작업 묶음
+
+    write-behind를 사용하지 않으면 요청 세션에 바로 추가/실행하고 commit()에서 커밋하며,
+    사용하면 ID를 미리 받아 두고 버퍼에 넣어 다른 요청의 행과 함께 저장합니다.
+    어느 경우든 add() 후에는 객체의 id와 created_at을 사용할 수 있습니다.
+    """
+
+    def __init__(self, buffer, db, durable):
+        self.buffer = buffer
+        self.db = db
+        self.durable = durable
+        self.deferred = buffer.enabled
+        self.objects = []
+        self.operations = []
+        self.future = Future()
+        self._after_commit = []
+
+    def add(self, obj):
+        """행 추가"""
+        if self.deferred:
+            obj.id = self.buffer.allocate_id(type(obj))
+            obj.created_at = datetime.now(timezone.utc)
+            self.objects.append(obj)
+        else:
+            self.db.add(obj)
+            self.db.flush()
+        return obj
+
+    def run(self, fn, *args):
+        """같은 트랜잭션에서 실행할 작업 추가 (fn(db, *args))"""
+        if self.deferred:
+            self.operations.append((fn, args))
+        else:
+            fn(self.db, *args)
+
+    def after_commit(self, callback):
+        """커밋된 뒤 실행할 작업 등록 (write-behind에서는 버퍼가 저장된 뒤 저장 스레드에서 실행)"""
+        self._after_commit.append(callback)
+
+    def commit(self):
+        """
+        커밋 (write-behind에서는 버퍼에 넣고, durable이면 저장될 때까지 대기)
+
+        Returns:
+            bool: 반환 시점에 저장이 끝났는지 여부 (durable 대기 시간이 지나도 저장은 계속 진행)
+        """
+        if not self.deferred:
+            self.db.commit()
+            self._committed()
+            return True
+        # 저장 스레드가 연결 풀을 기다리지 않도록 요청 세션의 연결을 먼저 반환
+        # (조회한 객체는 불러온 값을 그대로 사용할 수 있고, 세션은 이후에도 다시 사용 가능)
+        self.db.close()
+        self.buffer.submit(self)
+        if self.durable:
+            try:
+                self.future.result(timeout=settings.WRITE_BEHIND_DURABLE_TIMEOUT)
+            except FutureTimeoutError:
+                print(f"write-behind 저장 대기 시간 초과 (저장 계속 진행): {self.describe()}")
+                pending = _pending.get()
+                if pending is not None:
+                    pending.append(self.future)
+                return False
+            return True
+        return False
+
+    def describe(self):
+        """로그에 남길 행 목록 (테이블#id)"""
+        return ", ".join(f"{type(obj).__tablename__}#{obj.id}" for obj in self.objects)
+
+    def rows(self):
+        """모델별 insert 행"""
+        for obj in self.objects:
+            mapper = inspect(type(obj))
+            yield type(obj), {
+                attr.key: getattr(obj, attr.key)
+                for attr in mapper.column_attrs
+                if getattr(obj, attr.key) is not None
+            }
+
+    def _committed(self):
+        for callback in self._after_commit:
+            try:
+                callback()
+            except Exception as e:
+                print(f"저장 후 작업 오류: {str(e)}")
+
+
+class WriteBehindBuffer:
+    """
+    여러 요청의 변환 결과/보고서 행을 모아 한 트랜잭션으로 저장하는 write-behind 버퍼
+
+    요청마다 커밋(fsync)하는 대신, 저장 스레드가 일정 간격 또는 일정 개수마다 버퍼의 행을
+    모델별 다중 행 insert로 묶어 한 번에 커밋합니다. ID는 시퀀스에서 미리 여러 개씩 받아 두므로
+    저장 전에도 응답에 ID를 돌려줄 수 있습니다. 묶음 저장에 실패하면 요청별로 나누어 다시 저장하여
+    한 요청의 오류가 다른 요청의 저장을 막지 않습니다.
+    """
+
+    def __init__(self, enabled, batch_size, flush_interval, id_block_size, max_queue):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.id_block_size = id_block_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._ids = {}
+        self._ids_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.stats = {"batches": 0, "write_sets": 0, "rows": 0, "failed": 0, "commit_ms": 0.0}
+        # 저장에 실패한 최근 행 (응답으로 ID를 받았지만 저장되지 않은 행 확인용)
+        self.recent_failures = deque(maxlen=100)
+
+    def begin(self, db, durable=False):
+        """요청의 쓰기 묶음 생성"""
+        return WriteSet(self, db, durable)
+
+    def allocate_id(self, model):
+        """미리 받아 둔 ID 중 하나를 반환 (모두 사용했으면 시퀀스에서 id_block_size개를 더 받음)"""
+        table = model.__tablename__
+        with self._ids_lock:
+            ids = self._ids.setdefault(table, [])
+            if not ids:
+                db = SessionLocal()
+                try:
+                    ids.extend(reversed([
+                        row[0] for row in db.execute(
+                            text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+                            {"table": table, "count": self.id_block_size}
+                        )
+                    ]))
+                    db.commit()
+                finally:
+                    db.close()
+            return ids.pop()
+
+    def submit(self, write_set):
+        """버퍼에 추가 (저장 스레드가 실행 중이 아니면 바로 저장, 버퍼가 가득 차면 대기)"""
+        if not (self._thread and self._thread.is_alive()):
+            self._flush([write_set])
+            return
+        self._queue.put(write_set)
+
+    def _apply(self, db, write_sets):
+        grouped = {model: [] for model in INSERT_ORDER}
+        for write_set in write_sets:
+            for model, row in write_set.rows():
+                grouped.setdefault(model, []).append(row)
+        for model, rows in grouped.items():
+            if rows:
+                db.execute(insert(model), rows)
+        for write_set in write_sets:
+            for fn, args in write_set.operations:
+                fn(db, *args)
+        return sum(len(rows) for rows in grouped.values())
+
+    def _flush(self, write_sets):
+        if not write_sets:
+            return
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            rows = self._apply(db, write_sets)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            db.close()
+            if len(write_sets) > 1:
+                # 오류가 난 요청을 찾기 위해 요청별로 다시 저장
+                for write_set in write_sets:
+                    self._flush([write_set])
+                return
+            rows = write_sets[0].describe()
+            with self._stats_lock:
+                self.stats["failed"] += 1
+                self.recent_failures.append({"rows": rows, "error": str(e)})
+            print(f"write-behind 저장 오류 ({rows}): {str(e)}")
+            write_sets[0].future.set_exception(e)
+            return
+        db.close()
+
+        with self._stats_lock:
+            self.stats["batches"] += 1
+            self.stats["write_sets"] += len(write_sets)
+            self.stats["rows"] += rows
+            self.stats["commit_ms"] += (time.monotonic() - started) * 1000
+        for write_set in write_sets:
+            write_set.future.set_result(True)
+            write_set._committed()
+
+    def _drain(self, timeout):
+        write_sets = []
+        deadline = time.monotonic() + timeout
+        while len(write_sets) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                write_sets.append(
+                    self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return write_sets
+
+    def _loop(self):
+        while not self._stop.is_set():
+            # 첫 항목이 들어올 때까지 기다린 뒤 flush_interval 동안 더 모아서 저장
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._flush([first] + self._drain(self.flush_interval))
+        # 종료 시 남은 행 저장
+        while not self._queue.empty():
+            self._flush(self._drain(0))
+
+    def start(self):
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 10)
+
+    def metrics(self):
+        """묶음 저장 지표 (묶음당 평균 요청/행 수, 평균 커밋 시간)"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            recent_failures = list(self.recent_failures)
+        batches = stats["batches"]
+        return {
+            "enabled": self.enabled,
+            "queue_depth": self._queue.qsize(),
+            **stats,
+            "commit_ms": round(stats["commit_ms"], 1),
+            "average_write_sets": round(stats["write_sets"] / batches, 2) if batches else None,
+            "average_rows": round(stats["rows"] / batches, 2) if batches else None,
+            "average_commit_ms": round(stats["commit_ms"] / batches, 2) if batches else None,
+            "recent_failures": recent_failures,
+        }
+
+
+# 기본 write-behind 버퍼 인스턴스 생성
+write_behind = WriteBehindBuffer(
+    enabled=settings.WRITE_BEHIND_ENABLED,
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+    id_block_size=settings.WRITE_BEHIND_ID_BLOCK_SIZE,
+    max_queue=settings.WRITE_BEHIND_MAX_QUEUE,
+)
@@ -0,0 +1,113 @@
+"""
+읽기 경로 JSON 처리 벤치마크
+
+저장된 JSON 텍스트를 파싱 → Pydantic 검증 → 표준 JSON 인코더로 직렬화하는 기존 방식과
+저장된 JSON 조각을 응답 본문에 그대로 삽입하는 방식의 요청당 CPU 시간을 비교합니다.
+
+실행: python -m benchmarks.json_read_path
+"""
+import json
+import time
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.responses import SplicedJSONResponse, raw_json
+from app.models import schemas
+
+ITERATIONS = 2000
+
+
+def _sample_report(n_items):
+    return {
+        "title": "상담 보고서",
+        "session_summary": "세션 요약 " * 200,
+        "presenting_issues": [f"주호소 문제 {i} " * 5 for i in range(n_items)],
+        "recommendations": [f"권고사항 {i} " * 5 for i in range(n_items)],
+        "client_info": {"name": "홍길동", "age": 9, "gender": "남", "grade": "3학년", "guardian": "모"},
+    }
+
+
+def _legacy_template_list(rows):
+    # 기존 방식: json.loads → Pydantic 모델 → jsonable_encoder → json.dumps
+    models = [
+        schemas.ReportTemplateResponse(
+            id=r["id"], code=r["code"], name=r["name"], description=r["description"],
+            template=json.loads(r["template"]), created_at=r["created_at"], updated_at=None
+        )
+        for r in rows
+    ]
+    return JSONResponse(jsonable_encoder(models)).body
+
+
+def _spliced_template_list(rows):
+    return SplicedJSONResponse([
+        {
+            "code": r["code"], "name": r["name"], "description": r["description"],
+            "template": raw_json(r["template"]), "id": r["id"],
+            "created_at": r["created_at"], "updated_at": None
+        }
+        for r in rows
+    ]).body
+
+
+def _legacy_summary(row):
+    return JSONResponse(jsonable_encoder({
+        "id": row["id"],
+        "text": row["text"],
+        "report": json.loads(row["report_content"]),
+        "created_at": row["created_at"],
+    })).body
+
+
+def _spliced_summary(row):
+    return SplicedJSONResponse({
+        "id": row["id"],
+        "text": row["text"],
+        "report": raw_json(row["report_content"]),
+        "created_at": row["created_at"],
+    }).body
+
+
+def _measure(func, arg):
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        func(arg)
+    return (time.process_time() - start) / ITERATIONS * 1e6
+
+
+def main():
+    now = datetime.now(timezone.utc)
+    template_rows = [
+        {
+            "id": i, "code": f"C{i:03d}", "name": "양식", "description": "설명",
+            "template": json.dumps({"fields": _sample_report(10)}, ensure_ascii=False),
+            "created_at": now,
+        }
+        for i in range(20)
+    ]
+    summary_row = {
+        "id": 1,
+        "text": "긴 변환 텍스트 " * 5000,
+        "report_content": json.dumps(_sample_report(200), ensure_ascii=False),
+        "created_at": now,
+    }
+
+    # 두 방식의 결과가 같은 JSON인지 확인
+    assert json.loads(_legacy_summary(summary_row)) == json.loads(_spliced_summary(summary_row))
+
+    for name, legacy, spliced, arg in [
+        ("GET /report-template/ (20개)", _legacy_template_list, _spliced_template_list, template_rows),
+        ("GET /summary/{id}", _legacy_summary, _spliced_summary, summary_row),
+    ]:
+        legacy_us = _measure(legacy, arg)
+        spliced_us = _measure(spliced, arg)
+        print(
+            f"{name}: 기존 {legacy_us:.1f}µs, 삽입 {spliced_us:.1f}µs "
+            f"(요청당 {legacy_us - spliced_us:.1f}µs 절감, {legacy_us / spliced_us:.1f}배)"
+        )
+
+
+if __name__ == "__main__":
+    main()
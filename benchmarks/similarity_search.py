@@ -0,0 +1,58 @@
+"""
+유사 보고서 검색 벤치마크
+
+임의의 문서 벡터로 색인 파일을 만든 뒤 질의당 상위 k개 검색 시간을 측정합니다.
+(벡터 생성 비용을 줄이기 위해 색인 파일에 직접 기록합니다)
+
+실행: python -m benchmarks.similarity_search [문서 수]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.similarity_service import SimilarityIndex, KIND_REPORT, vectorize
+
+QUERIES = 20
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    dim = settings.SIMILARITY_DIM
+
+    with tempfile.TemporaryDirectory() as root:
+        index = SimilarityIndex(root, dim)
+        index.add([(KIND_REPORT, 0, 1, "색인 초기화")])
+
+        rng = np.random.default_rng(0)
+        vectors = np.memmap(os.path.join(root, "vectors.f32"), dtype=np.float32, mode="w+", shape=(documents, dim))
+        keys = np.memmap(os.path.join(root, "keys.i64"), dtype=np.int64, mode="w+", shape=(documents, 3))
+        for start in range(0, documents, 100_000):
+            end = min(start + 100_000, documents)
+            block = rng.standard_normal((end - start, dim), dtype=np.float32)
+            vectors[start:end] = block / np.linalg.norm(block, axis=1, keepdims=True)
+            keys[start:end, 0] = KIND_REPORT
+            keys[start:end, 1] = np.arange(start, end)
+            keys[start:end, 2] = np.arange(start, end) % 5
+        vectors.flush()
+        keys.flush()
+        meta = np.memmap(os.path.join(root, "meta.i64"), dtype=np.int64, mode="r+", shape=(2,))
+        meta[1] = documents
+        meta.flush()
+
+        query = vectorize("아동 상담 보고서 정서 행동 관찰 가족 관계", dim)
+        index.search(query, k=10)  # 페이지 캐시 적재
+
+        for name, group in [("전체", None), ("같은 템플릿", 1)]:
+            start = time.perf_counter()
+            for _ in range(QUERIES):
+                results = index.search(query, k=10, group=group)
+            elapsed = (time.perf_counter() - start) / QUERIES * 1000
+            print(f"{documents:,}건 {name} 검색 (dim={dim}, k=10): 질의당 {elapsed:.1f}ms, 최고 점수 {results[0][2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import io
+
+from app.services.idempotency_service import READ_CHUNK_BYTES, request_fingerprint
+
+
+def multipart_body(boundary, fields):
+    parts = [
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n"
+        for name, value in fields
+    ]
+    return ("".join(parts) + f"--{boundary}--\r\n").encode("latin-1")
+
+
+def fingerprint(body, content_type, method="POST", path="/api/report/audio", query_string=""):
+    return request_fingerprint(method, path, query_string, content_type, io.BytesIO(body))
+
+
+def multipart_fingerprint(boundary, fields, quoted=False, **kwargs):
+    value = f'"{boundary}"' if quoted else boundary
+    return fingerprint(multipart_body(boundary, fields), f"multipart/form-data; boundary={value}", **kwargs)
+
+
+def test_multipart_boundary_is_ignored():
+    fields = [("code", "C001"), ("upload_id", "abc")]
+    assert multipart_fingerprint("boundary-one", fields) == multipart_fingerprint("other-boundary-2", fields)
+
+
+def test_quoted_boundary_matches_unquoted():
+    fields = [("code", "C001")]
+    assert multipart_fingerprint("xyz123", fields, quoted=True) == multipart_fingerprint("abc987", fields)
+
+
+def test_multipart_field_change_changes_fingerprint():
+    assert (
+        multipart_fingerprint("b1", [("code", "C001")])
+        != multipart_fingerprint("b1", [("code", "C002")])
+    )
+
+
+def spanning_fingerprint(boundary, value_length):
+    fields = [("file", "x" * value_length), ("code", "C001")]
+    body = multipart_body(boundary, fields)
+    second = body.find(boundary.encode("latin-1"), len(boundary))
+    # 두 번째 경계 문자열이 읽기 단위(READ_CHUNK_BYTES) 경계에 걸쳐 있는지 확인
+    assert second < READ_CHUNK_BYTES < second + len(boundary)
+    return fingerprint(body, f"multipart/form-data; boundary={boundary}")
+
+
+def test_boundary_spanning_read_chunks_is_ignored():
+    # 필드 값 길이가 같아야 하므로 두 경계 문자열의 길이를 같게 하고 값 길이를 맞춤
+    header = len('--\r\nContent-Disposition: form-data; name="file"\r\n\r\n') + len("\r\n--")
+    first, second = "boundary-aaaaaaaaaaaaaaaa", "boundary-bbbbbbbbbbbbbbbb"
+    value_length = READ_CHUNK_BYTES - header - len(first) - 5
+    assert spanning_fingerprint(first, value_length) == spanning_fingerprint(second, value_length)
+    assert fingerprint(b"x", "multipart/form-data; boundary=q") != spanning_fingerprint(first, value_length)
+
+
+def test_body_file_is_rewound():
+    body_file = io.BytesIO(b'{"text": "hi"}')
+    request_fingerprint("POST", "/api/report/text", "", "application/json", body_file)
+    assert body_file.tell() == 0
+
+
+def test_content_type_and_query_are_part_of_fingerprint():
+    body = b"code=C001"
+    base = fingerprint(body, "application/x-www-form-urlencoded")
+    assert base != fingerprint(body, "application/json")
+    assert base != fingerprint(body, "application/x-www-form-urlencoded", query_string="durable=true")
+    assert base != fingerprint(body, "application/x-www-form-urlencoded", path="/api/report/text")
+
+
+def test_boundary_text_in_non_multipart_body_is_kept():
+    assert fingerprint(b"--abc--", "text/plain") != fingerprint(b"----", "text/plain")
@@ -0,0 +1,48 @@
+from app.services import report_service
+from app.services.report_service import field_groups
+
+
+def string_fields(count):
+    return {f"f{i}": {"type": "string"} for i in range(count)}
+
+
+def test_field_groups_keeps_small_templates_in_one_group():
+    fields = string_fields(report_service.settings.REPORT_FIELD_GROUP_MIN_FIELDS - 1)
+    assert field_groups({"fields": fields}) == [fields]
+
+
+def test_field_groups_splits_wide_templates_and_keeps_field_order(monkeypatch):
+    monkeypatch.setattr(report_service.settings, "REPORT_FIELD_GROUPS", 3)
+    monkeypatch.setattr(report_service.settings, "REPORT_FIELD_GROUP_MIN_FIELDS", 4)
+    fields = string_fields(9)
+    groups = field_groups({"fields": fields})
+    assert len(groups) == 3
+    assert sorted(name for group in groups for name in group) == sorted(fields)
+    for group in groups:
+        assert list(group) == [name for name in fields if name in group]
+        assert len(group) == 3
+
+
+def test_field_groups_balances_by_expected_output_size(monkeypatch):
+    monkeypatch.setattr(report_service.settings, "REPORT_FIELD_GROUPS", 2)
+    monkeypatch.setattr(report_service.settings, "REPORT_FIELD_GROUP_MIN_FIELDS", 2)
+    fields = {
+        "items": {"type": "array", "items": {"type": "string"}},
+        "a": {"type": "string"},
+        "b": {"type": "string"},
+        "c": {"type": "string"},
+    }
+    groups = field_groups({"fields": fields})
+    assert {"items"} in [set(group) for group in groups]
+    assert {"a", "b", "c"} in [set(group) for group in groups]
+
+
+def test_field_groups_uses_declared_groups_and_collects_rest():
+    fields = string_fields(4)
+    groups = field_groups({"fields": fields, "groups": [["f2", "f0"], ["f0", "missing"], ["f1"]]})
+    assert [list(group) for group in groups] == [["f2", "f0"], ["f1"], ["f3"]]
+
+
+def test_field_groups_with_only_unknown_declared_fields_falls_back_to_all_fields():
+    fields = string_fields(2)
+    assert field_groups({"fields": fields, "groups": [["missing"]]}) == [fields]
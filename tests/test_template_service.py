@@ -0,0 +1,67 @@
+from app.services import template_service
+from app.services.report_validator import get_validator
+from app.services.template_service import _regenerate_content, field_diff
+
+OLD_FORMAT = {"fields": {
+    "title": {"type": "string"},
+    "score": {"type": "number"},
+    "notes": {"type": "string"},
+}}
+NEW_FORMAT = {"fields": {
+    "title": {"type": "string"},
+    "score": {"type": "integer"},
+    "actions": {"type": "array", "items": {"type": "string"}},
+}}
+
+
+def test_field_diff_reports_added_changed_and_removed_fields():
+    assert field_diff(OLD_FORMAT, NEW_FORMAT) == {"added": ["actions"], "changed": ["score"], "removed": ["notes"]}
+
+
+def test_field_diff_of_identical_formats_is_empty():
+    assert field_diff(OLD_FORMAT, OLD_FORMAT) == {"added": [], "changed": [], "removed": []}
+
+
+def test_field_diff_handles_missing_fields():
+    assert field_diff({}, NEW_FORMAT)["added"] == ["title", "score", "actions"]
+    assert field_diff(OLD_FORMAT, {})["removed"] == ["title", "score", "notes"]
+
+
+def regenerate(content, text, monkeypatch, generated=None):
+    requested = []
+
+    def fake_text_to_report(text, template_format):
+        requested.append(list(template_format["fields"]))
+        return dict(generated or {})
+
+    monkeypatch.setattr(template_service, "text_to_report", fake_text_to_report)
+    diff = field_diff(OLD_FORMAT, NEW_FORMAT)
+    result = _regenerate_content(dict(content), text, NEW_FORMAT, diff, get_validator(NEW_FORMAT))
+    return result, requested
+
+
+def test_regenerate_content_requests_only_added_and_changed_fields(monkeypatch):
+    content = {"title": "회의", "score": 3.5, "notes": "메모"}
+    result, requested = regenerate(content, "원문", monkeypatch, {"actions": ["확인"], "score": 4})
+    assert requested == [["actions", "score"]]
+    assert result == {"title": "회의", "score": 4, "actions": ["확인"]}
+
+
+def test_regenerate_content_fills_defaults_for_fields_missing_from_response(monkeypatch):
+    result, _ = regenerate({"title": "회의", "score": 3.5}, "원문", monkeypatch, {"score": 4})
+    assert result["actions"] == []
+
+
+def test_regenerate_content_without_text_keeps_changed_values(monkeypatch):
+    result, requested = regenerate({"title": "회의", "score": 3.5, "notes": "메모"}, None, monkeypatch)
+    assert requested == []
+    assert result == {"title": "회의", "score": 3.5, "actions": []}
+
+
+def test_regenerate_content_with_only_removed_fields_skips_request(monkeypatch):
+    requested = []
+    monkeypatch.setattr(template_service, "text_to_report", lambda *args: requested.append(args))
+    diff = {"added": [], "changed": [], "removed": ["notes"]}
+    result = _regenerate_content({"title": "회의", "notes": "메모"}, "원문", NEW_FORMAT, diff, get_validator(NEW_FORMAT))
+    assert requested == []
+    assert result == {"title": "회의"}
@@ -0,0 +1,60 @@
+import pytest
+
+from app.services.upload_service import UploadError, contiguous_offset, merge_range, parse_content_range
+
+
+def test_parse_content_range_returns_exclusive_end():
+    assert parse_content_range("bytes 0-1023/4096", 4096) == (0, 1024)
+
+
+def test_parse_content_range_accepts_unknown_total():
+    assert parse_content_range("bytes 1024-2047/*", 4096) == (1024, 2048)
+
+
+def test_parse_content_range_allows_last_byte():
+    assert parse_content_range("bytes 4095-4095/4096", 4096) == (4095, 4096)
+
+
+@pytest.mark.parametrize("header", [None, "", "0-1023/4096", "bytes=0-1023/4096", "bytes 0-/4096", "bytes a-b/4096"])
+def test_parse_content_range_rejects_malformed_header(header):
+    with pytest.raises(UploadError) as exc:
+        parse_content_range(header, 4096)
+    assert exc.value.status_code == 400
+
+
+def test_parse_content_range_rejects_mismatched_total():
+    with pytest.raises(UploadError) as exc:
+        parse_content_range("bytes 0-1023/2048", 4096)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("header", ["bytes 0-4096/4096", "bytes 2048-1024/4096"])
+def test_parse_content_range_rejects_out_of_bounds(header):
+    with pytest.raises(UploadError) as exc:
+        parse_content_range(header, 4096)
+    assert exc.value.status_code == 416
+
+
+def test_merge_range_keeps_disjoint_ranges_sorted():
+    assert merge_range([[100, 200]], 0, 50) == [[0, 50], [100, 200]]
+
+
+def test_merge_range_joins_adjacent_ranges():
+    assert merge_range([[0, 100]], 100, 200) == [[0, 200]]
+
+
+def test_merge_range_absorbs_overlapping_and_contained_ranges():
+    assert merge_range([[0, 100], [150, 200], [300, 400]], 50, 350) == [[0, 400]]
+    assert merge_range([[0, 400]], 100, 200) == [[0, 400]]
+
+
+def test_merge_range_does_not_modify_input():
+    ranges = [[0, 100]]
+    merge_range(ranges, 100, 200)
+    assert ranges == [[0, 100]]
+
+
+def test_contiguous_offset_counts_only_leading_range():
+    assert contiguous_offset([]) == 0
+    assert contiguous_offset([[100, 200]]) == 0
+    assert contiguous_offset([[0, 100], [200, 300]]) == 100
@@ -0,0 +1,23 @@
+import argparse
+import signal
+
+from app.db.create_tables import create_tables
+from app.services.job_service import Worker, JOB_HANDLERS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="STT 서비스 작업 워커")
+    parser.add_argument("--concurrency", type=int, default=None, help="동시 처리 작업 수 (기본값: WORKER_CONCURRENCY)")
+    parser.add_argument("--kinds", default=None, help=f"처리할 작업 종류 (쉼표 구분, 예: {','.join(JOB_HANDLERS)})")
+    args = parser.parse_args()
+
+    print("데이터베이스 테이블 확인 중...")
+    create_tables()
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()] if args.kinds else None
+    worker = Worker(concurrency=args.concurrency, kinds=kinds)
+
+    # 종료 신호를 받으면 처리 중인 작업을 마치고 종료
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+
+    worker.run()